@@ -10,26 +10,50 @@ import platform
 import hashlib
 import json
 from pathlib import Path
-from typing import Optional, List, Dict
+from stat import S_ISDIR, S_ISREG
+from typing import Optional, List, Dict, Sequence, Callable, Tuple
 from datetime import datetime
-from send2trash import send2trash
+
+from core.scan_result import ScanResult
+from core.device_scheduler import DeviceScanScheduler
+from core.scan_snapshot import Snapshot, SnapshotStore, diff_snapshots
+from core.tag_index import TagIndex
+from core.thumbnail_cache import ThumbnailCache
+from core.copy_engine import CopyEngine
+from core.checksum_manifest import ChecksumManifest, DEFAULT_ALGORITHM
+from core.bulk_trash import BulkTrash
+from core.transfer_journal import TransferJournal
+from core.operation_journal import OperationJournal
+from core.rename_planner import RenamePlan
+from core.organizer import OrganizeRule
 
 class AdvancedFileManager:
     """Enhanced file manager with advanced features"""
     
-    def __init__(self):
+    def __init__(self, history_name: str = 'history.jsonl'):
         self.system = platform.system()
         self.config_dir = Path.home() / '.file_organizer'
         self.config_dir.mkdir(exist_ok=True)
         
         self.favorites_file = self.config_dir / 'favorites.json'
-        self.history_file = self.config_dir / 'history.json'
+        # Processes running alongside the app pass their own name; two
+        # processes appending to and compacting one log would lose entries
+        self.history_file = self.config_dir / history_name
         self.tags_file = self.config_dir / 'tags.json'
         self.recent_file = self.config_dir / 'recent.json'
+        self.organize_rules_file = self.config_dir / 'organize_rules.json'
+        self.tag_index = TagIndex(self.tags_file)
         
         # Operation history for undo
-        self.operation_history = []
-        self.max_history = 50
+        self.history = OperationJournal(self.history_file)
+        
+        self.scan_scheduler = DeviceScanScheduler()
+        self.snapshots = SnapshotStore(self.config_dir / 'snapshots')
+        self.thumbnails = ThumbnailCache(self.config_dir / 'thumbnails')
+        self.checksums = ChecksumManifest(self.config_dir / 'checksums.jsonl')
+        self.copy_engine = CopyEngine(manifest=self.checksums)
+        self.trash = BulkTrash()
+        self.transfer_journal = TransferJournal(self.config_dir / 'transfers')
     
     # ==================== BASIC OPERATIONS ====================
     
@@ -37,7 +61,7 @@ class AdvancedFileManager:
         """Create a new folder"""
         try:
             path.mkdir(parents=True, exist_ok=False)
-            self._add_to_history('create_folder', str(path))
+            self._add_to_history('create_folder', str(path), {'op': 'rmdir', 'path': str(path)})
             return True
         except Exception as e:
             print(f"Error creating folder: {e}")
@@ -47,7 +71,9 @@ class AdvancedFileManager:
         """Rename a file or folder"""
         try:
             old_path.rename(new_path)
-            self._add_to_history('rename', {'old': str(old_path), 'new': str(new_path)})
+            self.tag_index.move(str(old_path), str(new_path))
+            self._add_to_history('rename', {'old': str(old_path), 'new': str(new_path)},
+                                 {'op': 'move', 'from': str(new_path), 'to': str(old_path)})
             return True
         except Exception as e:
             print(f"Error renaming: {e}")
@@ -56,14 +82,18 @@ class AdvancedFileManager:
     def delete(self, path: Path, use_trash: bool = True) -> bool:
         """Delete a file or folder (safely to trash by default)"""
         try:
+            inverse = None
             if use_trash:
-                send2trash(str(path))
+                trashed, errors = self.trash.trash([path])
+                if errors:
+                    raise OSError(errors[0][1])
+                inverse = self._restore_inverse(path, trashed[0][1])
             else:
                 if path.is_file():
                     path.unlink()
                 elif path.is_dir():
                     shutil.rmtree(path)
-            self._add_to_history('delete', str(path))
+            self._add_to_history('delete', str(path), inverse)
             return True
         except Exception as e:
             print(f"Error deleting: {e}")
@@ -72,26 +102,43 @@ class AdvancedFileManager:
     def move(self, source: Path, destination: Path) -> bool:
         """Move a file or folder"""
         try:
+            replaced = os.path.lexists(destination)
             shutil.move(str(source), str(destination))
-            self._add_to_history('move', {'from': str(source), 'to': str(destination)})
+            self.record_transfer('move', source, destination, replaced)
             return True
         except Exception as e:
             print(f"Error moving: {e}")
             return False
     
-    def copy(self, source: Path, destination: Path) -> bool:
-        """Copy a file or folder"""
+    def copy(self, source: Path, destination: Path, verify: bool = False) -> bool:
+        """Copy a file or folder, with verify reading every copied file back to check it"""
         try:
-            if source.is_file():
-                shutil.copy2(source, destination)
-            else:
-                shutil.copytree(source, destination)
-            self._add_to_history('copy', {'from': str(source), 'to': str(destination)})
+            replaced = os.path.lexists(destination)
+            errors = self.copy_engine.copy(source, destination, verify=verify)
+            if errors:
+                path, error = errors[0]
+                raise OSError(f"{len(errors)} item(s) failed, first {path}: {error}")
+            self.record_transfer('copy', source, destination, replaced)
             return True
         except Exception as e:
             print(f"Error copying: {e}")
             return False
     
+    def record_transfer(self, operation: str, source: Path, destination: Path, replaced: bool = False):
+        """Book-keeping for a finished copy or move
+        
+        Undo trashes a copy or moves an item back, but not when the
+        destination already existed: that copy merged into or replaced it.
+        """
+        inverse = None
+        if operation == 'move':
+            self.tag_index.move(str(source), str(destination))
+            if not replaced:
+                inverse = {'op': 'move', 'from': str(destination), 'to': str(source)}
+        elif not replaced:
+            inverse = {'op': 'trash', 'path': str(destination)}
+        self._add_to_history(operation, {'from': str(source), 'to': str(destination)}, inverse)
+    
     def open_file(self, path: Path) -> bool:
         """Open a file with default application"""
         try:
@@ -108,10 +155,17 @@ class AdvancedFileManager:
     
     # ==================== ADVANCED FILE INFO ====================
     
-    def get_file_info(self, path: Path) -> dict:
-        """Get detailed file information"""
+    def get_file_info(self, path: Path, include_hash: bool = True) -> dict:
+        """Get detailed file information
+        
+        Everything but the hash comes from a single stat call. Pass
+        include_hash=False to skip reading the file, e.g. for previews that
+        hash in the background with calculate_hash().
+        """
         try:
             stat = path.stat()
+            is_dir = S_ISDIR(stat.st_mode)
+            is_file = S_ISREG(stat.st_mode)
             info = {
                 'name': path.name,
                 'path': str(path),
@@ -119,13 +173,14 @@ class AdvancedFileManager:
                 'created': stat.st_ctime,
                 'modified': stat.st_mtime,
                 'accessed': stat.st_atime,
-                'is_dir': path.is_dir(),
-                'extension': path.suffix if path.is_file() else None,
+                'is_dir': is_dir,
+                'is_file': is_file,
+                'extension': path.suffix if is_file else None,
                 'permissions': oct(stat.st_mode)[-3:],
             }
             
             # Add hash for files
-            if path.is_file() and stat.st_size < 100 * 1024 * 1024:  # < 100MB
+            if include_hash and self.is_hashable(info):
                 info['hash'] = self.calculate_hash(path)
             
             return info
@@ -133,14 +188,33 @@ class AdvancedFileManager:
             print(f"Error getting file info: {e}")
             return {}
     
-    def calculate_hash(self, path: Path, algorithm: str = 'md5') -> str:
-        """Calculate file hash"""
+    def is_hashable(self, info: dict) -> bool:
+        """Whether get_file_info would hash a file (regular files under 100MB)"""
+        return info.get('is_file', False) and info['size'] < 100 * 1024 * 1024
+    
+    def calculate_hash(self, path: Path, algorithm: str = DEFAULT_ALGORITHM,
+                       is_cancelled: Callable[[], bool] = None) -> str:
+        """Calculate file hash
+        
+        Checksums recorded by verified copies or earlier calls are reused
+        while the file is unchanged. Returns '' on error, or if
+        is_cancelled() turns True between chunks.
+        """
         try:
+            st = os.stat(path)
+            known = self.checksums.lookup(str(path), st, algorithm)
+            if known:
+                return known
             hash_obj = hashlib.new(algorithm)
             with open(path, 'rb') as f:
-                for chunk in iter(lambda: f.read(4096), b''):
+                for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                    if is_cancelled and is_cancelled():
+                        return ''
                     hash_obj.update(chunk)
-            return hash_obj.hexdigest()
+            digest = hash_obj.hexdigest()
+            if S_ISREG(st.st_mode):
+                self.checksums.record(str(path), st, algorithm, digest)
+            return digest
         except Exception as e:
             print(f"Error calculating hash: {e}")
             return ''
@@ -222,38 +296,23 @@ class AdvancedFileManager:
     
     def add_tag(self, path: str, tag: str):
         """Add tag to file"""
-        tags = self.get_all_tags()
-        
-        if path not in tags:
-            tags[path] = []
-        
-        if tag not in tags[path]:
-            tags[path].append(tag)
-            self._save_json(self.tags_file, tags)
+        self.tag_index.add(path, tag)
     
     def remove_tag(self, path: str, tag: str):
         """Remove tag from file"""
-        tags = self.get_all_tags()
-        
-        if path in tags and tag in tags[path]:
-            tags[path].remove(tag)
-            if not tags[path]:
-                del tags[path]
-            self._save_json(self.tags_file, tags)
+        self.tag_index.remove(path, tag)
     
     def get_tags(self, path: str) -> List[str]:
         """Get tags for a file"""
-        tags = self.get_all_tags()
-        return tags.get(path, [])
+        return self.tag_index.get_tags(path)
     
     def get_all_tags(self) -> Dict:
         """Get all tags"""
-        return self._load_json(self.tags_file, {})
+        return self.tag_index.get_all()
     
     def search_by_tag(self, tag: str) -> List[str]:
         """Find all files with a specific tag"""
-        tags = self.get_all_tags()
-        return [path for path, file_tags in tags.items() if tag in file_tags]
+        return self.tag_index.search(tag)
     
     # ==================== DUPLICATE FINDER ====================
     
@@ -289,51 +348,68 @@ class AdvancedFileManager:
         Pattern: use {n} for number, {name} for original name, {ext} for extension
         Example: "Photo_{n}" -> Photo_1.jpg, Photo_2.jpg, ...
         """
-        success_count = 0
+        plan = RenamePlan.from_pattern(files, pattern, start_num)
+        if not plan.check():
+            for i, problem in plan.problems.items():
+                print(f"Error renaming {plan.sources[i]}: {problem}")
+            return 0
+        done, errors = self.apply_rename_plan(plan)
+        return len(done)
+    
+    def apply_rename_plan(self, plan: RenamePlan, record: bool = True) -> tuple:
+        """Apply a checked RenamePlan as one undoable operation
         
-        for i, file in enumerate(files, start=start_num):
-            try:
-                # Build new name
-                new_name = pattern.replace('{n}', str(i))
-                new_name = new_name.replace('{name}', file.stem)
-                new_name = new_name.replace('{ext}', file.suffix)
-                
-                if not new_name.endswith(file.suffix):
-                    new_name += file.suffix
-                
-                new_path = file.parent / new_name
-                
-                if self.rename(file, new_path):
-                    success_count += 1
-                    
-            except Exception as e:
-                print(f"Error renaming {file}: {e}")
-        
-        return success_count
+        Returns (source, target) renamed and (path, error) failures.
+        """
+        done, errors = plan.apply()
+        for path, error in errors:
+            print(f"Error renaming {path}: {error}")
+        self.tag_index.move_many({str(source): str(target) for source, target in done})
+        if done and record:
+            self._add_to_history('batch_rename', {'count': len(done), 'first': str(done[0][1])},
+                                 {'op': 'rename_batch',
+                                  'renames': [[str(target), str(source)] for source, target in done]})
+        return done, errors
     
     def batch_move(self, files: List[Path], destination: Path) -> int:
         """Move multiple files"""
         success_count = 0
-        for file in files:
-            if self.move(file, destination / file.name):
-                success_count += 1
+        with self.history.batch():
+            for file in files:
+                if self.move(file, destination / file.name):
+                    success_count += 1
         return success_count
     
-    def batch_copy(self, files: List[Path], destination: Path) -> int:
+    def batch_copy(self, files: List[Path], destination: Path, verify: bool = False) -> int:
         """Copy multiple files"""
         success_count = 0
-        for file in files:
-            if self.copy(file, destination / file.name):
-                success_count += 1
+        with self.history.batch():
+            for file in files:
+                if self.copy(file, destination / file.name, verify):
+                    success_count += 1
         return success_count
     
     def batch_delete(self, files: List[Path], use_trash: bool = True) -> int:
         """Delete multiple files"""
-        success_count = 0
-        for file in files:
-            if self.delete(file, use_trash):
-                success_count += 1
-        return success_count
+        with self.history.batch():
+            return len(files) - len(self.delete_many(files, use_trash))
+    
+    def delete_many(self, paths: List[Path], use_trash: bool = True) -> List[tuple]:
+        """Delete a batch of items; returns (path, error) for those that failed"""
+        if not use_trash:
+            errors = []
+            for path in paths:
+                if not self.delete(path, use_trash=False):
+                    errors.append((str(path), "could not delete"))
+            return errors
+        
+        trashed, errors = self.trash.trash(paths)
+        with self.history.batch():
+            for path, location in trashed:
+                self._add_to_history('delete', str(path), self._restore_inverse(path, location))
+        for path, error in errors:
+            print(f"Error deleting {path}: {error}")
+        return errors
     
     # ==================== SEARCH ====================
     
@@ -379,76 +455,165 @@ class AdvancedFileManager:
     
     # ==================== DISK USAGE ====================
     
-    def analyze_disk_usage(self, directory: Path, max_depth: int = 3) -> Dict:
-        """Analyze disk usage by folder"""
-        usage = {
-            'path': str(directory),
-            'size': 0,
-            'file_count': 0,
-            'folder_count': 0,
-            'children': []
-        }
+    def analyze_disk_usage(self, directory: Path, max_depth: int = 3,
+                           save_snapshot: bool = False) -> Dict:
+        """Analyze disk usage by folder
         
+        With save_snapshot, the same scan is also stored as a timestamped
+        snapshot and its file path is returned under 'snapshot'.
+        """
         try:
-            if max_depth <= 0:
-                return usage
-            
-            for item in directory.iterdir():
-                if item.is_file():
-                    usage['size'] += item.stat().st_size
-                    usage['file_count'] += 1
-                elif item.is_dir():
-                    usage['folder_count'] += 1
-                    child_usage = self.analyze_disk_usage(item, max_depth - 1)
-                    usage['size'] += child_usage['size']
-                    usage['file_count'] += child_usage['file_count']
-                    usage['folder_count'] += child_usage['folder_count']
-                    usage['children'].append(child_usage)
-                    
+            scan = self.scan_directory(directory)
+            usage = scan.usage_tree(max_depth)
+            if save_snapshot:
+                usage['snapshot'] = str(self.snapshots.save(scan))
+            return usage
         except Exception as e:
             print(f"Error analyzing disk usage: {e}")
-        
-        return usage
+            return {
+                'path': str(directory),
+                'size': 0,
+                'file_count': 0,
+                'folder_count': 0,
+                'children': []
+            }
     
-    def find_large_files(self, directory: Path, min_size_mb: int = 100) -> List[Dict]:
-        """Find large files"""
-        min_size = min_size_mb * 1024 * 1024
-        large_files = []
+    def find_large_files(self, directory: Path, min_size_mb: int = 100) -> Sequence[Dict]:
+        """Find large files, sorted by size descending
         
+        Returns a lazy sequence of {'path', 'size', 'name'} dicts; paths are
+        only rebuilt for the entries actually read.
+        """
+        min_size = min_size_mb * 1024 * 1024
         try:
-            for file in directory.rglob('*'):
-                if file.is_file():
-                    size = file.stat().st_size
-                    if size >= min_size:
-                        large_files.append({
-                            'path': str(file),
-                            'size': size,
-                            'name': file.name
-                        })
+            return self.scan_directory(directory).largest_files(min_size)
         except Exception as e:
             print(f"Error finding large files: {e}")
+            return []
+    
+    def scan_directory(self, directory: Path) -> ScanResult:
+        """Scan a directory tree into columnar arrays for storage reports
         
-        # Sort by size descending
-        large_files.sort(key=lambda x: x['size'], reverse=True)
-        return large_files
+        Volumes mounted below the root are walked concurrently, each with a
+        worker count suited to its storage type.
+        """
+        return self.scan_scheduler.scan(directory)
+    
+    # ==================== SNAPSHOTS ====================
+    
+    def take_snapshot(self, directory: Path) -> Optional[Path]:
+        """Scan a directory and save it as a timestamped snapshot"""
+        try:
+            return self.snapshots.save(self.scan_directory(directory))
+        except Exception as e:
+            print(f"Error saving snapshot: {e}")
+            return None
+    
+    def get_snapshots(self, directory: Path = None) -> List[Dict]:
+        """Saved snapshots, newest first, optionally only for one folder"""
+        return self.snapshots.list_snapshots(str(directory) if directory else None)
+    
+    def compare_snapshots(self, old_file: str, new_file: str, top: int = 20,
+                          min_file_size_mb: int = 100) -> Dict:
+        """Report the biggest growth and shrinkage between two snapshots"""
+        try:
+            return diff_snapshots(Snapshot.load(Path(old_file)), Snapshot.load(Path(new_file)),
+                                  top=top, min_file_size=min_file_size_mb * 1024 * 1024)
+        except Exception as e:
+            print(f"Error comparing snapshots: {e}")
+            return {}
+    
+    # ==================== ORGANIZE RULES ====================
+    
+    def get_organize_rules(self) -> List[OrganizeRule]:
+        """Saved organize rules, in the order they are tried"""
+        rules = []
+        for data in self._load_json(self.organize_rules_file, []):
+            try:
+                rules.append(OrganizeRule.from_dict(data))
+            except Exception as e:
+                print(f"Error loading organize rule {data}: {e}")
+        return rules
+    
+    def save_organize_rules(self, rules: List[OrganizeRule]):
+        """Save organize rules"""
+        self._save_json(self.organize_rules_file, [rule.to_dict() for rule in rules])
     
     # ==================== HISTORY & UNDO ====================
     
-    def _add_to_history(self, operation: str, data):
-        """Add operation to history"""
-        self.operation_history.append({
-            'operation': operation,
-            'data': data,
-            'timestamp': datetime.now().isoformat()
-        })
-        
-        # Keep only last N operations
-        if len(self.operation_history) > self.max_history:
-            self.operation_history.pop(0)
+    def _add_to_history(self, operation: str, data, inverse: Optional[Dict] = None):
+        """Add operation to history, with how to reverse it if it can be"""
+        self.history.record(operation, data, inverse)
     
     def get_operation_history(self) -> List[Dict]:
         """Get operation history"""
-        return self.operation_history
+        return self.history.entries()
+    
+    def undo(self) -> Tuple[List[Dict], List[Dict]]:
+        """Reverse the last operation or batch; returns the entries undone and
+        those skipped because they can't be undone
+        
+        Raises OSError if reversing fails partway (what was reversed stays
+        reversed).
+        """
+        return self.history.undo(self._apply_inverse)
+    
+    @staticmethod
+    def _restore_inverse(path: Path, location: Optional[str]) -> Optional[Dict]:
+        if location is None:
+            return None  # Trashed by send2trash, which doesn't say where to
+        return {'op': 'restore', 'from': location, 'to': str(path)}
+    
+    def _apply_inverse(self, inverse: Dict):
+        op = inverse['op']
+        if op == 'rmdir':
+            os.rmdir(inverse['path'])
+        elif op == 'trash':
+            trashed, errors = self.trash.trash([Path(inverse['path'])])
+            if errors:
+                raise OSError(errors[0][1])
+        elif op == 'rename_batch':
+            plan = RenamePlan.from_pairs(inverse['renames'])
+            if not plan.check():
+                i, problem = next(iter(plan.problems.items()))
+                raise FileExistsError(f"{plan.sources[i]}: {problem}")
+            done, errors = self.apply_rename_plan(plan, record=False)
+            if errors:
+                raise OSError(errors[0][1])
+        elif op == 'move_batch':
+            moves = inverse['moves']
+            taken = [target for _, target in moves if os.path.lexists(target)]
+            if taken:
+                raise FileExistsError(f"{taken[0]} already exists")
+            moved = {}
+            try:
+                for source, target in moves:
+                    try:
+                        os.rename(source, target)
+                    except OSError:
+                        shutil.move(source, target)  # Different device by now
+                    moved[source] = target
+            finally:
+                self.tag_index.move_many(moved)
+        elif op in ('move', 'restore'):
+            source, target = Path(inverse['from']), Path(inverse['to'])
+            if os.path.lexists(target):
+                raise FileExistsError(f"{target} already exists")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            shutil.move(str(source), str(target))
+            if op == 'move':
+                self.tag_index.move(str(source), str(target))
+            else:
+                info_file = source.parent.parent / 'info' / f"{source.name}.trashinfo"
+                info_file.unlink(missing_ok=True)
+        else:
+            raise ValueError(f"Unknown inverse operation {op}")
+    
+    def close(self):
+        """Write any pending state to disk"""
+        self.tag_index.flush()
+        self.history.close()
+        self.checksums.close()
     
     # ==================== HELPER METHODS ====================
     
@@ -0,0 +1,102 @@
+"""
+core/checksum_manifest.py
+Remembered file checksums, valid while a file's size and mtime are unchanged
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Optional
+
+# What calculate_hash and the duplicate finder use, so they can reuse copy checksums
+DEFAULT_ALGORITHM = 'md5'
+
+
+class ChecksumManifest:
+    """Checksums of files, keyed by path, in an append-only JSONL log
+
+    Verified copies record the digest of the source and of the target, and
+    calculate_hash records what it computes. A record only counts while
+    the file's size and mtime still match the ones hashed, so an edited
+    file is never given its old checksum. Once the log holds many
+    superseded lines it is rewritten with the records still current.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.records: Dict[str, list] = {}  # Path -> [size, mtime_ns, algorithm, digest]
+        self.lock = threading.Lock()
+        self.lines = 0
+        self.handle = None
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self.lines += 1
+                    try:
+                        record = json.loads(line)
+                        self.records[record['path']] = [record['size'], record['mtime_ns'],
+                                                        record['algorithm'], record['digest']]
+                    except (ValueError, KeyError):
+                        continue  # Torn write from a crash
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error loading checksums: {e}")
+
+    def lookup(self, path: str, st: os.stat_result, algorithm: str = DEFAULT_ALGORITHM) -> Optional[str]:
+        """Digest of path if it was hashed with algorithm and hasn't changed since"""
+        record = self.records.get(str(path))
+        if record is None or record[2] != algorithm:
+            return None
+        if record[0] != st.st_size or record[1] != st.st_mtime_ns:
+            return None
+        return record[3]
+
+    def record(self, path: str, st: os.stat_result, algorithm: str, digest: str):
+        path = str(path)
+        entry = [st.st_size, st.st_mtime_ns, algorithm, digest]
+        with self.lock:
+            if self.records.get(path) == entry:
+                return
+            self.records[path] = entry
+            try:
+                if self.handle is None:
+                    self.handle = open(self.path, 'a', encoding='utf-8')
+                self.handle.write(json.dumps({'path': path, 'size': entry[0], 'mtime_ns': entry[1],
+                                              'algorithm': algorithm, 'digest': digest}) + '\n')
+                self.lines += 1
+                if self.lines > 2 * len(self.records) + 1000:
+                    self._compact()
+            except OSError as e:
+                print(f"Error writing checksums: {e}")
+
+    def _compact(self):
+        """Rewrite the log as one line per file that still matches; caller holds the lock"""
+        self.handle.close()
+        self.handle = None
+        current = {}
+        for path, entry in self.records.items():
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if st.st_size == entry[0] and st.st_mtime_ns == entry[1]:
+                current[path] = entry
+        temp_file = self.path.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            for path, (size, mtime_ns, algorithm, digest) in current.items():
+                f.write(json.dumps({'path': path, 'size': size, 'mtime_ns': mtime_ns,
+                                    'algorithm': algorithm, 'digest': digest}) + '\n')
+        temp_file.replace(self.path)
+        self.records = current
+        self.lines = len(current)
+
+    def close(self):
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
@@ -0,0 +1,507 @@
+"""
+core/copy_engine.py
+Kernel-side file copies and parallel copying of small-file trees
+"""
+
+import errno
+import hashlib
+import mmap
+import os
+import shutil
+import stat
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from core.checksum_manifest import DEFAULT_ALGORITHM
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+# Bytes per copy_file_range/sendfile call; also how often progress is reported
+KERNEL_CHUNK = 8 * 1024 * 1024
+# Buffer for the plain read/write fallback
+BUFFER_SIZE = 1024 * 1024
+# Files up to this size are copied on the thread pool, larger ones one at a time
+SMALL_FILE_LIMIT = 1024 * 1024
+# Small files handed to the pool per task
+BATCH_SIZE = 256
+# With a journal, large files are synced and checkpointed this often
+CHECKPOINT_BYTES = 64 * 1024 * 1024
+
+# Errors meaning "this kernel or filesystem can't do that", not "the copy failed"
+UNSUPPORTED_ERRORS = {errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP,
+                      errno.ENOTSUP, errno.EBADF, errno.ETXTBSY}
+
+# linux/fs.h: _IOW(0x94, 9, int), share the source's extents with the target
+FICLONE = 0x40049409
+
+# Flushes file data without the metadata, where the platform can
+sync_data = getattr(os, 'fdatasync', os.fsync)
+
+HAVE_COPY_FILE_RANGE = hasattr(os, 'copy_file_range')
+HAVE_SENDFILE = hasattr(os, 'sendfile') and sys.platform.startswith('linux')
+# Verification reads that skip the page cache
+HAVE_O_DIRECT = hasattr(os, 'O_DIRECT') and hasattr(os, 'preadv')
+
+
+class CopyInterrupted(Exception):
+    """Raised by a checkpoint to stop a copy that will be resumed later
+
+    A partly written file whose progress is in the journal is kept for the
+    resume instead of being deleted.
+    """
+
+
+class CopyEngine:
+    """Copies files without moving the data through Python where possible
+
+    Files are first cloned with the FICLONE ioctl, which on btrfs, XFS and
+    other copy-on-write filesystems shares the source's extents instead of
+    copying data: a multi-GB file copies in milliseconds and takes no
+    extra space until either side is modified. Whether cloning works is
+    remembered per (source device, target device), so volumes without it
+    pay for one failed ioctl only. Otherwise each file is copied with
+    ``copy_file_range`` (in-kernel, and offloaded
+    to the server or storage on filesystems that support it), then
+    ``sendfile``, then a ``readinto`` loop over one reused buffer. Trees
+    are walked once: folders are created as they are found, small files
+    are copied in batches on a thread pool so per-file open/close latency
+    overlaps, and large files stream one at a time at device speed.
+    Metadata is set through the open descriptor, and folder times are
+    applied in one pass at the end, after their contents stop changing.
+
+    ``progress(bytes)`` and ``checkpoint()`` are optional callbacks;
+    progress calls are serialized. Anything ``checkpoint`` raises aborts
+    the copy and propagates. With a ``journal`` (see transfer_journal),
+    files it lists as copied whose target still matches are skipped,
+    large files resume from their last checkpoint, and new progress is
+    recorded in it. A failed file's target is deleted, unless the copy was
+    stopped with CopyInterrupted and the journal holds its offset.
+
+    With ``verify``, cloning and the kernel copies are skipped so every
+    byte passes through the buffer, where it is hashed on its way to the
+    target. The target is then synced and read back once, with O_DIRECT
+    where the filesystem allows so the read comes from the device rather
+    than the page cache, and a mismatch fails the file like any other
+    error. Both digests go into ``manifest`` (see checksum_manifest).
+    """
+
+    def __init__(self, workers: int = 8, manifest=None):
+        self.workers = workers
+        self.manifest = manifest
+        self.clone_support: Dict[Tuple[int, int], bool] = {}
+
+    # ==================== PUBLIC API ====================
+
+    def copy(self, source: Path, target: Path, progress: Callable[[int], None] = None,
+             checkpoint: Callable[[], None] = None, journal=None,
+             verify: bool = False) -> List[Tuple[str, str]]:
+        """Copy a file, link or tree to ``target``, merging into existing folders
+
+        Returns (path, error) for every entry that could not be copied.
+        Raises shutil.SameFileError when target is source, or a link to it.
+        """
+        _check_not_same(str(source), str(target))
+        run = _CopyRun(self, progress, checkpoint, journal, verify)
+        try:
+            run.copy_entry(str(source), str(target))
+        except BaseException:
+            run.abort()
+            raise
+        run.finish()
+        return run.errors
+
+    def copy_file(self, source: str, target: str, progress: Callable[[int], None] = None,
+                  checkpoint: Callable[[], None] = None, st: os.stat_result = None, journal=None,
+                  verify: bool = False):
+        """Copy one regular file's data and metadata
+
+        Raises shutil.SameFileError, before touching anything, when target
+        is source or a hard or symbolic link to it.
+        """
+        source = str(source)
+        with open(source, 'rb') as src:
+            if st is None:
+                st = os.fstat(src.fileno())
+            _check_not_same(source, target, st)
+            if journal is not None and journal.is_file_done(source, st, target):
+                if progress:
+                    progress(st.st_size)
+                return
+            start = journal.resume_offset(source, st) if journal is not None else 0
+            try:
+                with self._open_target(target, start) as dst:
+                    start = dst.tell()
+                    if progress and start:
+                        progress(start)
+                    digest = hashlib.new(DEFAULT_ALGORITHM) if verify else None
+                    if not start and not verify and self._clone(src.fileno(), dst.fileno(), st):
+                        if progress:
+                            progress(st.st_size)
+                    else:
+                        on_checkpoint = None
+                        if journal is not None:
+                            def on_checkpoint(offset, fd=dst.fileno()):
+                                sync_data(fd)
+                                journal.partial(source, offset, st)
+                        if digest is not None and start:
+                            self._hash_range(src.fileno(), start, digest)
+                        self._copy_data(src.fileno(), dst.fileno(), st.st_size, progress, checkpoint,
+                                        start, on_checkpoint, digest)
+                    copy_metadata(st, dst.fileno(), target)
+                    if digest is not None:
+                        self._verify(source, st, target, dst.fileno(), digest.hexdigest())
+            except BaseException as e:
+                if isinstance(e, CopyInterrupted) and journal is not None and journal.resume_offset(source, st):
+                    raise  # Resumed from the journal's offset next time
+                # Never leave a truncated file behind
+                try:
+                    os.unlink(target)
+                except OSError:
+                    pass
+                raise
+        if journal is not None:
+            journal.file_done(source)
+
+    @staticmethod
+    def _open_target(target: str, start: int):
+        """Target opened for writing at start, or truncated if it is shorter than that"""
+        if start:
+            try:
+                dst = open(target, 'r+b')
+            except OSError:
+                pass
+            else:
+                if os.fstat(dst.fileno()).st_size >= start:
+                    dst.truncate(start)
+                    dst.seek(start)
+                    return dst
+                dst.close()
+        return open(target, 'wb')
+
+    # ==================== DATA ====================
+
+    def _clone(self, src_fd: int, dst_fd: int, st: os.stat_result) -> bool:
+        """Reflink the whole file if the filesystem allows; False to copy instead"""
+        if fcntl is None or not st.st_size:
+            return False
+        devices = (st.st_dev, os.fstat(dst_fd).st_dev)
+        if self.clone_support.get(devices) is False:
+            return False
+        try:
+            fcntl.ioctl(dst_fd, FICLONE, src_fd)
+        except OSError as e:
+            if e.errno in UNSUPPORTED_ERRORS or e.errno == errno.ENOTTY:
+                self.clone_support[devices] = False
+                return False
+            raise
+        self.clone_support[devices] = True
+        return True
+
+    def _copy_data(self, src_fd: int, dst_fd: int, size: int,
+                   progress: Optional[Callable[[int], None]], checkpoint: Optional[Callable[[], None]],
+                   offset: int = 0, on_checkpoint: Optional[Callable[[int], None]] = None,
+                   digest=None):
+        """Copy from offset to EOF, calling on_checkpoint every CHECKPOINT_BYTES
+
+        With a ``digest``, the copy goes through the buffer and every chunk
+        is hashed as it passes.
+        """
+        if on_checkpoint is not None:
+            marks = {'last': offset}
+
+            def counted(count, offset_after):
+                if progress:
+                    progress(count)
+                if offset_after - marks['last'] >= CHECKPOINT_BYTES:
+                    marks['last'] = offset_after
+                    on_checkpoint(offset_after)
+            report = counted
+        else:
+            report = (lambda count, offset_after: progress(count)) if progress else None
+
+        if digest is None and offset < size and HAVE_COPY_FILE_RANGE:
+            offset = self._kernel_copy(os.copy_file_range, src_fd, dst_fd, offset, report, checkpoint)
+        if digest is None and offset is not None and offset < size and HAVE_SENDFILE:
+            offset = self._kernel_copy(self._sendfile, src_fd, dst_fd, offset, report, checkpoint)
+        if offset is None:
+            return
+
+        # Plain read/write for whatever is left, including files that grew
+        os.lseek(src_fd, offset, os.SEEK_SET)
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+        buffer = bytearray(min(BUFFER_SIZE, max(size - offset, 1)))
+        view = memoryview(buffer)
+        with os.fdopen(os.dup(src_fd), 'rb', buffering=0) as reader:
+            while True:
+                if checkpoint:
+                    checkpoint()
+                count = reader.readinto(buffer)
+                if not count:
+                    break
+                if digest is not None:
+                    digest.update(view[:count])
+                written = 0
+                while written < count:
+                    written += os.write(dst_fd, view[written:count])
+                offset += count
+                if report:
+                    report(count, offset)
+
+    def _kernel_copy(self, copier, src_fd: int, dst_fd: int, offset: int,
+                     report, checkpoint) -> Optional[int]:
+        """Copy from offset to EOF; returns None when finished, else where to resume"""
+        while True:
+            if checkpoint:
+                checkpoint()
+            try:
+                count = copier(src_fd, dst_fd, KERNEL_CHUNK, offset)
+            except OSError as e:
+                if e.errno in UNSUPPORTED_ERRORS:
+                    return offset
+                raise
+            if count == 0:
+                # EOF, but some filesystems (procfs, sysfs) report 0 for data that exists
+                return None if offset else offset
+            offset += count
+            if report:
+                report(count, offset)
+
+    @staticmethod
+    def _sendfile(src_fd: int, dst_fd: int, count: int, offset: int) -> int:
+        os.lseek(dst_fd, offset, os.SEEK_SET)
+        return os.sendfile(dst_fd, src_fd, offset, count)
+
+    # ==================== VERIFICATION ====================
+
+    @staticmethod
+    def _hash_range(fd: int, end: int, digest):
+        """Hash the first ``end`` bytes, for a copy resuming part way"""
+        offset = 0
+        while offset < end:
+            chunk = os.pread(fd, min(BUFFER_SIZE, end - offset), offset)
+            if not chunk:
+                break
+            digest.update(chunk)
+            offset += len(chunk)
+
+    def _verify(self, source: str, st: os.stat_result, target: str, dst_fd: int, expected: str):
+        """Read the written target back once and compare; raises on mismatch"""
+        sync_data(dst_fd)
+        actual = read_digest(target, DEFAULT_ALGORITHM, dst_fd)
+        if actual != expected:
+            raise OSError(errno.EIO, f"Verification failed: {target} does not match {source}")
+        if self.manifest is not None:
+            self.manifest.record(source, st, DEFAULT_ALGORITHM, expected)
+            self.manifest.record(target, os.fstat(dst_fd), DEFAULT_ALGORITHM, expected)
+
+
+def read_digest(path: str, algorithm: str = DEFAULT_ALGORITHM, cached_fd: int = None) -> str:
+    """Hash a file from the device rather than the page cache where possible
+
+    O_DIRECT reads go to the device. Filesystems that refuse O_DIRECT
+    (tmpfs, some network mounts) are read normally, after asking the
+    kernel to drop the file's already synced pages from ``cached_fd``.
+    """
+    if HAVE_O_DIRECT:
+        try:
+            fd = os.open(path, os.O_RDONLY | os.O_DIRECT)
+        except OSError:
+            fd = None
+        if fd is not None:
+            try:
+                return _read_direct(fd, algorithm)
+            except OSError as e:
+                if e.errno != errno.EINVAL:
+                    raise  # EINVAL: opened, but the reads aren't allowed
+            finally:
+                os.close(fd)
+
+    if cached_fd is not None and hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(cached_fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        except OSError:
+            pass
+    digest = hashlib.new(algorithm)
+    buffer = bytearray(BUFFER_SIZE)
+    view = memoryview(buffer)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            count = f.readinto(buffer)
+            if not count:
+                break
+            digest.update(view[:count])
+    return digest.hexdigest()
+
+
+def _read_direct(fd: int, algorithm: str) -> str:
+    # Anonymous mmap memory is page aligned, as O_DIRECT requires
+    digest = hashlib.new(algorithm)
+    buffer = mmap.mmap(-1, BUFFER_SIZE)
+    try:
+        offset = 0
+        while True:
+            count = os.preadv(fd, [buffer], offset)
+            with memoryview(buffer) as view:
+                digest.update(view[:count])
+            offset += count
+            # A short read is the end; reading on from an unaligned offset would fail
+            if count < BUFFER_SIZE:
+                break
+    finally:
+        buffer.close()
+    return digest.hexdigest()
+
+
+def _check_not_same(source: str, target: str, st: os.stat_result = None):
+    """Raise SameFileError if target resolves to the same file as source"""
+    try:
+        target_st = os.stat(target)
+        if st is None:
+            st = os.stat(source)
+    except OSError:
+        return  # No target yet, or a missing source that fails on its own
+    if (target_st.st_dev, target_st.st_ino) == (st.st_dev, st.st_ino):
+        raise shutil.SameFileError(f"{source} and {target} are the same file")
+
+
+def copy_metadata(st: os.stat_result, fd: Optional[int], path: str):
+    """Permission bits and timestamps, through fd where the platform allows"""
+    mode = stat.S_IMODE(st.st_mode)
+    times = (st.st_atime_ns, st.st_mtime_ns)
+    if fd is not None and os.chmod in os.supports_fd:
+        os.chmod(fd, mode)
+    else:
+        os.chmod(path, mode)
+    if fd is not None and os.utime in os.supports_fd:
+        os.utime(fd, ns=times)
+    else:
+        os.utime(path, ns=times)
+
+
+class _CopyRun:
+    """State of one CopyEngine.copy call"""
+
+    def __init__(self, engine: CopyEngine, progress, checkpoint, journal, verify):
+        self.engine = engine
+        self.checkpoint = checkpoint
+        self.journal = journal
+        self.verify = verify
+        self.progress = None
+        if progress is not None:
+            lock = threading.Lock()
+
+            def serialized(count):
+                with lock:
+                    progress(count)
+            self.progress = serialized
+
+        self.errors: List[Tuple[str, str]] = []
+        self.folders = []  # (stat, target) to stamp once their contents are done
+        self.batch = []
+        self.futures = []
+        self.pool = None
+
+    def copy_entry(self, source: str, target: str):
+        try:
+            st = os.lstat(source)
+            if stat.S_ISDIR(st.st_mode):
+                self.copy_tree(source, target, st)
+            elif stat.S_ISLNK(st.st_mode):
+                copy_link(source, target)
+            else:
+                self.engine.copy_file(source, target, self.progress, self.checkpoint, st, self.journal,
+                                      self.verify)
+        except OSError as e:
+            self.errors.append((source, str(e)))
+
+    def copy_tree(self, source: str, target: str, st: os.stat_result):
+        """Walk source once, creating folders and routing files"""
+        pending = [(source, target, st)]
+        while pending:
+            folder, folder_target, folder_st = pending.pop()
+            if self.checkpoint:
+                self.checkpoint()
+            try:
+                os.makedirs(folder_target, exist_ok=True)
+                with os.scandir(folder) as it:
+                    entries = list(it)
+            except OSError as e:
+                self.errors.append((folder, str(e)))
+                continue
+            self.folders.append((folder_st, folder_target))
+
+            for entry in entries:
+                entry_target = os.path.join(folder_target, entry.name)
+                try:
+                    entry_st = entry.stat(follow_symlinks=False)
+                except OSError as e:
+                    self.errors.append((entry.path, str(e)))
+                    continue
+                if stat.S_ISDIR(entry_st.st_mode):
+                    pending.append((entry.path, entry_target, entry_st))
+                elif stat.S_ISLNK(entry_st.st_mode):
+                    try:
+                        copy_link(entry.path, entry_target)
+                    except OSError as e:
+                        self.errors.append((entry.path, str(e)))
+                elif not stat.S_ISREG(entry_st.st_mode):
+                    continue  # Sockets, fifos and devices are not copied
+                elif entry_st.st_size <= SMALL_FILE_LIMIT and self.engine.workers > 1:
+                    self.batch.append((entry.path, entry_target, entry_st))
+                    if len(self.batch) >= BATCH_SIZE:
+                        self.submit_batch()
+                else:
+                    self.copy_entry_file(entry.path, entry_target, entry_st)
+        self.submit_batch()
+
+    def copy_entry_file(self, source: str, target: str, st: os.stat_result):
+        try:
+            self.engine.copy_file(source, target, self.progress, self.checkpoint, st, self.journal,
+                                  self.verify)
+        except OSError as e:
+            self.errors.append((source, str(e)))
+
+    def copy_batch(self, batch):
+        for source, target, st in batch:
+            self.copy_entry_file(source, target, st)
+
+    def submit_batch(self):
+        if not self.batch:
+            return
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.engine.workers,
+                                           thread_name_prefix='copy')
+        self.futures.append(self.pool.submit(self.copy_batch, self.batch))
+        self.batch = []
+
+    def abort(self):
+        """Drop queued batches and wait for the running ones"""
+        if self.pool is not None:
+            self.pool.shutdown(wait=True, cancel_futures=True)
+
+    def finish(self):
+        """Wait for pooled copies, then stamp folders deepest first"""
+        if self.pool is not None:
+            try:
+                for future in self.futures:
+                    future.result()
+            finally:
+                self.pool.shutdown(wait=True, cancel_futures=True)
+        for st, target in reversed(self.folders):
+            try:
+                copy_metadata(st, None, target)
+            except OSError as e:
+                self.errors.append((target, str(e)))
+
+
+def copy_link(source: str, target: str):
+    """Recreate a symlink rather than copying what it points to"""
+    if os.path.lexists(target):
+        os.unlink(target)
+    os.symlink(os.readlink(source), target)
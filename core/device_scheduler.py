@@ -0,0 +1,198 @@
+"""
+core/device_scheduler.py
+Per-device concurrent directory walking for multi-volume scan roots
+"""
+
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from core.scan_result import ScanBuilder, ScanResult, FLAG_DIR
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+STORAGE_SSD = 'ssd'
+STORAGE_HDD = 'hdd'
+STORAGE_NETWORK = 'network'
+STORAGE_UNKNOWN = 'unknown'
+
+# Concurrent walkers per device: deep queues for flash and latency-bound
+# network mounts, a single walker for spinning disks to avoid seek thrash
+DEFAULT_WORKERS = {
+    STORAGE_SSD: 16,
+    STORAGE_HDD: 1,
+    STORAGE_NETWORK: 8,
+    STORAGE_UNKNOWN: 4,
+}
+
+NETWORK_FILESYSTEMS = {
+    'nfs', 'nfs4', 'cifs', 'smbfs', 'smb3', '9p', 'afs', 'davfs',
+    'fuse.sshfs', 'sshfs', 'fuse.rclone', 'glusterfs', 'ceph',
+}
+
+_storage_cache: Dict[int, str] = {}
+_storage_lock = threading.Lock()
+
+
+def detect_storage_type(path: str, dev: int) -> str:
+    """Classify the device behind ``path`` as ssd, hdd, network or unknown
+
+    Uses the mount table for network filesystems and the block layer's
+    ``queue/rotational`` flag on Linux. Results are cached per st_dev.
+    """
+    with _storage_lock:
+        if dev in _storage_cache:
+            return _storage_cache[dev]
+
+    storage = STORAGE_UNKNOWN
+    fstype = _filesystem_type(path)
+    if fstype in NETWORK_FILESYSTEMS:
+        storage = STORAGE_NETWORK
+    else:
+        rotational = _rotational_flag(dev)
+        if rotational is not None:
+            storage = STORAGE_HDD if rotational else STORAGE_SSD
+
+    with _storage_lock:
+        _storage_cache[dev] = storage
+    return storage
+
+
+def _filesystem_type(path: str) -> Optional[str]:
+    """Filesystem type of the mount containing ``path``"""
+    if psutil is None:
+        return None
+    try:
+        path = os.path.realpath(path)
+        best = None
+        for part in psutil.disk_partitions(all=True):
+            mount = part.mountpoint
+            if path == mount or path.startswith(mount.rstrip(os.sep) + os.sep):
+                if best is None or len(mount) > len(best.mountpoint):
+                    best = part
+        return best.fstype.lower() if best else None
+    except Exception:
+        return None
+
+
+def _rotational_flag(dev: int) -> Optional[bool]:
+    """Read /sys rotational flag for a block device, None if unknown"""
+    block = Path(f'/sys/dev/block/{os.major(dev)}:{os.minor(dev)}') if hasattr(os, 'major') else None
+    if block is None or not block.exists():
+        return None
+    try:
+        block = block.resolve()
+        # Partitions keep their queue settings on the parent disk
+        for candidate in (block, block.parent):
+            flag = candidate / 'queue' / 'rotational'
+            if flag.exists():
+                return flag.read_text().strip() == '1'
+    except OSError:
+        pass
+    return None
+
+
+class DeviceScanScheduler:
+    """Walks a tree with one worker pool per device
+
+    Directories are routed to the pool of the device they live on (by
+    ``st_dev``), so a root spanning a local SSD, a spinning disk and a
+    network share walks all of them at once, each at the concurrency its
+    storage can sustain. Results go into a single ScanBuilder.
+    """
+
+    def __init__(self, workers: Dict[str, int] = None):
+        self.workers = dict(DEFAULT_WORKERS)
+        if workers:
+            self.workers.update(workers)
+
+    def scan(self, directory: Path, show_hidden: bool = True) -> ScanResult:
+        """Scan ``directory`` and every mounted volume below it"""
+        run = _ScanRun(self, Path(directory), show_hidden)
+        return run.execute()
+
+
+class _ScanRun:
+    """State of a single scheduled scan"""
+
+    def __init__(self, scheduler: DeviceScanScheduler, root: Path, show_hidden: bool):
+        self.scheduler = scheduler
+        self.root = root
+        self.show_hidden = show_hidden
+        self.builder = ScanBuilder(root)
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.pending = 0
+        self.pools: Dict[int, ThreadPoolExecutor] = {}
+
+    def execute(self) -> ScanResult:
+        try:
+            root_stat = os.stat(self.root)
+        except OSError as e:
+            print(f"Error scanning {self.root}: {e}")
+            self.builder.add_root(None)
+            return self.builder.build()
+
+        self.builder.add_root(root_stat)
+        self.submit(root_stat.st_dev, str(self.root), 0, 0)
+
+        with self.idle:
+            while self.pending:
+                self.idle.wait()
+
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
+        return self.builder.build()
+
+    def submit(self, dev: int, path: str, row: int, depth: int):
+        """Queue a directory on the pool for its device"""
+        with self.lock:
+            pool = self.pools.get(dev)
+            if pool is None:
+                storage = detect_storage_type(path, dev)
+                pool = self.pools[dev] = ThreadPoolExecutor(
+                    max_workers=self.scheduler.workers.get(storage, 1),
+                    thread_name_prefix=f'scan-{storage}-{dev}'
+                )
+            self.pending += 1
+        pool.submit(self.walk, path, row, depth)
+
+    def walk(self, path: str, row: int, depth: int):
+        """List one directory, then record its entries in a single batch"""
+        try:
+            entries = []
+            try:
+                with os.scandir(path) as it:
+                    for entry in it:
+                        if not self.show_hidden and entry.name.startswith('.'):
+                            continue
+                        try:
+                            # Warm DirEntry's stat cache outside the builder lock
+                            entry.stat(follow_symlinks=False)
+                            entry.is_dir(follow_symlinks=False)
+                        except OSError:
+                            continue
+                        entries.append(entry)
+            except OSError as e:
+                print(f"Error scanning {path}: {e}")
+                return
+
+            subdirs = []
+            with self.lock:
+                for entry in entries:
+                    child = self.builder.add_entry(row, depth + 1, entry)
+                    if child is not None and self.builder.flags[child] & FLAG_DIR:
+                        subdirs.append((entry, child))
+
+            for entry, child in subdirs:
+                self.submit(entry.stat(follow_symlinks=False).st_dev, entry.path, child, depth + 1)
+        finally:
+            with self.idle:
+                self.pending -= 1
+                if not self.pending:
+                    self.idle.notify_all()
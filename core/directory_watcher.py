@@ -0,0 +1,131 @@
+"""
+core/directory_watcher.py
+Watches the open folder and reports coalesced, re-stat'ed changes
+"""
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from core.directory_listing import DirectoryListing
+
+# Events that do not change anything a listing shows
+IGNORED_EVENTS = {'opened', 'closed_no_write'}
+
+
+class _FolderEventHandler(FileSystemEventHandler):
+    """Forwards the names touched by each event to the watcher"""
+
+    def __init__(self, watcher: 'DirectoryWatcher', path: str):
+        super().__init__()
+        self.watcher = watcher
+        self.path = path
+
+    def on_any_event(self, event):
+        if event.event_type in IGNORED_EVENTS:
+            return
+        names = []
+        for event_path in (event.src_path, getattr(event, 'dest_path', '')):
+            event_path = os.fsdecode(event_path)
+            if event_path and os.path.dirname(event_path) == self.path:
+                names.append(os.path.basename(event_path))
+        if names:
+            self.watcher._changed(self.path, names)
+
+
+class DirectoryWatcher:
+    """Non-recursive watch on one directory at a time
+
+    Events are collected by name for ``delay`` seconds after the first one,
+    then every touched name is stat'ed once on the timer thread and
+    ``callback(path, updated_listing, removed_names)`` is called. A folder
+    that changes constantly therefore costs one small batch per window,
+    never a full relist.
+    """
+
+    def __init__(self, callback: Callable[[str, DirectoryListing, set], None],
+                 delay: float = 0.2):
+        self.callback = callback
+        self.delay = delay
+        self.observer = Observer()
+        self.observer.daemon = True
+        self.started = False
+        self.lock = threading.Lock()
+        self.watch_handle = None
+        self.path = None
+        self.show_hidden = False
+        self.names = set()
+        self.timer = None
+
+    def watch(self, path: Path, show_hidden: bool = False) -> bool:
+        """Start watching a directory instead of the previous one"""
+        self.stop()
+        path = os.path.abspath(str(path))
+        try:
+            if not self.started:
+                self.observer.start()
+                self.started = True
+            handle = self.observer.schedule(_FolderEventHandler(self, path), path, recursive=False)
+        except Exception as e:
+            print(f"Error watching {path}: {e}")
+            return False
+        with self.lock:
+            self.watch_handle = handle
+            self.path = path
+            self.show_hidden = show_hidden
+        return True
+
+    def is_watching(self) -> bool:
+        return self.watch_handle is not None
+
+    def stop(self):
+        """Stop watching and drop changes not yet reported"""
+        with self.lock:
+            handle = self.watch_handle
+            self.watch_handle = None
+            self.path = None
+            self.names.clear()
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if handle is not None:
+            try:
+                self.observer.unschedule(handle)
+            except Exception as e:
+                print(f"Error stopping watch: {e}")
+
+    def close(self):
+        """Stop the observer thread"""
+        self.stop()
+        if self.started:
+            self.observer.stop()
+
+    def _changed(self, path: str, names):
+        with self.lock:
+            if path != self.path:
+                return
+            self.names.update(names)
+            if self.timer is None:
+                self.timer = threading.Timer(self.delay, self._flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def _flush(self):
+        with self.lock:
+            self.timer = None
+            path = self.path
+            names = self.names
+            self.names = set()
+            show_hidden = self.show_hidden
+        if path is None or not names:
+            return
+
+        updated, removed = DirectoryListing.stat_names(path, names, show_hidden)
+        try:
+            self.callback(path, updated, removed)
+        except Exception as e:
+            print(f"Error reporting changes in {path}: {e}")
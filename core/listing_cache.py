@@ -0,0 +1,70 @@
+"""
+core/listing_cache.py
+LRU cache of recent directory listings
+"""
+
+import os
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from core.directory_listing import DirectoryListing
+
+
+class ListingCache:
+    """Recently listed directories, least recently used evicted first
+
+    Each entry remembers the directory's st_mtime_ns from before it was
+    listed. Creating, removing or renaming an entry bumps that value, so a
+    cached listing is only handed out while one stat of the directory
+    still matches. Entries are charged an estimate of their memory use and
+    evicted once the total passes max_bytes.
+
+    ``put`` stores a copy and ``get`` hands out a copy, so later sorts and
+    watcher edits of a model's own listing never change what is cached
+    under the old mtime, and two panes showing the same folder never share
+    one listing.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.total_bytes = 0
+        self.entries = OrderedDict()  # (path, show_hidden) -> (listing, mtime_ns, size)
+
+    def put(self, listing: DirectoryListing, mtime_ns: int, show_hidden: bool = False):
+        """Remember a complete listing taken when the directory had mtime_ns"""
+        key = (str(listing.path), show_hidden)
+        self._drop(key)
+        size = listing.memory_size()
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (listing.copy(), mtime_ns, size)
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes:
+            self._drop(next(iter(self.entries)))
+
+    def get(self, path: Path, show_hidden: bool = False) -> Optional[DirectoryListing]:
+        """Cached listing of a directory, or None if missing or out of date"""
+        key = (str(path), show_hidden)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        listing, mtime_ns, _ = entry
+        try:
+            current = os.stat(path).st_mtime_ns
+        except OSError:
+            current = None
+        if current != mtime_ns:
+            self._drop(key)
+            return None
+        self.entries.move_to_end(key)
+        return listing.copy()
+
+    def clear(self):
+        self.entries.clear()
+        self.total_bytes = 0
+
+    def _drop(self, key):
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.total_bytes -= entry[2]
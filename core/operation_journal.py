@@ -0,0 +1,194 @@
+"""
+core/operation_journal.py
+Operation history with inverse operations, kept in an append-only log
+"""
+
+import itertools
+import json
+import threading
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class OperationJournal:
+    """Recent file operations and how to reverse them
+
+    Every operation is one line appended to a JSONL file: its name, data,
+    an ``inverse`` describing how to reverse it (None if it can't be), and
+    the batch it belongs to. Undoing appends an ``undo`` line naming the
+    entries reversed and the ``skipped`` ones that had no inverse. Nothing is rewritten per operation; once most of
+    the log's lines are for forgotten steps it is compacted to the steps
+    still in memory.
+
+    Operations recorded inside ``with journal.batch():`` on the same
+    thread share a batch id and form one step, which undo reverses as a
+    whole. A step is found by its batch id, so batches running on several
+    threads at once, or operations recorded in between, don't split it.
+    Memory holds the last ``max_steps`` steps, however many operations
+    each contains.
+    """
+
+    def __init__(self, path: Path, max_steps: int = 200):
+        self.path = path
+        self.max_steps = max_steps
+        self.steps = deque(maxlen=max_steps)  # Lists of entries, oldest first
+        self.batches: Dict[int, List[Dict]] = {}  # Batch id -> its step in self.steps
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.lines = 0  # Lines in the log file
+        self.size = 0  # Entries in memory
+        self.handle = None
+        self._load()
+        # Entry and batch ids come from one counter
+        last = max((max(entry['id'], entry['batch'] or 0) for entry in self.entries()), default=0)
+        self.ids = itertools.count(last + 1)
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    self.lines += 1
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crash
+                    if 'undo' in record:
+                        undone = set(record['undo'])
+                        skipped = set(record.get('skipped', ()))
+                        for entry in self.entries():
+                            if entry['id'] in undone or entry['id'] in skipped:
+                                entry['undone'] = True
+                            if entry['id'] in skipped:
+                                entry['skipped'] = True
+                    else:
+                        self._add(record)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error loading history: {e}")
+
+    # ==================== RECORDING ====================
+
+    @contextmanager
+    def batch(self):
+        """Group the operations recorded on this thread into one undo step"""
+        if getattr(self.local, 'batch', None) is not None:
+            yield self.local.batch  # Nested batches join the outer one
+            return
+        self.local.batch = next(self.ids)
+        try:
+            yield self.local.batch
+        finally:
+            self.local.batch = None
+
+    def record(self, operation: str, data, inverse: Optional[Dict] = None) -> Dict:
+        entry = {
+            'id': next(self.ids),
+            'operation': operation,
+            'data': data,
+            'inverse': inverse,
+            'batch': getattr(self.local, 'batch', None),
+            'timestamp': datetime.now().isoformat(),
+        }
+        with self.lock:
+            self._add(entry)
+            self._write(entry)
+        return entry
+
+    def _add(self, entry: Dict):
+        batch = entry['batch']
+        step = self.batches.get(batch) if batch is not None else None
+        if step is not None:
+            step.append(entry)
+        else:
+            if len(self.steps) == self.max_steps:
+                oldest = self.steps[0]  # About to fall off the deque
+                self.size -= len(oldest)
+                self.batches.pop(oldest[0]['batch'], None)
+            step = [entry]
+            self.steps.append(step)
+            if batch is not None:
+                self.batches[batch] = step
+        self.size += 1
+
+    def entries(self) -> List[Dict]:
+        """Every remembered operation, oldest first"""
+        return [entry for step in self.steps for entry in step]
+
+    def _write(self, record: Dict):
+        """Append one line; caller holds the lock"""
+        try:
+            if self.handle is None:
+                self.handle = open(self.path, 'a', encoding='utf-8')
+            self.handle.write(json.dumps(record) + '\n')
+            self.handle.flush()
+            self.lines += 1
+            if self.lines > 2 * self.size + 1000:
+                self._compact()
+        except OSError as e:
+            print(f"Error writing history: {e}")
+
+    def _compact(self):
+        """Rewrite the log as just the entries in memory; caller holds the lock"""
+        self.handle.close()
+        self.handle = None
+        temp_file = self.path.with_suffix('.tmp')
+        with open(temp_file, 'w', encoding='utf-8') as f:
+            count = 0
+            for entry in self.entries():
+                f.write(json.dumps(entry) + '\n')
+                count += 1
+        temp_file.replace(self.path)
+        self.lines = count
+
+    # ==================== UNDO ====================
+
+    def last_step(self) -> List[Dict]:
+        """Entries the next undo would reverse, newest first"""
+        with self.lock:
+            for step in reversed(self.steps):
+                remaining = [entry for entry in reversed(step) if not entry.get('undone')]
+                if remaining:
+                    return remaining
+            return []
+
+    def undo(self, apply: Callable[[Dict], None]) -> Tuple[List[Dict], List[Dict]]:
+        """Reverse the last operation or batch, newest first
+
+        ``apply(inverse)`` carries out one inverse and raises on failure.
+        Returns (entries reversed, entries skipped): operations without an
+        inverse, such as a trash delete that doesn't say where the item
+        went, are skipped and marked as such, so they never hold up undoing
+        the steps before them. Entries reversed or skipped are marked even
+        if a later one fails, so undo can be retried from where it stopped.
+        """
+        step = self.last_step()
+        if not step:
+            return [], []
+        done, skipped = [], []
+        try:
+            for entry in step:
+                if entry['inverse'] is None:
+                    skipped.append(entry)
+                    continue
+                apply(entry['inverse'])
+                done.append(entry)
+        finally:
+            if done or skipped:
+                with self.lock:
+                    for entry in done + skipped:
+                        entry['undone'] = True
+                    for entry in skipped:
+                        entry['skipped'] = True
+                    self._write({'undo': [entry['id'] for entry in done],
+                                 'skipped': [entry['id'] for entry in skipped]})
+        return done, skipped
+
+    def close(self):
+        with self.lock:
+            if self.handle is not None:
+                self.handle.close()
+                self.handle = None
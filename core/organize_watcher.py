@@ -0,0 +1,206 @@
+"""
+core/organize_watcher.py
+Applies organize rules to files as they land in drop folders
+"""
+
+import os
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
+from pathlib import Path
+from typing import Dict, List
+
+from watchdog.observers import Observer
+from watchdog.events import FileSystemEventHandler
+
+from core.organizer import Organizer, OrganizeReport, OrganizeRule, MOVE_BATCH
+
+# Names browsers and downloaders write to before renaming the finished file
+PARTIAL_SUFFIXES = {'.part', '.partial', '.crdownload', '.download', '.tmp', '.!qb'}
+
+
+class _DropFolderEventHandler(FileSystemEventHandler):
+    """Forwards file events to the watcher"""
+
+    def __init__(self, watcher: 'OrganizeWatcher'):
+        super().__init__()
+        self.watcher = watcher
+
+    def on_any_event(self, event):
+        if event.is_directory:
+            return
+        kind = event.event_type
+        path = os.fsdecode(event.src_path)
+        if kind == 'deleted':
+            self.watcher._forget(path)
+        elif kind == 'moved':
+            self.watcher._forget(path)
+            self.watcher._touched(os.fsdecode(event.dest_path))
+        elif kind in ('created', 'modified', 'closed'):
+            self.watcher._touched(path)
+
+
+class OrganizeWatcher:
+    """Headless watch on drop folders that sorts new files by rules
+
+    Events only mark a path as touched. Every ``tick`` the touched paths
+    are stat'ed once; a file is ready when its size and mtime have not
+    changed, and no event has arrived for it, for ``stable_ms``. A burst
+    of thousands of events for one file therefore costs one stat per tick,
+    and a file still being written is never moved.
+
+    Ready files are classified and planned by an Organizer and queued.
+    The queue is drained at no more than ``moves_per_second`` through the
+    organizer's batched moves, so a flood of new files is sorted steadily
+    instead of all at once. Moves made from the time the queue fills until
+    it is empty again share one history batch, so a burst is one undo step
+    rather than one per tick.
+    """
+
+    def __init__(self, file_manager, rules: List[OrganizeRule], folders: List[Path],
+                 destination: Path = None, recursive: bool = False, stable_ms: int = 2000,
+                 moves_per_second: float = 20.0):
+        self.organizer = Organizer(file_manager, rules)
+        self.folders = [os.path.abspath(folder) for folder in folders]
+        self.destination = os.path.abspath(destination) if destination else None
+        self.recursive = recursive
+        self.stable = stable_ms / 1000
+        self.rate = moves_per_second
+        self.tick = min(max(self.stable / 4, 0.05), 0.5)
+        self.lock = threading.Lock()
+        self.pending: Dict[str, list] = {}  # Path -> [(size, mtime_ns) or None, last change]
+        self.queue = deque()  # OrganizeMoves waiting for the rate limit
+        self.taken: Dict[str, Dict[str, set]] = {}  # Destination -> Organizer.plan names
+        self.skip = set()
+        for folder in self.folders:
+            self.skip.update(self.organizer.skip_folders(self._destination(folder)))
+        self.observer = Observer()
+        self.observer.daemon = True
+        self.stopping = threading.Event()
+        self.thread = None
+        self.moved = 0
+
+    def start(self, sweep: bool = True):
+        """Watch the folders; with ``sweep`` also sort the files already there"""
+        for folder in self.folders:
+            self.observer.schedule(_DropFolderEventHandler(self), folder, recursive=self.recursive)
+        self.observer.start()
+        if sweep:
+            for folder in self.folders:
+                for path, name, st in self.organizer.walk(Path(folder), self.recursive, self.skip):
+                    self._touched(path)
+        self.thread = threading.Thread(target=self._run, name='organize-watch', daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.stopping.set()
+        self.observer.stop()
+        if self.thread is not None:
+            self.thread.join()
+        self.observer.join()
+
+    # ==================== EVENTS ====================
+
+    def _touched(self, path: str):
+        if os.path.splitext(path)[1].lower() in PARTIAL_SUFFIXES or os.path.basename(path).startswith('.'):
+            return
+        if not self.recursive and os.path.dirname(path) not in self.folders:
+            return
+        if any(path.startswith(folder + os.sep) for folder in self.skip):
+            return  # Landed in a target folder, most likely moved there by us
+        with self.lock:
+            state = self.pending.get(path)
+            if state is None:
+                self.pending[path] = [None, time.monotonic()]
+            else:
+                state[1] = time.monotonic()
+
+    def _forget(self, path: str):
+        with self.lock:
+            self.pending.pop(path, None)
+
+    # ==================== SETTLING & MOVING ====================
+
+    def _run(self):
+        tokens = 0.0
+        last = time.monotonic()
+        burst = ExitStack()  # Holds the history batch while the queue has moves
+        grouping = False
+        with burst:
+            while not self.stopping.wait(self.tick):
+                try:
+                    self._plan(self._settled())
+                    now = time.monotonic()
+                    tokens = min(tokens + (now - last) * self.rate, max(self.rate, 1.0))
+                    last = now
+                    count = min(int(tokens), len(self.queue), MOVE_BATCH)
+                    if count:
+                        if not grouping:
+                            burst.enter_context(self.organizer.file_manager.history.batch())
+                            grouping = True
+                        tokens -= count
+                        self._move([self.queue.popleft() for _ in range(count)])
+                    if not self.queue:
+                        burst.close()
+                        grouping = False
+                        self.taken.clear()  # Nothing reserved; relist target folders next time
+                except Exception as e:
+                    print(f"Error organizing: {e}")
+
+    def _settled(self) -> List[tuple]:
+        """(path, name, stat) of pending files unchanged for ``stable`` seconds"""
+        with self.lock:
+            pending = list(self.pending.items())
+        now = time.monotonic()
+        ready = []
+        for path, state in pending:
+            try:
+                st = os.stat(path)
+            except OSError:
+                self._forget(path)
+                continue
+            signature = (st.st_size, st.st_mtime_ns)
+            if signature != state[0]:
+                state[0] = signature
+                state[1] = now
+            elif now - state[1] >= self.stable:
+                ready.append((path, os.path.basename(path), st))
+        if ready:
+            with self.lock:
+                for path, _, _ in ready:
+                    self.pending.pop(path, None)
+        return ready
+
+    def _plan(self, ready: List[tuple]):
+        by_destination: Dict[str, list] = {}
+        for entry in ready:
+            folder = self._folder_of(entry[0])
+            by_destination.setdefault(self._destination(folder), []).append(entry)
+        for destination, files in by_destination.items():
+            report = OrganizeReport(dry_run=False)
+            taken = self.taken.setdefault(destination, {})
+            classified = self.organizer.classify(files, report)
+            for move in self.organizer.plan(classified, Path(destination), report, taken):
+                self.queue.append(move)
+
+    def _move(self, batch):
+        report = OrganizeReport(dry_run=False)
+        self.organizer.move_batch(batch, report)
+        failed = {path for path, _ in report.errors}
+        for move in batch:
+            if move.source not in failed:
+                self.moved += 1
+                print(f"Moved {move.source} -> {move.target}")
+        for path, error in report.errors:
+            print(f"Error moving {path}: {error}")
+
+    def _folder_of(self, path: str) -> str:
+        """The watched folder a path is in"""
+        for folder in self.folders:
+            if path.startswith(folder + os.sep):
+                return folder
+        return os.path.dirname(path)
+
+    def _destination(self, folder: str) -> str:
+        return self.destination or folder
@@ -0,0 +1,411 @@
+"""
+core/organizer.py
+Rule-based sorting of files into template folders
+"""
+
+import mimetypes
+import os
+import re
+import string
+import time
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from core.storage_report import FILE_CATEGORIES
+
+# Moves are carried out and recorded this many at a time
+MOVE_BATCH = 500
+
+# Placeholders a rule's target folder may use
+TARGET_FIELDS = {'year', 'month', 'ext'}
+
+# Folder names, in order of preference, that each file category sorts into
+CATEGORY_FOLDERS = {
+    'Images': ['Photos', 'Images', 'Pictures', 'Photography', 'Assets/Images'],
+    'Videos': ['Videos', 'Video', 'Movies', 'Footage'],
+    'Audio': ['Music', 'Audio', 'Sounds'],
+    'Documents': ['Documents', 'Docs', 'Documentation', 'Papers'],
+    'Spreadsheets': ['Spreadsheets', 'Finance', 'Documents'],
+    'Archives': ['Archives', 'Archive', 'Backups'],
+    'Code': ['Code', 'Code Snippets', 'Projects', 'Source'],
+    'Executables': ['Installers', 'Software', 'Programs'],
+}
+
+
+class OrganizeRule:
+    """Conditions a file must meet and the folder it goes to
+
+    Every condition that is set must match. ``target`` is relative to the
+    destination root and may use ``{year}``, ``{month}`` and ``{ext}``,
+    filled in from the file's modification time and extension. Any other
+    placeholder, or an unmatched brace, raises ValueError.
+    """
+
+    def __init__(self, name: str, target: str, extensions: List[str] = None, mime: str = None,
+                 min_size: int = None, max_size: int = None, older_than_days: float = None,
+                 newer_than_days: float = None, name_pattern: str = None, enabled: bool = True):
+        self.name = name
+        self.target = self._check_target(target)
+        self.extensions = {ext.lower() if ext.startswith('.') else f".{ext.lower()}"
+                           for ext in extensions} if extensions else None
+        self.mime = mime
+        self.min_size = min_size
+        self.max_size = max_size
+        self.older_than_days = older_than_days
+        self.newer_than_days = newer_than_days
+        self.name_pattern = name_pattern
+        self.regex = re.compile(name_pattern, re.IGNORECASE) if name_pattern else None
+        self.enabled = enabled
+
+    @staticmethod
+    def _check_target(target: str) -> str:
+        try:
+            for _, field, _, _ in string.Formatter().parse(target):
+                if field is not None and field not in TARGET_FIELDS:
+                    raise ValueError(f"unknown placeholder {{{field}}}, use "
+                                     f"{', '.join('{' + f + '}' for f in sorted(TARGET_FIELDS))}")
+            target.format(year=2000, month='01', ext='txt')
+        except (ValueError, KeyError, IndexError, AttributeError) as e:
+            raise ValueError(f"Invalid target folder '{target}': {e}")
+        return target
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'OrganizeRule':
+        return cls(**data)
+
+    def to_dict(self) -> Dict:
+        data = {'name': self.name, 'target': self.target, 'enabled': self.enabled}
+        if self.extensions:
+            data['extensions'] = sorted(self.extensions)
+        for key in ('mime', 'min_size', 'max_size', 'older_than_days', 'newer_than_days', 'name_pattern'):
+            if getattr(self, key) is not None:
+                data[key] = getattr(self, key)
+        return data
+
+    def describe(self) -> str:
+        """Conditions in words, for lists and reports"""
+        parts = []
+        if self.extensions:
+            parts.append(' '.join(sorted(self.extensions)))
+        if self.mime:
+            parts.append(f"type {self.mime}")
+        if self.min_size is not None:
+            parts.append(f">= {self.min_size} bytes")
+        if self.max_size is not None:
+            parts.append(f"<= {self.max_size} bytes")
+        if self.older_than_days is not None:
+            parts.append(f"older than {self.older_than_days:g} days")
+        if self.newer_than_days is not None:
+            parts.append(f"newer than {self.newer_than_days:g} days")
+        if self.name_pattern:
+            parts.append(f"name ~ /{self.name_pattern}/")
+        return ', '.join(parts) or 'any file'
+
+    def matches(self, name: str, ext: str, mime: Optional[str], st: os.stat_result, now: float) -> bool:
+        # Cheapest checks first; most files fail on extension
+        if self.extensions is not None and ext not in self.extensions:
+            return False
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        age = (now - st.st_mtime) / 86400
+        if self.older_than_days is not None and age < self.older_than_days:
+            return False
+        if self.newer_than_days is not None and age > self.newer_than_days:
+            return False
+        if self.mime is not None:
+            if mime is None:
+                return False
+            if self.mime.endswith('/') or self.mime.endswith('/*'):
+                if not mime.startswith(self.mime.rstrip('*')):
+                    return False
+            elif mime != self.mime:
+                return False
+        if self.regex is not None and not self.regex.search(name):
+            return False
+        return True
+
+
+def rules_for_template(template: Dict) -> List[OrganizeRule]:
+    """One rule per file category, aimed at the template folder that fits it best
+
+    A category goes to the first of its CATEGORY_FOLDERS names found in the
+    template, preferring the shallowest folder with that name.
+    """
+    folders = template['structure']
+    rules = []
+    for category, extensions in FILE_CATEGORIES.items():
+        target = None
+        for wanted in CATEGORY_FOLDERS.get(category, [category]):
+            depth = wanted.count('/') + 1
+            candidates = []
+            for folder in folders:
+                parts = folder.split('/')
+                for i in range(len(parts) - depth + 1):
+                    if '/'.join(parts[i:i + depth]).lower() == wanted.lower():
+                        candidates.append('/'.join(parts[:i + depth]))
+                        break
+            if candidates:
+                target = min(candidates, key=lambda path: (path.count('/'), path))
+                break
+        if target is not None:
+            # Template folder names are literal, not placeholders
+            target = target.replace('{', '{{').replace('}', '}}')
+            rules.append(OrganizeRule(category, target, extensions=extensions))
+    return rules
+
+
+class OrganizeMove:
+    """One planned move"""
+
+    __slots__ = ('source', 'target', 'size', 'dev', 'rule')
+
+    def __init__(self, source: str, target: str, size: int, dev: int, rule: OrganizeRule):
+        self.source = source
+        self.target = target
+        self.size = size
+        self.dev = dev
+        self.rule = rule
+
+
+class OrganizeReport:
+    """What an organize run did, or in a dry run would do"""
+
+    SAMPLES = 20
+
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.scanned = 0
+        self.unmatched = 0
+        self.moved = 0
+        self.bytes = 0
+        self.by_folder: Dict[str, List[int]] = {}  # Target folder -> [files, bytes]
+        self.samples: List[Tuple[str, str]] = []
+        self.errors: List[Tuple[str, str]] = []
+        self.elapsed = 0.0
+
+    def add(self, move: OrganizeMove, folder: str):
+        self.moved += 1
+        self.bytes += move.size
+        totals = self.by_folder.setdefault(folder, [0, 0])
+        totals[0] += 1
+        totals[1] += move.size
+        if len(self.samples) < self.SAMPLES:
+            self.samples.append((move.source, move.target))
+
+    def summary(self) -> str:
+        verb = "Would move" if self.dry_run else "Moved"
+        lines = [f"{verb} {self.moved} of {self.scanned} files "
+                 f"({self.bytes / 1024 ** 2:.1f} MB) in {self.elapsed:.2f}s",
+                 f"{self.unmatched} files matched no rule"]
+        if self.errors:
+            lines.append(f"{len(self.errors)} failed")
+        lines.append("")
+        for folder, (count, size) in sorted(self.by_folder.items(), key=lambda item: -item[1][0]):
+            lines.append(f"{count:>8}  {size / 1024 ** 2:>10.1f} MB  {folder}")
+        if self.samples:
+            lines.append("")
+            lines.extend(f"{os.path.basename(source)} -> {target}" for source, target in self.samples)
+        for path, error in self.errors[:10]:
+            lines.append(f"Error: {path}: {error}")
+        return '\n'.join(lines)
+
+
+class Organizer:
+    """Sorts the files under a folder into rule target folders
+
+    The work is a pipeline of generators: ``walk`` lists one directory at
+    a time, ``classify`` finds each file's first matching rule, ``plan``
+    picks a free target name, and ``run`` carries the moves out in batches
+    of MOVE_BATCH. Nothing holds more than one directory listing and one
+    batch at once, so a 100k-file folder costs about as much memory as a
+    small one.
+
+    Moves within a device are single renames, recorded per batch as one
+    history entry; moves to another device go through the file manager.
+    A whole run is one undo step.
+    """
+
+    def __init__(self, file_manager, rules: List[OrganizeRule]):
+        self.file_manager = file_manager
+        self.rules = [rule for rule in rules if rule.enabled]
+        self.need_mime = any(rule.mime for rule in self.rules)
+        self.mime_cache: Dict[str, Optional[str]] = {}
+
+    # ==================== PIPELINE ====================
+
+    def walk(self, root: Path, recursive: bool = False, skip: set = frozenset()) -> Iterator[Tuple[str, str, os.stat_result]]:
+        """(path, name, stat) of the regular files under root"""
+        pending = [os.fspath(root)]
+        while pending:
+            folder = pending.pop()
+            try:
+                # Listed up front: the directory changes as files move out of it
+                with os.scandir(folder) as it:
+                    entries = list(it)
+            except OSError as e:
+                print(f"Error listing {folder}: {e}")
+                continue
+            for entry in entries:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if recursive and entry.path not in skip and not entry.name.startswith('.'):
+                            pending.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.name, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+    def classify(self, files: Iterator[Tuple[str, str, os.stat_result]],
+                 report: OrganizeReport) -> Iterator[Tuple[str, str, os.stat_result, OrganizeRule]]:
+        """Files paired with the first rule they match"""
+        now = time.time()
+        for path, name, st in files:
+            report.scanned += 1
+            ext = os.path.splitext(name)[1].lower()
+            mime = self._mime(ext) if self.need_mime else None
+            for rule in self.rules:
+                if rule.matches(name, ext, mime, st, now):
+                    yield path, name, st, rule
+                    break
+            else:
+                report.unmatched += 1
+
+    def plan(self, classified, destination: Path, report: OrganizeReport,
+             taken: Dict[str, set] = None) -> Iterator[OrganizeMove]:
+        """Moves to a free name in each file's target folder
+
+        ``taken`` maps target folders to the names in use there, listed on
+        first use; pass the same dict to later calls to keep names planned
+        but not yet moved reserved.
+        """
+        destination = os.fspath(destination)
+        taken = {} if taken is None else taken
+        for path, name, st, rule in classified:
+            try:
+                folder = os.path.join(destination, self._format_target(rule.target, name, st))
+            except (ValueError, KeyError, IndexError, AttributeError) as e:
+                report.errors.append((path, f"Rule '{rule.name}': {e}"))
+                continue
+            if os.path.dirname(path) == folder:
+                continue  # Already sorted
+            names = taken.get(folder)
+            if names is None:
+                try:
+                    names = set(os.listdir(folder))
+                except OSError:
+                    names = set()
+                taken[folder] = names
+            target_name = self._free_name(name, names)
+            names.add(target_name)
+            move = OrganizeMove(path, os.path.join(folder, target_name), st.st_size, st.st_dev, rule)
+            report.add(move, folder)
+            yield move
+
+    # ==================== RUNNING ====================
+
+    def dry_run(self, root: Path, destination: Path, recursive: bool = False) -> OrganizeReport:
+        """Plan without touching anything"""
+        report = OrganizeReport(dry_run=True)
+        started = time.monotonic()
+        for _ in self._moves(root, destination, recursive, report):
+            pass
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def run(self, root: Path, destination: Path, recursive: bool = False,
+            progress: Callable[[OrganizeReport], None] = None,
+            is_cancelled: Callable[[], bool] = None) -> OrganizeReport:
+        report = OrganizeReport(dry_run=False)
+        started = time.monotonic()
+        batch = []
+        failed = 0
+        with self.file_manager.history.batch():
+            for move in self._moves(root, destination, recursive, report):
+                batch.append(move)
+                if len(batch) >= MOVE_BATCH:
+                    failed += self.move_batch(batch, report)
+                    batch = []
+                    if progress:
+                        progress(report)
+                    if is_cancelled and is_cancelled():
+                        break
+            failed += self.move_batch(batch, report)
+        report.moved -= failed
+        report.elapsed = time.monotonic() - started
+        return report
+
+    def _moves(self, root: Path, destination: Path, recursive: bool, report: OrganizeReport) -> Iterator[OrganizeMove]:
+        # Don't walk into the folders files are being sorted into
+        files = self.walk(root, recursive, self.skip_folders(destination))
+        return self.plan(self.classify(files, report), destination, report)
+
+    def skip_folders(self, destination: Path) -> set:
+        """Top-level target folders; files there are already sorted"""
+        destination = os.fspath(destination)
+        return {os.path.join(destination, rule.target.split('/')[0].replace('{{', '{').replace('}}', '}'))
+                for rule in self.rules}
+
+    def move_batch(self, batch: List[OrganizeMove], report: OrganizeReport) -> int:
+        """Rename what stays on one device; hand the rest to the file manager
+
+        Returns how many moves failed; each one is added to report.errors.
+        """
+        if not batch:
+            return 0
+        failed = 0
+        renamed = []
+        made = set()
+        device_of: Dict[str, int] = {}
+        for move in batch:
+            folder = os.path.dirname(move.target)
+            try:
+                if folder not in made:
+                    os.makedirs(folder, exist_ok=True)
+                    made.add(folder)
+                    device_of[folder] = os.stat(folder).st_dev
+                if device_of[folder] == move.dev:
+                    # Another process may have created the name since it was planned
+                    if os.path.lexists(move.target):
+                        raise FileExistsError(f"{move.target} already exists")
+                    os.rename(move.source, move.target)
+                    renamed.append((move.source, move.target))
+                elif not self.file_manager.move(Path(move.source), Path(move.target)):
+                    raise OSError("move failed")
+            except OSError as e:
+                report.errors.append((move.source, str(e)))
+                failed += 1
+
+        if renamed:
+            self.file_manager.tag_index.move_many(dict(renamed))
+            self.file_manager.history.record(
+                'organize', {'count': len(renamed), 'first': renamed[0][1]},
+                {'op': 'move_batch', 'moves': [[target, source] for source, target in renamed]})
+        return failed
+
+    # ==================== HELPERS ====================
+
+    def _mime(self, ext: str) -> Optional[str]:
+        """MIME type from the extension, as mimetypes maps it; cached per extension"""
+        if ext not in self.mime_cache:
+            self.mime_cache[ext] = mimetypes.guess_type(f"file{ext}", strict=False)[0]
+        return self.mime_cache[ext]
+
+    @staticmethod
+    def _format_target(target: str, name: str, st: os.stat_result) -> str:
+        if '{' not in target:
+            return target
+        modified = time.localtime(st.st_mtime)
+        return target.format(year=modified.tm_year, month=f"{modified.tm_mon:02d}",
+                             ext=os.path.splitext(name)[1].lstrip('.').lower() or 'none')
+
+    @staticmethod
+    def _free_name(name: str, taken: set) -> str:
+        if name not in taken:
+            return name
+        stem, suffix = os.path.splitext(name)
+        counter = 2
+        while f"{stem} ({counter}){suffix}" in taken:
+            counter += 1
+        return f"{stem} ({counter}){suffix}"
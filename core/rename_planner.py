@@ -0,0 +1,206 @@
+"""
+core/rename_planner.py
+Plans batch renames as a whole and applies them without clobbering files
+"""
+
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+INVALID_NAMES = {'', '.', '..'}
+
+
+def pattern_name(pattern: str, number: int, original: str) -> str:
+    """Pattern: {n} for number, {name} for original name, {ext} for extension"""
+    suffix = os.path.splitext(original)[1]
+    stem = original[:-len(suffix)] if suffix else original
+    name = pattern.replace('{n}', str(number))
+    name = name.replace('{name}', stem)
+    name = name.replace('{ext}', suffix)
+    if not name.endswith(suffix):
+        name += suffix
+    return name
+
+
+class RenamePlan:
+    """Source -> target renames, checked and applied as one batch
+
+    Target names are only computed when asked for, so previewing the first
+    screenful of a 100k-file plan is instant. ``check()`` computes them
+    all once and finds, with set lookups only:
+
+    * targets claimed by more than one source,
+    * targets that exist on disk and are not being renamed away,
+    * invalid names,
+    * renames that depend on another rename freeing their target first,
+      including cycles such as swapping ``a`` and ``b``.
+
+    ``apply()`` renames independent entries directly and sends dependent
+    ones through unique temporary names in two phases, so chains and
+    cycles never overwrite a file.
+
+    Paths are plain strings throughout; at 100k files pathlib costs more
+    than the checks themselves. ``name_for(i, name)`` gives the new name
+    for the i-th source's current name.
+    """
+
+    def __init__(self, sources: List[Path], name_for: Callable[[int, str], str]):
+        self.sources = [os.fspath(source) for source in sources]
+        self.name_for = name_for
+        self.targets: Optional[List[str]] = None
+        self.problems: Dict[int, str] = {}
+        self.dependent = set()  # Indexes that must go through a temporary name
+        self.cycles = 0
+
+    @classmethod
+    def from_pattern(cls, sources: List[Path], pattern: str, start: int = 1) -> 'RenamePlan':
+        return cls(sources, lambda i, name: pattern_name(pattern, start + i, name))
+
+    @classmethod
+    def from_pairs(cls, pairs: List[Tuple[str, str]]) -> 'RenamePlan':
+        """Plan from explicit (source, target) paths in the same folders"""
+        names = [os.path.basename(target) for _, target in pairs]
+        return cls([source for source, _ in pairs], lambda i, name: names[i])
+
+    def __len__(self) -> int:
+        return len(self.sources)
+
+    def target(self, i: int) -> str:
+        if self.targets is not None:
+            return self.targets[i]
+        folder, name = os.path.split(self.sources[i])
+        return os.path.join(folder, self.name_for(i, name))
+
+    def problem(self, i: int) -> Optional[str]:
+        return self.problems.get(i)
+
+    # ==================== CHECKING ====================
+
+    def check(self) -> bool:
+        """Validate the whole plan; True when it can be applied"""
+        self.targets = []
+        self.problems = {}
+        names = []
+        for i, source in enumerate(self.sources):
+            folder, old_name = os.path.split(source)
+            name = self.name_for(i, old_name)
+            if name in INVALID_NAMES or '/' in name or os.sep in name or '\0' in name:
+                self.problems[i] = f"invalid name '{name}'"
+            names.append((folder, name))
+            self.targets.append(os.path.join(folder, name))
+
+        sources = {source: i for i, source in enumerate(self.sources)}
+        moving = {source for source, target in zip(self.sources, self.targets) if source != target}
+
+        claimed: Dict[str, int] = {}
+        for i, target in enumerate(self.targets):
+            if target == self.sources[i]:
+                continue
+            if target in claimed:
+                other = claimed[target]
+                self.problems[i] = f"same new name as {os.path.basename(self.sources[other])}"
+                self.problems.setdefault(other, f"same new name as {os.path.basename(self.sources[i])}")
+            else:
+                claimed[target] = i
+
+        # Existing names, one listing per folder
+        existing: Dict[str, set] = {}
+        for i, target in enumerate(self.targets):
+            if target == self.sources[i] or i in self.problems:
+                continue
+            folder, name = names[i]
+            if folder not in existing:
+                try:
+                    existing[folder] = set(os.listdir(folder or '.'))
+                except OSError:
+                    existing[folder] = set()
+            if name in existing[folder] and target not in moving:
+                self.problems[i] = f"{name} already exists"
+
+        self._find_dependencies(sources)
+        return not self.problems
+
+    def _find_dependencies(self, sources: Dict[str, int]):
+        """Mark renames whose target is another source's current name"""
+        self.dependent = set()
+        self.cycles = 0
+        next_of = {}
+        for i, target in enumerate(self.targets):
+            j = sources.get(target)
+            if j is not None and j != i:
+                next_of[i] = j
+                self.dependent.add(i)
+                self.dependent.add(j)
+
+        # Follow each chain once; a chain that comes back to itself is a cycle
+        state = {}
+        for start in next_of:
+            i = start
+            while i in next_of and i not in state:
+                state[i] = start
+                i = next_of[i]
+            if i in next_of and state.get(i) == start:
+                self.cycles += 1
+
+    # ==================== APPLYING ====================
+
+    def renames(self) -> List[Tuple[str, str]]:
+        """(source, target) for every entry that changes"""
+        if self.targets is None:
+            self.check()
+        return [(source, target) for source, target in zip(self.sources, self.targets)
+                if source != target]
+
+    def apply(self) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """Carry out a checked plan; returns (source, target) done and (path, error)
+
+        Refuses to start while ``check()`` reports problems. If a rename
+        fails partway, files already moved stay at their new names and
+        files parked under a temporary name are moved back.
+        """
+        if self.targets is None:
+            self.check()
+        if self.problems:
+            raise ValueError(f"{len(self.problems)} rename(s) have problems")
+
+        done, errors = [], []
+        token = uuid.uuid4().hex[:8]
+        parked = []  # (temporary, source, target)
+
+        def rename(source: str, target: str) -> bool:
+            try:
+                os.rename(source, target)
+            except OSError as e:
+                errors.append((source, str(e)))
+                return False
+            return True
+
+        def put_back(temporary: str, source: str):
+            # An earlier rename in the chain may already own the old name
+            if os.path.lexists(source):
+                errors.append((source, f"left as {os.path.basename(temporary)}"))
+            else:
+                rename(temporary, source)
+
+        # Phase 1: independent renames directly, dependent ones off to temporary names
+        for i, (source, target) in enumerate(zip(self.sources, self.targets)):
+            if source == target:
+                continue
+            if i in self.dependent:
+                folder, name = os.path.split(source)
+                temporary = os.path.join(folder, f".{name}.rename-{token}-{i}")
+                if rename(source, temporary):
+                    parked.append((temporary, source, target))
+            elif rename(source, target):
+                done.append((source, target))
+
+        # Phase 2: every dependent target is free now
+        for temporary, source, target in parked:
+            if errors:
+                put_back(temporary, source)  # Rather than half-finish a cycle
+            elif rename(temporary, target):
+                done.append((source, target))
+            else:
+                put_back(temporary, source)
+        return done, errors
@@ -0,0 +1,344 @@
+"""
+core/scan_result.py
+Columnar scan results backed by NumPy arrays
+"""
+
+import os
+import numpy as np
+from array import array
+from collections.abc import Sequence
+from pathlib import Path
+from typing import List, Dict, Optional
+
+FLAG_DIR = 1
+FLAG_LINK = 2
+
+
+class ScanBuilder:
+    """Accumulates scanned entries into compact array columns
+
+    Entries are appended one at a time with the index of their parent
+    directory. Names go into a shared byte pool, numbers into typed
+    ``array`` columns, so no per-entry Python objects survive the scan.
+    """
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.parent = array('i')
+        self.depth = array('H')
+        self.name_offset = array('q')
+        self.name_length = array('H')
+        self.size = array('q')
+        self.mtime = array('d')
+        self.atime = array('d')
+        self.uid = array('I')
+        self.dev = array('Q')
+        self.ext_code = array('i')
+        self.flags = array('B')
+        self.pool = bytearray()
+        self.extensions = ['']
+        self._ext_lookup = {'': 0}
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    def add_root(self, st: Optional[os.stat_result] = None) -> int:
+        """Add the root directory as row 0"""
+        return self._append(-1, 0, str(self.root), st, FLAG_DIR, 0)
+
+    def add_entry(self, parent: int, depth: int, entry: os.DirEntry) -> Optional[int]:
+        """Add a scandir entry below ``parent``, returning its row or None"""
+        try:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            st = entry.stat(follow_symlinks=False)
+            is_link = entry.is_symlink()
+        except OSError:
+            return None
+
+        flags = (FLAG_DIR if is_dir else 0) | (FLAG_LINK if is_link else 0)
+        code = 0
+        if not is_dir:
+            ext = os.path.splitext(entry.name)[1].lower()
+            code = self._ext_lookup.get(ext)
+            if code is None:
+                code = self._ext_lookup[ext] = len(self.extensions)
+                self.extensions.append(ext)
+
+        return self._append(parent, depth, entry.name, st, flags, code)
+
+    def _append(self, parent: int, depth: int, name: str,
+                st: Optional[os.stat_result], flags: int, code: int) -> int:
+        index = len(self.parent)
+        encoded = os.fsencode(name)
+        self.parent.append(parent)
+        self.depth.append(depth)
+        self.name_offset.append(len(self.pool))
+        self.name_length.append(len(encoded))
+        self.pool += encoded
+        self.size.append(st.st_size if st is not None and not flags & FLAG_DIR else 0)
+        self.mtime.append(st.st_mtime if st is not None else 0.0)
+        self.atime.append(st.st_atime if st is not None else 0.0)
+        self.uid.append(getattr(st, 'st_uid', 0) if st is not None else 0)
+        self.dev.append(st.st_dev if st is not None else 0)
+        self.ext_code.append(code)
+        self.flags.append(flags)
+        return index
+
+    def build(self) -> 'ScanResult':
+        """Freeze the columns into a ScanResult without copying them"""
+        def column(values, dtype):
+            if not len(values):
+                return np.zeros(0, dtype=dtype)
+            return np.frombuffer(values, dtype=dtype)
+
+        return ScanResult(
+            self.root,
+            parent=column(self.parent, np.int32),
+            depth=column(self.depth, np.uint16),
+            name_offset=column(self.name_offset, np.int64),
+            name_length=column(self.name_length, np.uint16),
+            size=column(self.size, np.int64),
+            mtime=column(self.mtime, np.float64),
+            atime=column(self.atime, np.float64),
+            uid=column(self.uid, np.uint32),
+            dev=column(self.dev, np.uint64),
+            ext_code=column(self.ext_code, np.int32),
+            flags=column(self.flags, np.uint8),
+            pool=bytes(self.pool),
+            extensions=self.extensions,
+        )
+
+
+class ScanResult:
+    """A scanned directory tree stored as parallel NumPy columns
+
+    Row 0 is the root. Every other row holds one file or directory with the
+    row index of its parent, so full paths are rebuilt lazily by walking up
+    the parent column instead of being stored per entry. Parents always
+    precede their children.
+    """
+
+    def __init__(self, root: Path, parent: np.ndarray, depth: np.ndarray,
+                 name_offset: np.ndarray, name_length: np.ndarray,
+                 size: np.ndarray, mtime: np.ndarray, atime: np.ndarray,
+                 uid: np.ndarray, dev: np.ndarray, ext_code: np.ndarray,
+                 flags: np.ndarray, pool: bytes, extensions: List[str]):
+        self.root = Path(root)
+        self.parent = parent
+        self.depth = depth
+        self.name_offset = name_offset
+        self.name_length = name_length
+        self.size = size
+        self.mtime = mtime
+        self.atime = atime
+        self.uid = uid
+        self.dev = dev
+        self.ext_code = ext_code
+        self.flags = flags
+        self.pool = pool
+        self.extensions = extensions
+        self._totals = None
+
+    def __len__(self) -> int:
+        return len(self.parent)
+
+    @classmethod
+    def from_directory(cls, directory: Path, show_hidden: bool = True) -> 'ScanResult':
+        """Walk a directory tree with os.scandir and collect its columns"""
+        builder = ScanBuilder(directory)
+        try:
+            root_stat = os.stat(directory)
+        except OSError:
+            root_stat = None
+        builder.add_root(root_stat)
+
+        stack = [(str(directory), 0, 0)]
+        while stack:
+            current, index, depth = stack.pop()
+            try:
+                with os.scandir(current) as entries:
+                    for entry in entries:
+                        if not show_hidden and entry.name.startswith('.'):
+                            continue
+                        row = builder.add_entry(index, depth + 1, entry)
+                        if row is not None and builder.flags[row] & FLAG_DIR:
+                            stack.append((entry.path, row, depth + 1))
+            except OSError as e:
+                print(f"Error scanning {current}: {e}")
+
+        return builder.build()
+
+    # ==================== MASKS & TOTALS ====================
+
+    @property
+    def is_dir(self) -> np.ndarray:
+        return (self.flags & FLAG_DIR).astype(bool)
+
+    @property
+    def is_file(self) -> np.ndarray:
+        return ~self.is_dir
+
+    @property
+    def file_count(self) -> int:
+        return int(np.count_nonzero(self.is_file))
+
+    @property
+    def dir_count(self) -> int:
+        """Number of directories below the root"""
+        return max(int(np.count_nonzero(self.is_dir)) - 1, 0)
+
+    @property
+    def total_size(self) -> int:
+        """Total bytes of all scanned files"""
+        return int(self.size.sum())
+
+    def subtree_totals(self) -> np.ndarray:
+        """Recursive (size, file_count, folder_count) for every row"""
+        if self._totals is not None:
+            return self._totals
+
+        n = len(self)
+        values = np.zeros((n, 3), dtype=np.int64)
+        if n:
+            is_dir = self.is_dir
+            values[:, 0] = self.size
+            values[:, 1] = ~is_dir
+            values[:, 2] = is_dir
+            values[0, 2] = 0
+
+        totals = self.rollup(values)
+        if n:
+            # Directories count their descendants, not themselves
+            totals[is_dir, 2] -= 1
+            totals[0, 2] += 1
+        self._totals = totals
+        return totals
+
+    def rollup(self, values: np.ndarray) -> np.ndarray:
+        """Sum per-row values into every ancestor directory
+
+        ``values`` has one row per entry (any number of columns). The result
+        holds, for each row, its own values plus those of all descendants.
+        """
+        return _rollup(self.parent, self.depth, np.array(values, copy=True))
+
+    def folder_rows(self) -> np.ndarray:
+        """Row indices of all directories, root first"""
+        return np.nonzero(self.is_dir)[0]
+
+    def rollup_to_folders(self, rows: np.ndarray, values: np.ndarray) -> np.ndarray:
+        """Recursive per-folder sums of values attached to non-root ``rows``
+
+        The result is aligned with ``folder_rows()`` and only allocates one
+        entry per folder, which keeps wide per-folder tables (histograms)
+        small on trees with millions of files.
+        """
+        folders = self.folder_rows()
+        position = np.full(len(self), -1, dtype=np.int64)
+        position[folders] = np.arange(len(folders))
+
+        totals = np.zeros((len(folders),) + values.shape[1:], dtype=values.dtype)
+        np.add.at(totals, position[self.parent[rows]], values)
+
+        parent = np.full(len(folders), -1, dtype=np.int64)
+        parent[1:] = position[self.parent[folders[1:]]]
+        return _rollup(parent, self.depth[folders], totals)
+
+    # ==================== LAZY PATHS ====================
+
+    def name_bytes(self, index: int) -> bytes:
+        """Raw entry name from the shared string pool"""
+        start = int(self.name_offset[index])
+        return self.pool[start:start + int(self.name_length[index])]
+
+    def name(self, index: int) -> str:
+        """Entry name decoded from the shared string pool"""
+        return os.fsdecode(self.name_bytes(index))
+
+    def path(self, index: int) -> str:
+        """Rebuild the full path of a row from its parent chain"""
+        parts = []
+        while index > 0:
+            parts.append(self.name(index))
+            index = int(self.parent[index])
+        parts.append(str(self.root))
+        return os.path.join(*reversed(parts))
+
+    # ==================== REPORT VIEWS ====================
+
+    def usage_tree(self, max_depth: int = 3) -> Dict:
+        """Nested folder usage dicts down to ``max_depth`` levels
+
+        Only directories within the depth limit get a dict; totals still
+        include everything below them.
+        """
+        totals = self.subtree_totals()
+        rows = np.nonzero(self.is_dir & (self.depth <= max_depth))[0]
+
+        nodes = {}
+        for row in rows:
+            row = int(row)
+            nodes[row] = {
+                'path': self.path(row),
+                'size': int(totals[row, 0]),
+                'file_count': int(totals[row, 1]),
+                'folder_count': int(totals[row, 2]),
+                'children': []
+            }
+            if row > 0:
+                nodes[int(self.parent[row])]['children'].append(nodes[row])
+
+        return nodes.get(0, {
+            'path': str(self.root), 'size': 0, 'file_count': 0,
+            'folder_count': 0, 'children': []
+        })
+
+    def largest_files(self, min_size: int = 0) -> 'ScanRows':
+        """Files of at least ``min_size`` bytes, largest first"""
+        rows = np.nonzero(self.is_file & (self.size >= min_size))[0]
+        rows = rows[np.argsort(self.size[rows], kind='stable')[::-1]]
+        return ScanRows(self, rows)
+
+
+def _rollup(parent: np.ndarray, depth: np.ndarray, totals: np.ndarray) -> np.ndarray:
+    """Add every row into its parent, deepest level first, in place
+
+    Works one depth level at a time, so the cost is a handful of vectorised
+    scatter-adds rather than a Python loop per entry.
+    """
+    if len(totals) == 0:
+        return totals
+
+    order = np.argsort(depth, kind='stable')
+    bounds = np.searchsorted(depth[order], np.arange(int(depth.max()) + 2))
+    for level in range(len(bounds) - 2, 0, -1):
+        rows = order[bounds[level]:bounds[level + 1]]
+        np.add.at(totals, parent[rows], totals[rows])
+    return totals
+
+
+class ScanRows(Sequence):
+    """Lazy list of file dicts over selected rows of a ScanResult
+
+    Behaves like the list of ``{'path', 'size', 'name'}`` dicts the dialogs
+    expect, but only builds a dict when an element is actually accessed.
+    """
+
+    def __init__(self, scan: ScanResult, rows: np.ndarray):
+        self.scan = scan
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._row_dict(int(row)) for row in self.rows[index]]
+        return self._row_dict(int(self.rows[index]))
+
+    def _row_dict(self, row: int) -> Dict:
+        return {
+            'path': self.scan.path(row),
+            'size': int(self.scan.size[row]),
+            'name': self.scan.name(row)
+        }
@@ -0,0 +1,233 @@
+"""
+core/scan_snapshot.py
+Timestamped disk usage snapshots and linear-time growth/shrinkage diffs
+"""
+
+import heapq
+import json
+import os
+import re
+import numpy as np
+from array import array
+from datetime import datetime
+from pathlib import Path
+from typing import List, Dict
+
+from core.scan_result import ScanResult, FLAG_DIR
+
+# Path components are joined with NUL in the snapshot pool. NUL sorts below
+# every byte a file name can contain, so plain bytes comparison of pool
+# entries orders paths component by component, the same way in every snapshot.
+SEPARATOR = b'\x00'
+
+
+class Snapshot:
+    """A saved scan: every path sorted, with its size and flags
+
+    Directory sizes are recursive totals, file sizes are their own size.
+    Paths are stored relative to the root in one byte pool indexed by an
+    offsets column, so a snapshot costs roughly 17 bytes plus the path
+    length per entry.
+    """
+
+    def __init__(self, root: str, created: str, offsets: np.ndarray,
+                 pool: bytes, size: np.ndarray, flags: np.ndarray):
+        self.root = root
+        self.created = created
+        self.offsets = offsets
+        self.pool = pool
+        self.size = size
+        self.flags = flags
+
+    def __len__(self) -> int:
+        return len(self.size)
+
+    def key(self, index: int) -> bytes:
+        """Sort key (NUL-separated relative path) of an entry"""
+        return self.pool[self.offsets[index]:self.offsets[index + 1]]
+
+    def path(self, index: int) -> str:
+        """Full path of an entry"""
+        relative = os.fsdecode(self.key(index).replace(SEPARATOR, os.fsencode(os.sep)))
+        return os.path.join(self.root, relative) if relative else self.root
+
+    @classmethod
+    def from_scan(cls, scan: ScanResult) -> 'Snapshot':
+        """Flatten a scan into path-sorted columns
+
+        Walks the tree depth-first with each directory's children sorted by
+        name, which yields entries already in key order without holding every
+        path in memory at once.
+        """
+        totals = scan.subtree_totals()
+        n = len(scan)
+
+        offsets = array('q', [0])
+        pool = bytearray()
+        size = array('q')
+        flags = array('B')
+
+        if n:
+            # CSR layout of children per parent row
+            order = np.argsort(scan.parent, kind='stable')
+            starts = np.searchsorted(scan.parent[order], np.arange(n + 1))
+
+            stack = [(0, b'')]
+            while stack:
+                row, key = stack.pop()
+                pool += key
+                offsets.append(len(pool))
+                size.append(int(totals[row, 0]))
+                flags.append(int(scan.flags[row]))
+
+                children = order[starts[row]:starts[row + 1]]
+                if len(children):
+                    prefix = key + SEPARATOR if row else b''
+                    named = sorted(
+                        (scan.name_bytes(int(child)), int(child)) for child in children
+                    )
+                    # Push in reverse so the smallest name is visited first
+                    for name, child in reversed(named):
+                        stack.append((child, prefix + name))
+
+        return cls(
+            str(scan.root), datetime.now().isoformat(timespec='seconds'),
+            np.frombuffer(offsets, dtype=np.int64),
+            bytes(pool),
+            np.frombuffer(size, dtype=np.int64) if len(size) else np.zeros(0, dtype=np.int64),
+            np.frombuffer(flags, dtype=np.uint8) if len(flags) else np.zeros(0, dtype=np.uint8),
+        )
+
+    def save(self, file_path: Path):
+        """Write the snapshot as a compressed .npz file"""
+        meta = json.dumps({'root': self.root, 'created': self.created, 'entries': len(self)})
+        np.savez_compressed(
+            file_path,
+            meta=np.frombuffer(meta.encode('utf-8'), dtype=np.uint8),
+            offsets=self.offsets,
+            pool=np.frombuffer(self.pool, dtype=np.uint8),
+            size=self.size,
+            flags=self.flags,
+        )
+
+    @classmethod
+    def load(cls, file_path: Path) -> 'Snapshot':
+        """Read a snapshot written by save()"""
+        with np.load(file_path) as data:
+            meta = json.loads(data['meta'].tobytes().decode('utf-8'))
+            return cls(meta['root'], meta['created'], data['offsets'],
+                       data['pool'].tobytes(), data['size'], data['flags'])
+
+    @staticmethod
+    def read_meta(file_path: Path) -> Dict:
+        """Read only the metadata of a snapshot file"""
+        with np.load(file_path) as data:
+            return json.loads(data['meta'].tobytes().decode('utf-8'))
+
+
+class SnapshotStore:
+    """Snapshot files kept in the config directory"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def save(self, scan: ScanResult) -> Path:
+        """Save a scan as a new timestamped snapshot"""
+        snapshot = Snapshot.from_scan(scan)
+        slug = re.sub(r'[^A-Za-z0-9]+', '_', snapshot.root).strip('_') or 'root'
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+        file_path = self.directory / f"{slug[-60:]}-{stamp}.npz"
+        snapshot.save(file_path)
+        return file_path
+
+    def list_snapshots(self, root: str = None) -> List[Dict]:
+        """Saved snapshots, newest first, optionally only for one root"""
+        snapshots = []
+        for file_path in self.directory.glob('*.npz'):
+            try:
+                meta = Snapshot.read_meta(file_path)
+            except Exception as e:
+                print(f"Error reading snapshot {file_path}: {e}")
+                continue
+            if root is None or meta['root'] == root:
+                meta['file'] = str(file_path)
+                snapshots.append(meta)
+        snapshots.sort(key=lambda s: s['created'], reverse=True)
+        return snapshots
+
+
+def diff_snapshots(old: Snapshot, new: Snapshot, top: int = 20,
+                   min_file_size: int = 100 * 1024 * 1024) -> Dict:
+    """Merge-join two snapshots and report what grew and shrank
+
+    Both snapshots are walked once in key order, so the diff is linear in
+    their combined size. Only fixed-size heaps of the top results are kept,
+    whatever the number of entries.
+    """
+    growing = []
+    shrinking = []
+    new_files = []
+    removed_files = []
+    counter = 0
+
+    def push(heap, score, source, index, old_size, new_size):
+        nonlocal counter
+        counter += 1
+        entry = (score, counter, source, index, old_size, new_size)
+        if len(heap) < top:
+            heapq.heappush(heap, entry)
+        elif score > heap[0][0]:
+            heapq.heapreplace(heap, entry)
+
+    def visit_dir(source, index, old_size, new_size):
+        delta = new_size - old_size
+        if delta > 0:
+            push(growing, delta, source, index, old_size, new_size)
+        elif delta < 0:
+            push(shrinking, -delta, source, index, old_size, new_size)
+
+    i = j = 0
+    n_old, n_new = len(old), len(new)
+    while i < n_old or j < n_new:
+        old_key = old.key(i) if i < n_old else None
+        new_key = new.key(j) if j < n_new else None
+
+        if new_key is None or (old_key is not None and old_key < new_key):
+            # Removed entry
+            size = int(old.size[i])
+            if old.flags[i] & FLAG_DIR:
+                visit_dir(old, i, size, 0)
+            elif size >= min_file_size:
+                push(removed_files, size, old, i, size, 0)
+            i += 1
+        elif old_key is None or new_key < old_key:
+            # New entry
+            size = int(new.size[j])
+            if new.flags[j] & FLAG_DIR:
+                visit_dir(new, j, 0, size)
+            elif size >= min_file_size:
+                push(new_files, size, new, j, 0, size)
+            j += 1
+        else:
+            if new.flags[j] & FLAG_DIR:
+                visit_dir(new, j, int(old.size[i]), int(new.size[j]))
+            i += 1
+            j += 1
+
+    def rows(heap):
+        return [
+            {'path': source.path(index), 'old_size': old_size,
+             'new_size': new_size, 'delta': new_size - old_size}
+            for _, _, source, index, old_size, new_size in sorted(heap, reverse=True)
+        ]
+
+    return {
+        'old_created': old.created,
+        'new_created': new.created,
+        'total_change': int(new.size[0] if n_new else 0) - int(old.size[0] if n_old else 0),
+        'growing': rows(growing),
+        'shrinking': rows(shrinking),
+        'new_files': rows(new_files),
+        'removed_files': rows(removed_files),
+    }
@@ -0,0 +1,109 @@
+"""
+core/storage_report.py
+Vectorised storage breakdowns by extension, category, owner and age
+"""
+
+import time
+import numpy as np
+from typing import List, Dict
+
+from core.scan_result import ScanResult
+
+try:
+    import pwd
+except ImportError:  # Windows has no passwd database
+    pwd = None
+
+FILE_CATEGORIES = {
+    'Images': ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.svg', '.heic', '.raw', '.ico'],
+    'Videos': ['.mp4', '.avi', '.mov', '.mkv', '.wmv', '.flv', '.webm', '.m4v'],
+    'Audio': ['.mp3', '.wav', '.flac', '.m4a', '.aac', '.ogg', '.wma'],
+    'Documents': ['.pdf', '.doc', '.docx', '.txt', '.md', '.rtf', '.odt', '.ppt', '.pptx'],
+    'Spreadsheets': ['.xls', '.xlsx', '.csv', '.ods'],
+    'Archives': ['.zip', '.rar', '.7z', '.tar', '.gz', '.bz2', '.xz', '.iso'],
+    'Code': ['.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.cpp', '.c', '.h', '.cs',
+             '.go', '.rs', '.rb', '.php', '.html', '.css', '.json', '.xml', '.yml', '.yaml'],
+    'Executables': ['.exe', '.msi', '.dll', '.so', '.dmg', '.app', '.deb', '.rpm'],
+}
+
+OTHER_CATEGORY = 'Other'
+
+# Upper bounds (in days) of each age bucket, oldest bucket is open-ended
+AGE_BUCKETS = [
+    ('Last 7 days', 7),
+    ('Last 30 days', 30),
+    ('Last 90 days', 90),
+    ('Last year', 365),
+    ('1-3 years', 3 * 365),
+    ('Older than 3 years', None),
+]
+
+
+class StorageReport:
+    """Group-by totals over a ScanResult using NumPy bincount"""
+
+    def __init__(self, scan: ScanResult):
+        self.scan = scan
+        files = scan.is_file
+        self.size = scan.size[files]
+        self.mtime = scan.mtime[files]
+        self.uid = scan.uid[files]
+        self.ext_code = scan.ext_code[files]
+
+    def by_extension(self) -> List[Dict]:
+        """Total size and file count per extension"""
+        labels = [ext or '(none)' for ext in self.scan.extensions]
+        return self._group(self.ext_code, labels)
+
+    def by_category(self) -> List[Dict]:
+        """Total size and file count per file category"""
+        categories = list(FILE_CATEGORIES) + [OTHER_CATEGORY]
+        category_of = {ext: i for i, exts in enumerate(FILE_CATEGORIES.values()) for ext in exts}
+        other = len(categories) - 1
+
+        # Map each extension code to a category code, then group by that
+        ext_to_category = np.array(
+            [category_of.get(ext, other) for ext in self.scan.extensions], dtype=np.int32
+        )
+        return self._group(ext_to_category[self.ext_code], categories)
+
+    def by_owner(self) -> List[Dict]:
+        """Total size and file count per owning user"""
+        owners, codes = np.unique(self.uid, return_inverse=True)
+        return self._group(codes, [self._owner_name(int(uid)) for uid in owners])
+
+    def by_age(self, now: float = None) -> List[Dict]:
+        """Total size and file count per last-modified age bucket"""
+        now = time.time() if now is None else now
+        edges = np.array([days * 86400 for _, days in AGE_BUCKETS if days is not None],
+                         dtype=np.float64)
+        codes = np.searchsorted(edges, now - self.mtime, side='right')
+        return self._group(codes, [label for label, _ in AGE_BUCKETS], sort=False)
+
+    def _group(self, codes: np.ndarray, labels: List[str], sort: bool = True) -> List[Dict]:
+        """Sum sizes and count files for each code, returning labelled rows"""
+        total = max(self.scan.total_size, 1)
+        sizes = np.bincount(codes, weights=self.size, minlength=len(labels))
+        counts = np.bincount(codes, minlength=len(labels))
+
+        order = np.argsort(sizes)[::-1] if sort else np.arange(len(labels))
+        rows = []
+        for i in order:
+            if counts[i] == 0:
+                continue
+            rows.append({
+                'name': labels[i],
+                'size': int(sizes[i]),
+                'file_count': int(counts[i]),
+                'percent': float(sizes[i]) * 100.0 / total,
+            })
+        return rows
+
+    def _owner_name(self, uid: int) -> str:
+        """Resolve a uid to a user name where the platform supports it"""
+        if pwd is not None:
+            try:
+                return pwd.getpwuid(uid).pw_name
+            except KeyError:
+                pass
+        return str(uid)
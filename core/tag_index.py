@@ -0,0 +1,176 @@
+"""
+core/tag_index.py
+In-memory tag index with write-behind persistence
+"""
+
+import atexit
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Dict, Set
+
+
+class TagIndex:
+    """File tags held in memory as path->tags and tag->paths maps
+
+    tags.json is read once at startup. Lookups never touch the disk; edits
+    mark the index dirty and a background thread writes the whole file after
+    a short delay, so a burst of edits costs one atomic write.
+    """
+
+    def __init__(self, tags_file: Path, flush_delay: float = 1.0):
+        self.tags_file = tags_file
+        self.flush_delay = flush_delay
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.forward: Dict[str, List[str]] = {}
+        self.inverted: Dict[str, Set[str]] = {}
+        self.dirty = False
+        self._timer = None
+        self._load()
+        atexit.register(self.flush)
+
+    def _load(self):
+        try:
+            if self.tags_file.exists():
+                with open(self.tags_file, 'r') as f:
+                    data = json.load(f)
+                for path, tags in data.items():
+                    self.forward[path] = list(tags)
+                    for tag in tags:
+                        self.inverted.setdefault(tag, set()).add(path)
+        except Exception as e:
+            print(f"Error loading {self.tags_file}: {e}")
+
+    # ==================== QUERIES ====================
+
+    def get_tags(self, path: str) -> List[str]:
+        """Tags of one path"""
+        with self.lock:
+            return list(self.forward.get(path, ()))
+
+    def get_all(self) -> Dict[str, List[str]]:
+        """Copy of the full path->tags map"""
+        with self.lock:
+            return {path: list(tags) for path, tags in self.forward.items()}
+
+    def search(self, tag: str) -> List[str]:
+        """Paths carrying a tag"""
+        with self.lock:
+            return sorted(self.inverted.get(tag, ()))
+
+    # ==================== EDITS ====================
+
+    def add(self, path: str, tag: str):
+        """Tag a path"""
+        with self.lock:
+            tags = self.forward.setdefault(path, [])
+            if tag in tags:
+                return
+            tags.append(tag)
+            self.inverted.setdefault(tag, set()).add(path)
+            self._mark_dirty()
+
+    def remove(self, path: str, tag: str):
+        """Remove a tag from a path"""
+        with self.lock:
+            tags = self.forward.get(path)
+            if not tags or tag not in tags:
+                return
+            tags.remove(tag)
+            if not tags:
+                del self.forward[path]
+            paths = self.inverted.get(tag)
+            if paths is not None:
+                paths.discard(path)
+                if not paths:
+                    del self.inverted[tag]
+            self._mark_dirty()
+
+    def move(self, old_path: str, new_path: str):
+        """Carry tags over when a file or folder is renamed or moved"""
+        prefix = old_path.rstrip(os.sep) + os.sep
+        with self.lock:
+            moved = [path for path in self.forward
+                     if path == old_path or path.startswith(prefix)]
+            for path in moved:
+                target = new_path + path[len(old_path):]
+                tags = self.forward.pop(path)
+                self.forward[target] = tags
+                for tag in tags:
+                    paths = self.inverted.setdefault(tag, set())
+                    paths.discard(path)
+                    paths.add(target)
+            if moved:
+                self._mark_dirty()
+
+    def move_many(self, renames: Dict[str, str]):
+        """Carry tags over for many renames made at once, swaps included"""
+        if not renames:
+            return
+        with self.lock:
+            moved = {}
+            for path in self.forward:
+                # The path itself or the nearest renamed folder above it
+                head, tail = path, ''
+                while head not in renames:
+                    parent = os.path.dirname(head)
+                    if parent == head:
+                        break
+                    tail = head[len(parent):] + tail
+                    head = parent
+                else:
+                    moved[path] = renames[head] + tail
+            # Pop everything first so a swap doesn't merge the two files' tags
+            tags_of = {path: self.forward.pop(path) for path in moved}
+            for path, target in moved.items():
+                tags = tags_of[path]
+                self.forward[target] = tags
+                for tag in tags:
+                    paths = self.inverted.setdefault(tag, set())
+                    paths.discard(path)
+            for path, target in moved.items():
+                for tag in tags_of[path]:
+                    self.inverted[tag].add(target)
+            if moved:
+                self._mark_dirty()
+
+    # ==================== PERSISTENCE ====================
+
+    def _mark_dirty(self):
+        """Schedule a background flush; caller holds the lock"""
+        self.dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self):
+        """Write the index to disk now if it has unsaved edits"""
+        # Serialise writers so an older copy never replaces a newer one
+        with self.write_lock:
+            with self.lock:
+                self._timer = None
+                if not self.dirty:
+                    return
+                data = {path: list(tags) for path, tags in self.forward.items()}
+                self.dirty = False
+
+            temp_path = None
+            try:
+                # Write to a temp file in the same directory, then swap it in
+                fd, temp_path = tempfile.mkstemp(dir=str(self.tags_file.parent),
+                                                 prefix='.tags-', suffix='.tmp')
+                with os.fdopen(fd, 'w') as f:
+                    json.dump(data, f, indent=2)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(temp_path, self.tags_file)
+            except Exception as e:
+                print(f"Error saving {self.tags_file}: {e}")
+                if temp_path and os.path.exists(temp_path):
+                    os.remove(temp_path)
+                with self.lock:
+                    self.dirty = True
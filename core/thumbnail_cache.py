@@ -0,0 +1,165 @@
+"""
+core/thumbnail_cache.py
+Thumbnail generation with an LRU memory cache and an on-disk cache
+"""
+
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import Callable, Optional
+
+from PIL import Image, ImageOps
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp', '.tiff', '.tif'}
+
+
+class ThumbnailCache:
+    """Generates downscaled JPEG thumbnails on a pool of worker threads
+
+    Lookups go memory LRU -> disk cache -> decode. Cache keys combine the
+    file's device, inode, mtime and size, so an edited or replaced image
+    gets a fresh thumbnail without any explicit invalidation. JPEGs are
+    decoded with Pillow's ``draft`` mode, which lets libjpeg scale down by
+    1/2-1/8 while decoding instead of producing the full-size bitmap.
+
+    Pending requests are served newest first, so while scrolling the rows
+    on screen are generated before the ones already scrolled past.
+    """
+
+    def __init__(self, cache_dir: Path, size: int = 384, memory_items: int = 512,
+                 workers: int = 4, max_pending: int = 2000):
+        self.cache_dir = cache_dir
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.size = size
+        self.memory_items = memory_items
+        self.max_pending = max_pending
+
+        self.memory = OrderedDict()
+        self.pending = deque()
+        self.waiting = {}  # path -> callbacks for requests not yet served
+        self.lock = threading.Lock()
+        self.available = threading.Condition(self.lock)
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f'thumbnail-{i}', daemon=True)
+            thread.start()
+
+    # ==================== PUBLIC API ====================
+
+    @staticmethod
+    def is_supported(path: Path) -> bool:
+        return Path(path).suffix.lower() in IMAGE_EXTENSIONS
+
+    def request(self, path: str, callback: Callable[[str, Optional[bytes]], None]):
+        """Queue a thumbnail; ``callback(path, jpeg_bytes_or_None)`` runs on a worker thread"""
+        with self.lock:
+            callbacks = self.waiting.get(path)
+            if callbacks is not None:
+                callbacks.append(callback)
+                # Move it to the front of the queue again
+                try:
+                    self.pending.remove(path)
+                except ValueError:
+                    pass
+                self.pending.append(path)
+                return
+
+            self.waiting[path] = [callback]
+            self.pending.append(path)
+            while len(self.pending) > self.max_pending:
+                dropped = self.pending.popleft()
+                self.waiting.pop(dropped, None)
+            self.available.notify()
+
+    def cancel_pending(self):
+        """Forget all requests that have not started yet"""
+        with self.lock:
+            for path in self.pending:
+                self.waiting.pop(path, None)
+            self.pending.clear()
+
+    def get(self, path: str) -> Optional[bytes]:
+        """Thumbnail for a path, generating it synchronously if needed"""
+        try:
+            key = self._key(path)
+        except OSError:
+            return None
+        return self._lookup(key) or self._generate(path, key)
+
+    # ==================== WORKERS ====================
+
+    def _worker(self):
+        while True:
+            with self.available:
+                while not self.pending:
+                    self.available.wait()
+                path = self.pending.pop()
+
+            data = self.get(path)
+
+            with self.lock:
+                callbacks = self.waiting.pop(path, [])
+            for callback in callbacks:
+                try:
+                    callback(path, data)
+                except Exception as e:
+                    print(f"Error delivering thumbnail for {path}: {e}")
+
+    def _key(self, path: str) -> str:
+        st = os.stat(path)
+        raw = f"{st.st_dev}-{st.st_ino}-{st.st_mtime_ns}-{st.st_size}-{self.size}"
+        return hashlib.sha1(raw.encode()).hexdigest()
+
+    def _lookup(self, key: str) -> Optional[bytes]:
+        """Memory tier, then disk tier"""
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                return data
+
+        cache_file = self.cache_dir / key[:2] / f"{key}.jpg"
+        try:
+            data = cache_file.read_bytes()
+        except OSError:
+            return None
+        self._remember(key, data)
+        return data
+
+    def _remember(self, key: str, data: bytes):
+        with self.lock:
+            self.memory[key] = data
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_items:
+                self.memory.popitem(last=False)
+
+    def _generate(self, path: str, key: str) -> Optional[bytes]:
+        """Decode, downscale and cache a thumbnail"""
+        try:
+            with Image.open(path) as img:
+                # Let the JPEG decoder do most of the downscaling
+                img.draft('RGB', (self.size, self.size))
+                img = ImageOps.exif_transpose(img)
+                img.thumbnail((self.size, self.size))
+                if img.mode not in ('RGB', 'L'):
+                    img = img.convert('RGB')
+                buffer = io.BytesIO()
+                img.save(buffer, 'JPEG', quality=85)
+                data = buffer.getvalue()
+        except Exception as e:
+            print(f"Error generating thumbnail for {path}: {e}")
+            return None
+
+        self._remember(key, data)
+        cache_file = self.cache_dir / key[:2] / f"{key}.jpg"
+        try:
+            cache_file.parent.mkdir(exist_ok=True)
+            temp_file = cache_file.with_suffix(f'.{threading.get_ident()}.tmp')
+            temp_file.write_bytes(data)
+            os.replace(temp_file, cache_file)
+        except OSError as e:
+            print(f"Error caching thumbnail for {path}: {e}")
+        return data
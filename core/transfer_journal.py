@@ -0,0 +1,198 @@
+"""
+core/transfer_journal.py
+Append-only on-disk journals that let interrupted transfers resume
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import List, Optional
+
+# Completion records are flushed at least this often; a crash costs at
+# most this much recopying
+FLUSH_INTERVAL = 0.5
+
+
+class JobJournal:
+    """Progress log of one copy or move job
+
+    One JSON object per line: a header describing the job, then a record
+    per copied file, per finished top-level item, and per checkpoint
+    inside a large file. Records are only ever appended, so a crash can at
+    worst cut off the last line, which loading ignores.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.operation = None
+        self.sources: List[Path] = []
+        self.destination: Optional[Path] = None
+        self.verify = False
+        self.files = set()  # Source paths copied completely
+        self.items = set()  # Top-level sources finished
+        self.offsets = {}  # Source path -> (bytes on disk in the target, source size, source mtime_ns)
+        self.lock = threading.Lock()
+        self.handle = None
+        self.last_flush = 0.0
+
+    @classmethod
+    def create(cls, path: Path, operation: str, sources: List[Path], destination: Path,
+               verify: bool = False) -> 'JobJournal':
+        journal = cls(path)
+        journal.operation = operation
+        journal.sources = list(sources)
+        journal.destination = destination
+        journal.verify = verify
+        journal._append({'type': 'job', 'operation': operation,
+                         'sources': [str(source) for source in sources],
+                         'destination': str(destination), 'verify': verify}, flush=True)
+        return journal
+
+    @classmethod
+    def load(cls, path: Path) -> Optional['JobJournal']:
+        journal = cls(path)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn write from a crash
+                    journal._replay(record)
+        except OSError as e:
+            print(f"Error reading transfer journal {path}: {e}")
+            return None
+        return journal if journal.operation else None
+
+    def _replay(self, record: dict):
+        kind = record.get('type')
+        if kind == 'job':
+            self.operation = record['operation']
+            self.sources = [Path(source) for source in record['sources']]
+            self.destination = Path(record['destination'])
+            self.verify = record.get('verify', False)
+        elif kind == 'file':
+            self.files.add(record['path'])
+            self.offsets.pop(record['path'], None)
+        elif kind == 'partial':
+            self.offsets[record['path']] = (record['offset'], record.get('size'), record.get('mtime_ns'))
+        elif kind == 'item':
+            self.items.add(record['path'])
+
+    # ==================== RECORDING ====================
+
+    def file_done(self, source: str):
+        self._append({'type': 'file', 'path': source})
+
+    def partial(self, source: str, offset: int, st: os.stat_result):
+        """Bytes of source already durable in the target; caller has synced them
+
+        ``st`` is the source's stat when the copy began, so a resume can
+        tell whether the source changed since.
+        """
+        self.offsets[source] = (offset, st.st_size, st.st_mtime_ns)
+        self._append({'type': 'partial', 'path': source, 'offset': offset,
+                      'size': st.st_size, 'mtime_ns': st.st_mtime_ns}, flush=True)
+
+    def item_done(self, source: Path):
+        self._append({'type': 'item', 'path': str(source)}, flush=True)
+
+    def _append(self, record: dict, flush: bool = False):
+        line = json.dumps(record) + '\n'
+        with self.lock:
+            try:
+                if self.handle is None:
+                    self.handle = open(self.path, 'a', encoding='utf-8')
+                    if self.handle.tell() and not self._ends_with_newline():
+                        self.handle.write('\n')
+                self.handle.write(line)
+                now = time.monotonic()
+                if flush or now - self.last_flush >= FLUSH_INTERVAL:
+                    self.handle.flush()
+                    self.last_flush = now
+            except OSError as e:
+                print(f"Error writing transfer journal {self.path}: {e}")
+
+    def _ends_with_newline(self) -> bool:
+        with open(self.path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    # ==================== RESUMING ====================
+
+    def is_item_done(self, source: Path) -> bool:
+        return str(source) in self.items
+
+    def is_file_done(self, source: str, st: os.stat_result, target: str) -> bool:
+        """Copied before, and the target still matches the source's size and mtime"""
+        if source not in self.files:
+            return False
+        try:
+            target_st = os.stat(target)
+        except OSError:
+            return False
+        return target_st.st_size == st.st_size and target_st.st_mtime_ns == st.st_mtime_ns
+
+    def resume_offset(self, source: str, st: os.stat_result) -> int:
+        """Where to resume copying source; 0 unless it is unchanged since the checkpoint"""
+        partial = self.offsets.get(source)
+        if partial is None:
+            return 0
+        offset, size, mtime_ns = partial
+        if size != st.st_size or mtime_ns != st.st_mtime_ns:
+            return 0  # Appending would splice old and new data
+        return offset
+
+    # ==================== LIFETIME ====================
+
+    def close(self):
+        with self.lock:
+            if self.handle is not None:
+                try:
+                    self.handle.close()
+                except OSError:
+                    pass
+                self.handle = None
+
+    def discard(self):
+        """Job finished or abandoned; nothing left to resume"""
+        self.close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+
+
+class TransferJournal:
+    """Directory of JobJournals, one file per unfinished job"""
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def create(self, operation: str, sources: List[Path], destination: Path,
+               verify: bool = False) -> JobJournal:
+        path = self.directory / f"{uuid.uuid4().hex}.jsonl"
+        return JobJournal.create(path, operation, sources, destination, verify)
+
+    def pending(self) -> List[JobJournal]:
+        """Journals of jobs that never finished, oldest first"""
+        journals = []
+        try:
+            paths = sorted(self.directory.glob('*.jsonl'), key=lambda path: path.stat().st_mtime)
+        except OSError as e:
+            print(f"Error listing transfer journals: {e}")
+            return journals
+        for path in paths:
+            journal = JobJournal.load(path)
+            if journal is None:
+                try:
+                    path.unlink()
+                except OSError:
+                    pass
+            else:
+                journals.append(journal)
+        return journals
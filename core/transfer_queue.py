@@ -0,0 +1,412 @@
+"""
+core/transfer_queue.py
+Background copy, move and delete jobs with byte-level progress
+"""
+
+import errno
+import itertools
+import os
+import shutil
+import stat
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from core.copy_engine import CopyInterrupted
+from core.transfer_journal import JobJournal
+from core.device_scheduler import (detect_storage_type, STORAGE_SSD, STORAGE_HDD,
+                                   STORAGE_NETWORK, STORAGE_UNKNOWN)
+
+COPY = 'copy'
+MOVE = 'move'
+DELETE = 'delete'
+
+QUEUED = 'queued'
+RUNNING = 'running'
+PAUSED = 'paused'
+CANCELLED = 'cancelled'
+DONE = 'done'
+FAILED = 'failed'
+
+# Jobs allowed to run at once on each device; one per spinning disk so
+# two transfers never fight over the heads
+DEFAULT_SLOTS = {
+    STORAGE_SSD: 4,
+    STORAGE_HDD: 1,
+    STORAGE_NETWORK: 2,
+    STORAGE_UNKNOWN: 2,
+}
+
+# Items trashed per call, and between pause/cancel checks
+DELETE_BATCH = 500
+
+# rename() failures that a copy followed by a delete can still handle
+RENAME_FALLBACK_ERRORS = {errno.EXDEV, errno.ENOTEMPTY, errno.EEXIST}
+
+
+class TransferCancelled(Exception):
+    """Raised inside a job when it is cancelled"""
+
+
+class TransferInterrupted(TransferCancelled, CopyInterrupted):
+    """Raised inside a job stopped by the queue closing; its journal is kept"""
+
+
+class TransferJob:
+    """One queued copy, move or delete and its progress
+
+    Counters are written by the worker thread running the job and may be
+    read from any thread; ``rate`` is a smoothed bytes-per-second figure.
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, operation: str, sources: List[Path], destination: Optional[Path] = None,
+                 use_trash: bool = True, verify: bool = False):
+        self.id = next(self._ids)
+        self.operation = operation
+        self.sources = [Path(source) for source in sources]
+        self.destination = Path(destination) if destination is not None else None
+        self.use_trash = use_trash
+        self.verify = verify  # Copies are read back and checked
+        self.state = QUEUED
+        self.devices: Dict[int, Path] = {}  # st_dev -> a path on that device
+
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.total_items = len(self.sources)
+        self.done_items = 0
+        self.current = ''
+        self.errors = []  # (path, message)
+        self.rate = 0.0
+        self.started = None
+        self.finished = None
+        self.rate_mark = (0.0, 0)  # (time, done_bytes) the rate is measured from
+        self.last_report = 0.0
+
+        self.journal = None  # JobJournal of a copy or move, for resuming after a crash
+        self.cancelled = False
+        self.interrupted = False  # Cancelled by the queue closing, to be resumed
+        self.running = threading.Event()
+        self.running.set()
+
+    def is_finished(self) -> bool:
+        return self.state in (DONE, FAILED, CANCELLED)
+
+    def eta(self) -> Optional[float]:
+        """Seconds left at the current rate, None while unknown"""
+        if self.rate <= 0 or self.state != RUNNING:
+            return None
+        return max(self.total_bytes - self.done_bytes, 0) / self.rate
+
+    def fraction(self) -> float:
+        if self.total_bytes:
+            return min(self.done_bytes / self.total_bytes, 1.0)
+        return self.done_items / self.total_items if self.total_items else 1.0
+
+    def checkpoint(self):
+        """Block while paused; raise once cancelled"""
+        if not self.running.is_set():
+            self.running.wait()
+        if self.cancelled:
+            raise TransferInterrupted() if self.interrupted else TransferCancelled()
+
+
+class TransferQueue:
+    """Runs transfer jobs on worker threads with per-device limits
+
+    A job may start once every device it reads from or writes to has a
+    free slot (see DEFAULT_SLOTS), so a copy between two SSDs runs next to
+    a backup onto a spinning disk, while a second job for that disk waits.
+    Copies and moves keep a journal from the moment they are queued until
+    they finish or are cancelled; jobs still queued or running when the
+    queue is closed, or when the app dies, can be resubmitted from it.
+    ``callback(job)`` is called from worker threads on state changes and at
+    most every ``interval`` seconds while bytes move.
+    """
+
+    def __init__(self, file_manager, callback: Callable[[TransferJob], None],
+                 workers: int = 4, slots: Dict[str, int] = None, interval: float = 0.2):
+        self.file_manager = file_manager
+        self.callback = callback
+        self.interval = interval
+        self.slots = dict(DEFAULT_SLOTS)
+        if slots:
+            self.slots.update(slots)
+
+        self.jobs: List[TransferJob] = []
+        self.busy: Dict[int, int] = {}  # st_dev -> running jobs
+        self.lock = threading.Lock()
+        self.changed = threading.Condition(self.lock)
+        self.closed = False
+
+        for i in range(workers):
+            thread = threading.Thread(target=self._worker, name=f'transfer-{i}', daemon=True)
+            thread.start()
+
+    # ==================== PUBLIC API ====================
+
+    def submit(self, operation: str, sources: List[Path], destination: Path = None,
+               use_trash: bool = True, journal: JobJournal = None, verify: bool = False) -> TransferJob:
+        """Queue a job; ``destination`` is the folder items are copied or moved into
+
+        Raises ValueError if a source is the destination or one of its
+        parent folders: copying a folder into itself never finishes.
+        """
+        if destination is not None and operation != DELETE:
+            inside = Path(os.path.abspath(destination))
+            for source in sources:
+                source = Path(os.path.abspath(source))
+                if source == inside or source in inside.parents:
+                    raise ValueError(f"Cannot {operation} {source} into itself")
+        job = TransferJob(operation, sources, destination, use_trash, verify)
+        if journal is None and operation != DELETE:
+            journal = self.file_manager.transfer_journal.create(operation, job.sources, job.destination,
+                                                                verify)
+        job.journal = journal
+        job.devices = self._devices(job)
+        with self.lock:
+            self.jobs.append(job)
+            self.changed.notify_all()
+        self._report(job)
+        return job
+
+    def submit_journal(self, journal: JobJournal) -> TransferJob:
+        """Queue an interrupted job again; finished work is skipped"""
+        return self.submit(journal.operation, journal.sources, journal.destination, journal=journal,
+                           verify=journal.verify)
+
+    def pause(self, job: TransferJob):
+        """Hold a job at its next chunk; a queued job is not started"""
+        with self.lock:
+            if job.state not in (QUEUED, RUNNING):
+                return
+            job.running.clear()
+            job.state = PAUSED
+        self._report(job)
+
+    def resume(self, job: TransferJob):
+        with self.lock:
+            if job.state != PAUSED:
+                return
+            if job.started is None:
+                job.state = QUEUED
+                self.changed.notify_all()
+            else:
+                job.state = RUNNING
+                # Don't count the pause against the rate
+                job.rate_mark = (time.monotonic(), job.done_bytes)
+            job.running.set()
+        self._report(job)
+
+    def cancel(self, job: TransferJob):
+        job.cancelled = True
+        job.running.set()
+        with self.lock:
+            if job.started is None and not job.is_finished():
+                job.state = CANCELLED
+                self.jobs.remove(job)
+                self.changed.notify_all()
+                self._end_journal(job)
+            else:
+                job = None
+        if job is not None:
+            self._report(job)
+
+    def active(self) -> List[TransferJob]:
+        """Jobs that are queued, running or paused"""
+        with self.lock:
+            return list(self.jobs)
+
+    def close(self):
+        """Stop everything and let the workers exit, keeping journals to resume"""
+        with self.lock:
+            self.closed = True
+            self.changed.notify_all()
+        for job in self.active():
+            job.interrupted = True
+            self.cancel(job)
+
+    # ==================== SCHEDULING ====================
+
+    def _devices(self, job: TransferJob) -> Dict[int, Path]:
+        """Devices a job touches, each with a path on it to classify it by"""
+        devices = {}
+        paths = {source.parent for source in job.sources}
+        if job.destination is not None:
+            paths.add(job.destination)
+        for path in paths:
+            try:
+                devices.setdefault(os.stat(path).st_dev, path)
+            except OSError:
+                pass
+        return devices
+
+    def _limit(self, dev: int, path: Path) -> int:
+        return self.slots.get(detect_storage_type(str(path), dev), 1)
+
+    def _startable(self, job: TransferJob) -> bool:
+        return all(self.busy.get(dev, 0) < self._limit(dev, path) for dev, path in job.devices.items())
+
+    def _next_job(self) -> Optional[TransferJob]:
+        """Wait for the oldest queued job that has free device slots"""
+        with self.changed:
+            while True:
+                if self.closed:
+                    return None
+                for job in self.jobs:
+                    if job.state == QUEUED and self._startable(job):
+                        job.state = RUNNING
+                        job.started = time.monotonic()
+                        for dev in job.devices:
+                            self.busy[dev] = self.busy.get(dev, 0) + 1
+                        return job
+                self.changed.wait()
+
+    def _worker(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            try:
+                self._run(job)
+            finally:
+                with self.changed:
+                    for dev in job.devices:
+                        self.busy[dev] -= 1
+                    if job in self.jobs:
+                        self.jobs.remove(job)
+                    self.changed.notify_all()
+            self._report(job)
+
+    def _report(self, job: TransferJob):
+        try:
+            self.callback(job)
+        except Exception as e:
+            print(f"Error reporting transfer progress: {e}")
+
+    # ==================== JOBS ====================
+
+    def _run(self, job: TransferJob):
+        job.rate_mark = (job.started, 0)
+        self._report(job)
+        try:
+            # One undo step for the whole job
+            with self.file_manager.history.batch():
+                if job.operation == DELETE:
+                    self._delete(job)
+                else:
+                    self._transfer(job)
+            job.state = FAILED if job.errors and len(job.errors) == job.total_items else DONE
+        except TransferCancelled:
+            job.state = CANCELLED
+        job.finished = time.monotonic()
+        self._end_journal(job)
+
+    def _end_journal(self, job: TransferJob):
+        """Drop the journal of a finished job; keep it if the queue is shutting down"""
+        if job.journal is None:
+            return
+        if self.closed and job.state == CANCELLED:
+            job.journal.close()
+        else:
+            job.journal.discard()
+
+    def _transfer(self, job: TransferJob):
+        journal = job.journal
+        sizes = {source: self._tree_size(source) for source in job.sources
+                 if not journal.is_item_done(source)}
+        job.total_bytes = sum(sizes.values())
+        for source in job.sources:
+            job.checkpoint()
+            job.current = source.name
+            if journal.is_item_done(source):
+                job.done_items += 1
+                continue
+            try:
+                target = job.destination / source.name
+                replaced = os.path.lexists(target)
+                if job.operation == MOVE:
+                    self._move(job, source, target, sizes[source])
+                else:
+                    self._copy(job, source, target)
+                journal.item_done(source)
+                self.file_manager.record_transfer(job.operation, source, target, replaced)
+            except TransferCancelled:
+                raise
+            except Exception as e:
+                print(f"Error during {job.operation} of {source}: {e}")
+                job.errors.append((str(source), str(e)))
+            job.done_items += 1
+            self._progress(job, 0, force=True)
+
+    def _progress(self, job: TransferJob, count: int, force: bool = False):
+        """Add copied bytes, update the rate and report at most every interval"""
+        job.done_bytes += count
+        now = time.monotonic()
+        mark_time, mark_bytes = job.rate_mark
+        if now - mark_time >= self.interval:
+            current = (job.done_bytes - mark_bytes) / (now - mark_time)
+            job.rate = current if job.rate == 0 else 0.3 * current + 0.7 * job.rate
+            job.rate_mark = (now, job.done_bytes)
+        if force or now - job.last_report >= self.interval:
+            job.last_report = now
+            self._report(job)
+
+    def _tree_size(self, path: Path) -> int:
+        """Bytes of regular files under path, without following links"""
+        try:
+            st = os.lstat(path)
+        except OSError:
+            return 0
+        if not stat.S_ISDIR(st.st_mode):
+            return st.st_size if stat.S_ISREG(st.st_mode) else 0
+        total = 0
+        for root, dirs, files in os.walk(path):
+            for name in files:
+                try:
+                    st = os.lstat(os.path.join(root, name))
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    total += st.st_size
+        return total
+
+    def _copy(self, job: TransferJob, source: Path, target: Path):
+        """Copy a file, link or tree, merging into existing folders"""
+        errors = self.file_manager.copy_engine.copy(
+            source, target, lambda count: self._progress(job, count), job.checkpoint, job.journal,
+            job.verify)
+        if errors:
+            path, error = errors[0]
+            raise OSError(f"{len(errors)} item(s) failed, first {path}: {error}")
+
+    def _move(self, job: TransferJob, source: Path, target: Path, size: int):
+        """Rename when possible, otherwise copy and remove the source
+
+        ``size`` is the source's bytes as counted for the job total; a
+        rename reports it at once rather than walking the tree again.
+        """
+        try:
+            os.rename(source, target)
+            self._progress(job, size)
+            return
+        except OSError as e:
+            if e.errno not in RENAME_FALLBACK_ERRORS:
+                raise
+        self._copy(job, source, target)
+        if source.is_dir() and not source.is_symlink():
+            shutil.rmtree(source)
+        else:
+            source.unlink()
+
+    def _delete(self, job: TransferJob):
+        """Trash or delete in batches; progress counts items, not bytes"""
+        for start in range(0, job.total_items, DELETE_BATCH):
+            job.checkpoint()
+            batch = job.sources[start:start + DELETE_BATCH]
+            job.current = batch[0].name
+            job.errors.extend(self.file_manager.delete_many(batch, use_trash=job.use_trash))
+            job.done_items += len(batch)
+            self._progress(job, 0, force=True)
@@ -0,0 +1,635 @@
+"""
+gui/file_list_model.py
+Virtualised item model for the file browser
+"""
+
+from PyQt6.QtCore import (Qt, QAbstractItemModel, QAbstractProxyModel, QModelIndex, QPersistentModelIndex,
+                          QMimeData, QUrl, QSize, pyqtSignal)
+from PyQt6.QtGui import QPixmap, QPixmapCache
+import numpy as np
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from pathlib import Path
+
+from core.directory_listing import DirectoryListing, SORT_NAME
+from core.thumbnail_cache import IMAGE_EXTENSIONS
+
+FILE_ICONS = {
+    '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️', '.bmp': '🖼️', '.webp': '🖼️',
+    '.mp4': '🎬', '.avi': '🎬', '.mov': '🎬', '.mkv': '🎬',
+    '.mp3': '🎵', '.wav': '🎵', '.flac': '🎵', '.m4a': '🎵',
+    '.py': '💻', '.js': '💻', '.java': '💻', '.cpp': '💻', '.c': '💻',
+    '.html': '💻', '.css': '💻', '.ts': '💻', '.jsx': '💻', '.tsx': '💻',
+    '.pdf': '📕',
+    '.zip': '📦', '.rar': '📦', '.7z': '📦', '.tar': '📦', '.gz': '📦',
+    '.txt': '📄', '.doc': '📄', '.docx': '📄', '.md': '📄',
+    '.xls': '📊', '.xlsx': '📊', '.csv': '📊',
+}
+
+
+def file_icon(suffix: str, is_dir: bool) -> str:
+    """Emoji icon for a file type"""
+    if is_dir:
+        return "📁"
+    return FILE_ICONS.get(suffix.lower(), '📄')
+
+
+def format_size(size):
+    """Format file size"""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size < 1024.0:
+            return f"{size:.1f} {unit}"
+        size /= 1024.0
+    return f"{size:.1f} PB"
+
+
+class FileListModel(QAbstractItemModel):
+    """Flat model over a DirectoryListing
+
+    Rows are exposed to the view in pages through canFetchMore/fetchMore,
+    and cell text is only formatted when the view asks for it in data(), so
+    opening a huge folder costs the same as opening a small one until the
+    user scrolls.
+
+    With thumbnails enabled, image rows ask the thumbnail cache for a
+    preview the first time they are painted and show it once it arrives;
+    scaled pixmaps are kept in QPixmapCache so scrolling back is free.
+    """
+
+    COLUMNS = ["Name", "Size", "Type", "Modified", "Tags"]
+    PAGE_SIZE = 1000
+    # Built once: views query flags() for every cell they select
+    ITEM_FLAGS = (Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable |
+                  Qt.ItemFlag.ItemIsDragEnabled)
+
+    # Emitted from thumbnail worker threads, delivered on the GUI thread
+    thumbnail_ready = pyqtSignal(str, object)
+
+    def __init__(self, tags_provider=None, thumbnails=None, parent=None):
+        super().__init__(parent)
+        self.listing = DirectoryListing(Path.home())
+        self.loaded = 0
+        self.tags_provider = tags_provider
+        self.expose_all = False  # Skip paging when a proxy pages the rows instead
+        self.sort_column = SORT_NAME
+        self.sort_descending = False
+
+        self.thumbnails = thumbnails
+        self.show_thumbnails = False
+        self.icon_size = QSize(128, 128)
+        self.requested = set()  # Paths with a thumbnail queued or unavailable
+        self._rows = None  # name -> row, built on demand
+        self.thumbnail_ready.connect(self._thumbnail_ready)
+
+    # ==================== LISTING ====================
+
+    def set_listing(self, listing: DirectoryListing):
+        """Replace the model contents with a new listing"""
+        self.beginResetModel()
+        if self.thumbnails:
+            self.thumbnails.cancel_pending()
+        self.requested.clear()
+        self.listing = listing
+        self._rows = None
+        if len(listing) and listing.order != (self.sort_column, self.sort_descending):
+            self.listing.sort(self.sort_column, self.sort_descending)
+        self.loaded = len(listing) if self.expose_all else min(len(listing), self.PAGE_SIZE)
+        self.endResetModel()
+
+    def begin_listing(self, path: Path):
+        """Clear the model before streaming a new directory into it"""
+        self.set_listing(DirectoryListing(path))
+
+    def append_batch(self, batch: DirectoryListing):
+        """Append streamed entries, exposing them if the first page is not full"""
+        self.listing.extend(batch)
+        self._rows = None
+        target = len(self.listing) if self.expose_all else min(len(self.listing), self.PAGE_SIZE)
+        if target > self.loaded:
+            self.beginInsertRows(QModelIndex(), self.loaded, target - 1)
+            self.loaded = target
+            self.endInsertRows()
+
+    def finish_listing(self):
+        """Put the fully streamed listing into the current sort order"""
+        self.sort(self.sort_column,
+                  Qt.SortOrder.DescendingOrder if self.sort_descending else Qt.SortOrder.AscendingOrder)
+
+    def apply_changes(self, updated: DirectoryListing, removed):
+        """Apply entries created, changed or deleted on disk since listing
+        
+        Rows are inserted, removed or updated one by one at their sorted
+        positions, so selections and the scroll position survive.
+        """
+        column, descending = self.sort_column, self.sort_descending
+
+        rows = [self.row_of(name) for name in removed]
+        for row in sorted((row for row in rows if row is not None), reverse=True):
+            self._remove_row(row)
+
+        # Update known rows in place; collect new and out-of-order entries
+        placed = []
+        misplaced = []
+        for i, name in enumerate(updated.names):
+            values = (updated.size[i], updated.mtime[i], updated.flags[i])
+            row = self.row_of(name)
+            if row is not None:
+                self.requested.discard(str(self.listing.path_of(row)))
+                self.listing.set_row(row, *values)
+                if self.listing.in_order(row, column, descending):
+                    if row < self.loaded:
+                        self.dataChanged.emit(self.index(row, 0),
+                                              self.index(row, len(self.COLUMNS) - 1))
+                    continue
+                misplaced.append(row)
+            placed.append((name, values))
+
+        for row in sorted(misplaced, reverse=True):
+            self._remove_row(row)
+        for name, values in placed:
+            self._insert_row(self.listing.insertion_row(name, *values, column, descending),
+                             name, *values)
+
+    def _remove_row(self, row: int):
+        visible = row < self.loaded
+        if visible:
+            self.beginRemoveRows(QModelIndex(), row, row)
+        self.listing.remove(row)
+        self._rows = None
+        if visible:
+            self.loaded -= 1
+            self.endRemoveRows()
+
+    def _insert_row(self, row: int, name: str, size: int, mtime: float, flags: int):
+        # Rows past the fetched range become visible through fetchMore
+        visible = row < self.loaded or self.loaded == len(self.listing)
+        if visible:
+            self.beginInsertRows(QModelIndex(), row, row)
+        self.listing.insert(row, name, size, mtime, flags)
+        self._rows = None
+        if visible:
+            self.loaded += 1
+            self.endInsertRows()
+
+    def tags_changed(self):
+        """Repaint the tags column after tags were edited"""
+        if self.loaded:
+            self.dataChanged.emit(self.index(0, 4), self.index(self.loaded - 1, 4))
+
+    def path(self, row: int) -> Path:
+        return self.listing.path_of(row)
+
+    def row_of(self, name: str):
+        """Row of an entry by name"""
+        if self._rows is None:
+            self._rows = {name: row for row, name in enumerate(self.listing.names)}
+        return self._rows.get(name)
+
+    # ==================== THUMBNAILS ====================
+
+    def set_thumbnails_enabled(self, enabled: bool):
+        """Show image thumbnails as item decorations"""
+        if enabled == self.show_thumbnails:
+            return
+        self.show_thumbnails = enabled
+        if not enabled and self.thumbnails:
+            self.thumbnails.cancel_pending()
+            self.requested.clear()
+        if self.loaded:
+            self.dataChanged.emit(self.index(0, 0), self.index(self.loaded - 1, 0),
+                                  [Qt.ItemDataRole.DecorationRole])
+
+    def _thumbnail_key(self, row: int) -> str:
+        return f"{self.listing.path_of(row)}:{self.listing.mtime[row]}"
+
+    def _thumbnail(self, row: int):
+        """Cached thumbnail of a row, queueing it if not generated yet"""
+        if self.listing.suffix(row) not in IMAGE_EXTENSIONS:
+            return None
+        pixmap = QPixmapCache.find(self._thumbnail_key(row))
+        if pixmap is not None and not pixmap.isNull():
+            return pixmap
+        path = str(self.listing.path_of(row))
+        if path not in self.requested:
+            self.requested.add(path)
+            self.thumbnails.request(path, self.thumbnail_ready.emit)
+        return None
+
+    def _thumbnail_ready(self, path: str, data):
+        """Store a generated thumbnail and repaint its row"""
+        if data is None:
+            return  # Left in self.requested so it is not retried
+        self.requested.discard(path)
+        item_path = Path(path)
+        if item_path.parent != self.listing.path:
+            return
+        row = self.row_of(item_path.name)
+        if row is None:
+            return
+
+        pixmap = QPixmap()
+        if not pixmap.loadFromData(data):
+            return
+        pixmap = pixmap.scaled(self.icon_size, Qt.AspectRatioMode.KeepAspectRatio,
+                               Qt.TransformationMode.SmoothTransformation)
+        QPixmapCache.insert(self._thumbnail_key(row), pixmap)
+        if row < self.loaded:
+            index = self.index(row, 0)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DecorationRole])
+
+    def fetch_all(self):
+        """Expose every row to the view at once"""
+        while self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    # ==================== QAbstractItemModel ====================
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row >= self.loaded or column < 0 or column >= len(self.COLUMNS):
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        return not parent.isValid()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < len(self.listing)
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, len(self.listing) - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return self.ITEM_FLAGS
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+
+        row = index.row()
+        column = index.column()
+        listing = self.listing
+
+        if role == Qt.ItemDataRole.DisplayRole:
+            is_dir = listing.is_dir(row)
+            if column == 0:
+                return f"{file_icon(listing.suffix(row), is_dir)} {listing.names[row]}"
+            if column == 1:
+                return "" if is_dir else format_size(listing.size[row])
+            if column == 2:
+                if is_dir:
+                    return "Folder"
+                suffix = Path(listing.names[row]).suffix
+                return suffix[1:].upper() if suffix else "File"
+            if column == 3:
+                return datetime.fromtimestamp(listing.mtime[row]).strftime("%Y-%m-%d %H:%M")
+            if column == 4 and self.tags_provider:
+                tags = self.tags_provider(str(listing.path_of(row)))
+                return ", ".join(tags) if tags else ""
+        elif role == Qt.ItemDataRole.DecorationRole:
+            if column == 0 and self.show_thumbnails and self.thumbnails:
+                return self._thumbnail(row)
+        elif role == Qt.ItemDataRole.UserRole:
+            return str(listing.path_of(row))
+        return None
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        """Sort the listing in place, keeping selections on the same entries"""
+        if column >= 4:
+            return
+        self.sort_column = column
+        self.sort_descending = order == Qt.SortOrder.DescendingOrder
+
+        self.layoutAboutToBeChanged.emit()
+        permutation = self.listing.sort(self.sort_column, self.sort_descending)
+        self._rows = None
+
+        # permutation[new_row] = old_row; invert it for persistent indexes
+        new_row_of = [0] * len(permutation)
+        for new_row, old_row in enumerate(permutation):
+            new_row_of[old_row] = new_row
+
+        old_indexes = self.persistentIndexList()
+        new_indexes = []
+        for index in old_indexes:
+            new_row = new_row_of[index.row()]
+            if new_row < self.loaded:
+                new_indexes.append(self.createIndex(new_row, index.column()))
+            else:
+                new_indexes.append(QModelIndex())
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def supportedDragActions(self):
+        return Qt.DropAction.CopyAction | Qt.DropAction.MoveAction
+
+    def mimeTypes(self):
+        return ['text/uri-list']
+
+    def mimeData(self, indexes):
+        """Dragged rows as file URLs"""
+        rows = sorted({index.row() for index in indexes})
+        mime = QMimeData()
+        mime.setUrls([QUrl.fromLocalFile(str(self.listing.path_of(row))) for row in rows])
+        return mime
+
+
+class FileFilterProxyModel(QAbstractProxyModel):
+    """Name filter and paging over a FileListModel
+
+    Matching source rows are kept as an ascending array. Extending the query
+    only re-tests the previous matches, and clearing it drops the array, so
+    neither touches the disk. Rows the source inserts or removes are folded
+    in where they land: the rows after them are shifted in one numpy pass
+    and only the new names are lower-cased and tested. Sorting is delegated to the source model,
+    which sorts its columns with numpy rather than through per-row
+    lessThan() callbacks.
+
+    The source exposes every row and this proxy hands them to the view in
+    pages, filtered or not: views lay out each row they are shown, so a
+    100k-row result would otherwise cost seconds per keystroke.
+    """
+
+    PAGE_SIZE = FileListModel.PAGE_SIZE
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.query = ''
+        self.rows = None  # array('q') of matching source rows in source order; None when unfiltered
+        self.loaded = 0  # Leading proxy rows exposed to views
+        self._folded = None  # Lower-cased source names, built on demand
+        self._changing = 0  # Rows being exposed or hidden by a source insert/remove
+        self._removal = None
+        self._saved_indexes = None
+
+    def setSourceModel(self, model: FileListModel):
+        super().setSourceModel(model)
+        model.expose_all = True
+        model.fetch_all()
+        self.loaded = min(model.rowCount(), self.PAGE_SIZE)
+        model.modelAboutToBeReset.connect(self.beginResetModel)
+        model.modelReset.connect(self._source_reset)
+        model.rowsAboutToBeInserted.connect(self._source_rows_about_to_be_inserted)
+        model.rowsInserted.connect(self._source_rows_inserted)
+        model.rowsAboutToBeRemoved.connect(self._source_rows_about_to_be_removed)
+        model.rowsRemoved.connect(self._source_rows_removed)
+        model.layoutAboutToBeChanged.connect(self._source_layout_about_to_change)
+        model.layoutChanged.connect(self._source_layout_changed)
+        model.dataChanged.connect(self._source_data_changed)
+
+    # ==================== FILTER ====================
+
+    def set_filter(self, text: str):
+        """Show only entries whose name contains text (case-insensitive)"""
+        query = text.lower()
+        if query == self.query:
+            return
+
+        self.beginResetModel()
+        # A longer query can only match a subset of the current matches
+        narrowing = self.rows is not None and query.startswith(self.query)
+        self.query = query
+        if not query:
+            self.rows = None
+        elif narrowing:
+            folded = self._folded_names()
+            self.rows = array('q', [row for row in self.rows if query in folded[row]])
+        else:
+            self._filter_all()
+        self.loaded = min(self._total(), self.PAGE_SIZE)
+        self.endResetModel()
+
+    def _folded_names(self):
+        if self._folded is None:
+            self._folded = [name.lower() for name in self.sourceModel().listing.names]
+        return self._folded
+
+    def _filter_all(self):
+        query = self.query
+        self.rows = array('q', [row for row, name in enumerate(self._folded_names()) if query in name])
+
+    def _matches(self, first: int, last: int):
+        folded = self._folded_names()
+        return [row for row in range(first, last + 1) if self.query in folded[row]]
+
+    def _total(self) -> int:
+        """Number of rows that pass the filter, exposed or not"""
+        return self.sourceModel().rowCount() if self.rows is None else len(self.rows)
+
+    # ==================== MAPPING ====================
+
+    def source_row(self, row: int) -> int:
+        return row if self.rows is None else self.rows[row]
+
+    def path(self, row: int) -> Path:
+        return self.sourceModel().path(self.source_row(row))
+
+    def is_dir(self, row: int) -> bool:
+        return self.sourceModel().listing.is_dir(self.source_row(row))
+
+    def total_file_size(self, start: int, stop: int) -> int:
+        """Total file size of a range of proxy rows"""
+        listing = self.sourceModel().listing
+        if self.rows is None:
+            return listing.total_file_size(start, stop)
+        rows = self.rows[start:stop]
+        if not rows:
+            return 0
+        return int(np.frombuffer(listing.size, dtype=np.int64)[np.frombuffer(rows, dtype=np.int64)].sum())
+
+    def mapToSource(self, index):
+        source = self.sourceModel()
+        if not index.isValid() or source is None:
+            return QModelIndex()
+        return source.index(self.source_row(index.row()), index.column())
+
+    def mapFromSource(self, index):
+        if not index.isValid():
+            return QModelIndex()
+        if self.rows is None:
+            return self.index(index.row(), index.column())
+        proxy_row = bisect_left(self.rows, index.row())
+        if proxy_row == len(self.rows) or self.rows[proxy_row] != index.row():
+            return QModelIndex()
+        return self.index(proxy_row, index.column())
+
+    def index(self, row, column, parent=QModelIndex()):
+        if parent.isValid() or row < 0 or row >= self.loaded or column < 0 or column >= self.columnCount():
+            return QModelIndex()
+        return self.createIndex(row, column)
+
+    def parent(self, index=QModelIndex()):
+        return QModelIndex()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self.loaded
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(FileListModel.COLUMNS)
+
+    def hasChildren(self, parent=QModelIndex()):
+        return not parent.isValid()
+
+    def canFetchMore(self, parent):
+        return not parent.isValid() and self.loaded < self._total()
+
+    def fetchMore(self, parent):
+        if parent.isValid():
+            return
+        count = min(self.PAGE_SIZE, self._total() - self.loaded)
+        if count <= 0:
+            return
+        self.beginInsertRows(QModelIndex(), self.loaded, self.loaded + count - 1)
+        self.loaded += count
+        self.endInsertRows()
+
+    def fetch_all(self):
+        """Expose every row to the view at once"""
+        while self.canFetchMore(QModelIndex()):
+            self.fetchMore(QModelIndex())
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        self.sourceModel().sort(column, order)
+
+    # ==================== SOURCE CHANGES ====================
+
+    def _begin_insert(self, position: int, count: int):
+        """Insert proxy rows, exposing them if they land in the loaded range
+
+        Rows appended right after the loaded range only fill up the first
+        page, the way a streamed listing does.
+        """
+        if position < self.loaded:
+            exposed = count
+        elif position == self.loaded:
+            exposed = max(0, min(count, self.PAGE_SIZE - self.loaded))
+        else:
+            exposed = 0
+        self._changing = exposed
+        if exposed:
+            self.beginInsertRows(QModelIndex(), position, position + exposed - 1)
+
+    def _end_insert(self):
+        if self._changing:
+            self.loaded += self._changing
+            self._changing = 0
+            self.endInsertRows()
+
+    def _begin_remove(self, position: int, count: int):
+        """Remove proxy rows, hiding those in the loaded range"""
+        hidden = max(0, min(position + count, self.loaded) - position)
+        self._changing = hidden
+        if hidden:
+            self.beginRemoveRows(QModelIndex(), position, position + hidden - 1)
+
+    def _end_remove(self):
+        if self._changing:
+            self.loaded -= self._changing
+            self._changing = 0
+            self.endRemoveRows()
+
+    def _source_reset(self):
+        self._folded = None
+        if self.rows is not None:
+            self._filter_all()
+        self.loaded = min(self._total(), self.PAGE_SIZE)
+        self.endResetModel()
+
+    def _source_rows_about_to_be_inserted(self, parent, first, last):
+        if self.rows is None:
+            self._begin_insert(first, last - first + 1)
+
+    def _source_rows_inserted(self, parent, first, last):
+        if self._folded is not None:
+            names = self.sourceModel().listing.names[first:last + 1]
+            self._folded[first:first] = [name.lower() for name in names]
+        if self.rows is None:
+            self._end_insert()
+            return
+        position = bisect_left(self.rows, first)
+        self._shift(position, last - first + 1)
+        new_rows = self._matches(first, last)
+        if new_rows:
+            self._begin_insert(position, len(new_rows))
+            self.rows[position:position] = array('q', new_rows)
+            self._end_insert()
+
+    def _source_rows_about_to_be_removed(self, parent, first, last):
+        if self.rows is None:
+            self._begin_remove(first, last - first + 1)
+            return
+        lo = bisect_left(self.rows, first)
+        hi = bisect_right(self.rows, last)
+        self._removal = (lo, hi)
+        self._begin_remove(lo, hi - lo)
+
+    def _source_rows_removed(self, parent, first, last):
+        if self._folded is not None:
+            del self._folded[first:last + 1]
+        if self.rows is not None:
+            lo, hi = self._removal
+            self._removal = None
+            del self.rows[lo:hi]
+            self._shift(lo, -(last - first + 1))
+        self._end_remove()
+
+    def _shift(self, position: int, count: int):
+        """Move the source rows from position on by count"""
+        if position < len(self.rows):
+            view = np.frombuffer(self.rows, dtype=np.int64)
+            view[position:] += count
+            del view  # An exported buffer would stop the array from resizing
+
+    def _source_layout_about_to_change(self):
+        self.layoutAboutToBeChanged.emit()
+        # Follow our persistent indexes through the source's own remapping
+        indexes = self.persistentIndexList()
+        self._saved_indexes = (indexes, [QPersistentModelIndex(self.mapToSource(index))
+                                         for index in indexes])
+
+    def _source_layout_changed(self):
+        self._folded = None
+        if self.rows is not None:
+            self._filter_all()
+        old_indexes, source_indexes = self._saved_indexes
+        self._saved_indexes = None
+        new_indexes = [self.mapFromSource(self.sourceModel().index(index.row(), index.column()))
+                       if index.isValid() else QModelIndex()
+                       for index in source_indexes]
+        self.changePersistentIndexList(old_indexes, new_indexes)
+        self.layoutChanged.emit()
+
+    def _source_data_changed(self, top_left, bottom_right, roles=()):
+        if self.rows is None:
+            first, last = top_left.row(), bottom_right.row()
+        else:
+            first = bisect_left(self.rows, top_left.row())
+            last = bisect_right(self.rows, bottom_right.row()) - 1
+        last = min(last, self.loaded - 1)
+        if last < first:
+            return
+        self.dataChanged.emit(self.index(first, top_left.column()),
+                              self.index(last, bottom_right.column()), roles)
@@ -10,10 +10,13 @@ from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QFileDialog, QMenu, QLineEdit, QComboBox, QTabWidget,
                              QTextEdit, QCheckBox, QSlider, QScrollArea, QGridLayout,
                              QButtonGroup, QRadioButton, QFrame, QSizePolicy, QProgressBar,
-                             QDialog, QListWidgetItem, QSpinBox, QGroupBox, QToolBar, QStatusBar)
-from PyQt6.QtCore import Qt, QSize, QTimer, QThread, pyqtSignal, QMimeData, QUrl, QEvent
-from PyQt6.QtGui import QAction, QIcon, QPixmap, QImage, QDrag, QColor, QPalette, QKeySequence, QResizeEvent
+                             QDialog, QListWidgetItem, QSpinBox, QGroupBox, QToolBar, QStatusBar,
+                             QTreeView, QAbstractItemView, QListView, QStackedWidget)
+from PyQt6.QtCore import Qt, QSize, QTimer, QThread, pyqtSignal, QMimeData, QUrl, QEvent, QModelIndex
+from PyQt6.QtGui import (QAction, QIcon, QPixmap, QImage, QDrag, QColor, QPalette, QKeySequence, QResizeEvent,
+                         QPixmapCache)
 from pathlib import Path
+import os
 import json
 import re
 from datetime import datetime, timedelta
@@ -21,6 +24,17 @@ from datetime import datetime, timedelta
 from core.advanced_file_manager import AdvancedFileManager
 from core.project_manager import ProjectManager
 from core.template_manager import TemplateManager
+from core.storage_report import StorageReport
+from core.staleness_report import StalenessReport, MODIFIED, ACCESSED
+from core.directory_listing import DirectoryListing
+from core.thumbnail_cache import ThumbnailCache
+from core.directory_watcher import DirectoryWatcher
+from core.listing_cache import ListingCache
+from core.transfer_queue import TransferQueue, COPY, MOVE, DELETE, PAUSED, CANCELLED
+from core.rename_planner import RenamePlan
+from core.organizer import Organizer, OrganizeReport, OrganizeRule, rules_for_template
+from gui.file_list_model import FileListModel, FileFilterProxyModel, file_icon, format_size
+from gui.rename_preview_model import RenamePreviewModel
 
 # ==================== WORKER THREADS ====================
 
@@ -61,9 +75,350 @@ class DuplicateFinderWorker(QThread):
         duplicates = self.file_manager.find_duplicates(self.directory)
         self.finished.emit(duplicates)
 
+class ScanWorker(QThread):
+    """Background directory scanner for storage reports"""
+    finished = pyqtSignal(object)
+    
+    def __init__(self, file_manager, directory):
+        super().__init__()
+        self.file_manager = file_manager
+        self.directory = directory
+    
+    def run(self):
+        scan = self.file_manager.scan_directory(self.directory)
+        self.finished.emit(scan)
+
+class ListingWorker(QThread):
+    """Background directory listing streamed to the view in batches"""
+    batch_ready = pyqtSignal(int, object)
+    completed = pyqtSignal(int)
+    failed = pyqtSignal(int, str, str)
+    
+    MISSING = 'missing'
+    DENIED = 'denied'
+    ERROR = 'error'
+    
+    def __init__(self, generation, directory, show_hidden):
+        super().__init__()
+        self.generation = generation
+        self.directory = directory
+        self.show_hidden = show_hidden
+        self.cancelled = False
+        self.mtime_ns = None  # Directory mtime from before the listing started
+    
+    def cancel(self):
+        """Stop listing at the next entry; pending batches are ignored"""
+        self.cancelled = True
+    
+    def run(self):
+        try:
+            self.mtime_ns = os.stat(self.directory).st_mtime_ns
+            for batch in DirectoryListing.iter_batches(self.directory, self.show_hidden,
+                                                       is_cancelled=lambda: self.cancelled):
+                self.batch_ready.emit(self.generation, batch)
+        except (FileNotFoundError, NotADirectoryError) as e:
+            self.failed.emit(self.generation, self.MISSING, str(e))
+        except PermissionError as e:
+            self.failed.emit(self.generation, self.DENIED, str(e))
+        except OSError as e:
+            self.failed.emit(self.generation, self.ERROR, str(e))
+        else:
+            if not self.cancelled:
+                self.completed.emit(self.generation)
+
+class HashWorker(QThread):
+    """Background hash of the file shown in the preview pane"""
+    hashed = pyqtSignal(int, str)
+    
+    def __init__(self, file_manager, generation, path):
+        super().__init__()
+        self.file_manager = file_manager
+        self.generation = generation
+        self.path = path
+        self.cancelled = False
+    
+    def cancel(self):
+        """Stop hashing at the next chunk"""
+        self.cancelled = True
+    
+    def run(self):
+        file_hash = self.file_manager.calculate_hash(self.path, is_cancelled=lambda: self.cancelled)
+        if not self.cancelled:
+            self.hashed.emit(self.generation, file_hash)
+
+class SnapshotWorker(QThread):
+    """Background scan-and-save of a disk usage snapshot"""
+    finished = pyqtSignal(object)
+    
+    def __init__(self, file_manager, directory):
+        super().__init__()
+        self.file_manager = file_manager
+        self.directory = directory
+    
+    def run(self):
+        self.finished.emit(self.file_manager.take_snapshot(self.directory))
+
+class OrganizeWorker(QThread):
+    """Background dry run or run of the organizer"""
+    progress = pyqtSignal(int)
+    finished = pyqtSignal(object)
+    
+    def __init__(self, organizer, root, destination, recursive, dry_run):
+        super().__init__()
+        self.organizer = organizer
+        self.root = root
+        self.destination = destination
+        self.recursive = recursive
+        self.dry_run = dry_run
+        self.cancelled = False
+    
+    def run(self):
+        try:
+            if self.dry_run:
+                report = self.organizer.dry_run(self.root, self.destination, self.recursive)
+            else:
+                report = self.organizer.run(self.root, self.destination, self.recursive,
+                                            progress=lambda report: self.progress.emit(report.moved),
+                                            is_cancelled=lambda: self.cancelled)
+        except Exception as e:
+            print(f"Error organizing: {e}")
+            report = OrganizeReport(self.dry_run)
+            report.errors.append((str(self.root), str(e)))
+        self.finished.emit(report)
+
+class RenameWorker(QThread):
+    """Background apply of a checked rename plan"""
+    finished = pyqtSignal(object, object)
+    
+    def __init__(self, file_manager, plan):
+        super().__init__()
+        self.file_manager = file_manager
+        self.plan = plan
+    
+    def run(self):
+        done, errors = self.file_manager.apply_rename_plan(self.plan)
+        self.finished.emit(done, errors)
+
+# ==================== FILE PANES ====================
+
+class FileTreeView(QTreeView):
+    """File list view that accepts dropped files and reports focus"""
+    files_dropped = pyqtSignal(object, object, str)  # paths, index under cursor, 'copy' or 'move'
+    focused = pyqtSignal()
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setRootIsDecorated(False)
+        self.setUniformRowHeights(True)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.setSortingEnabled(True)
+        self.setDragEnabled(True)
+        self.setAcceptDrops(True)
+        self.setDragDropMode(QAbstractItemView.DragDropMode.DragDrop)
+        self.setDefaultDropAction(Qt.DropAction.CopyAction)
+    
+    def focusInEvent(self, event):
+        super().focusInEvent(event)
+        self.focused.emit()
+    
+    def dragEnterEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            super().dragEnterEvent(event)
+    
+    def dragMoveEvent(self, event):
+        if event.mimeData().hasUrls():
+            event.acceptProposedAction()
+        else:
+            super().dragMoveEvent(event)
+    
+    def dropEvent(self, event):
+        paths = [Path(url.toLocalFile()) for url in event.mimeData().urls() if url.isLocalFile()]
+        if not paths:
+            return
+        operation = 'move' if event.dropAction() == Qt.DropAction.MoveAction else 'copy'
+        # The transfer is done by us; don't let the source view remove rows
+        event.setDropAction(Qt.DropAction.CopyAction)
+        event.accept()
+        self.files_dropped.emit(paths, self.indexAt(event.position().toPoint()), operation)
+
+class FilePane(QWidget):
+    """Second file browser for split view
+    
+    Has its own model, listing worker and directory watcher, and shares the
+    listing cache with the main pane, so a folder listed in one pane opens
+    instantly in the other.
+    """
+    files_dropped = pyqtSignal(object, object, str)  # paths, destination folder, operation
+    focused = pyqtSignal()
+    directory_changed = pyqtSignal(str, object, object)
+    
+    def __init__(self, file_manager, listing_cache, show_hidden, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.listing_cache = listing_cache
+        self.show_hidden = show_hidden
+        self.current_path = None
+        self.listing_worker = None
+        self.listing_workers = []
+        self.listing_generation = 0
+        self.pending_changes = None
+        
+        layout = QVBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.setLayout(layout)
+        
+        nav_bar = QHBoxLayout()
+        up_btn = QPushButton("⬆️")
+        up_btn.setToolTip("Up")
+        up_btn.setFixedSize(36, 36)
+        up_btn.clicked.connect(self.navigate_up)
+        nav_bar.addWidget(up_btn)
+        
+        self.path_edit = QLineEdit()
+        self.path_edit.returnPressed.connect(lambda: self.navigate(self.path_edit.text()))
+        self.path_edit.setStyleSheet("QLineEdit { padding: 8px; border-radius: 8px; font-family: 'Consolas', monospace; }")
+        nav_bar.addWidget(self.path_edit)
+        
+        refresh_btn = QPushButton("🔄")
+        refresh_btn.setToolTip("Refresh")
+        refresh_btn.setFixedSize(36, 36)
+        refresh_btn.clicked.connect(lambda: self.refresh())
+        nav_bar.addWidget(refresh_btn)
+        layout.addLayout(nav_bar)
+        
+        self.model = FileListModel(tags_provider=file_manager.get_tags)
+        self.proxy = FileFilterProxyModel(self)
+        self.proxy.setSourceModel(self.model)
+        self.view = FileTreeView()
+        self.view.setModel(self.proxy)
+        self.view.setColumnWidth(0, 300)
+        self.view.setColumnWidth(1, 90)
+        self.view.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.view.doubleClicked.connect(self.item_double_clicked)
+        self.view.focused.connect(self.focused)
+        self.view.files_dropped.connect(self.drop_files)
+        layout.addWidget(self.view)
+        
+        self.status_label = QLabel("")
+        layout.addWidget(self.status_label)
+        
+        self.watcher = DirectoryWatcher(self.directory_changed.emit)
+        self.directory_changed.connect(self.apply_directory_changes)
+    
+    def navigate(self, path_str):
+        """Open a folder in this pane"""
+        self.current_path = Path(path_str)
+        self.path_edit.setText(str(self.current_path))
+        self.refresh(use_cache=True)
+    
+    def navigate_up(self):
+        if self.current_path is not None and self.current_path.parent != self.current_path:
+            self.navigate(str(self.current_path.parent))
+    
+    def refresh(self, use_cache=False):
+        """List the current folder in the background, or take it from the cache"""
+        if self.current_path is None:
+            return
+        if self.listing_worker is not None:
+            self.listing_worker.cancel()
+            self.listing_worker = None
+        self.listing_generation += 1
+        show_hidden = self.show_hidden()
+        self.watcher.watch(self.current_path, show_hidden)
+        
+        cached = self.listing_cache.get(self.current_path, show_hidden) if use_cache else None
+        if cached is not None:
+            self.model.set_listing(cached)
+            self.pending_changes = None
+            self.update_status()
+            return
+        
+        self.model.begin_listing(self.current_path)
+        self.pending_changes = []
+        self.status_label.setText("⏳ Loading...")
+        worker = ListingWorker(self.listing_generation, self.current_path, show_hidden)
+        worker.batch_ready.connect(self.listing_batch_ready)
+        worker.completed.connect(self.listing_completed)
+        worker.failed.connect(self.listing_failed)
+        worker.finished.connect(lambda w=worker: self.listing_workers.remove(w))
+        self.listing_workers.append(worker)
+        self.listing_worker = worker
+        worker.start()
+    
+    def listing_batch_ready(self, generation, batch):
+        if generation == self.listing_generation:
+            self.model.append_batch(batch)
+    
+    def listing_completed(self, generation):
+        if generation != self.listing_generation:
+            return
+        self.model.finish_listing()
+        self.listing_cache.put(self.model.listing, self.listing_worker.mtime_ns,
+                               self.listing_worker.show_hidden)
+        for updated, removed in self.pending_changes:
+            self.model.apply_changes(updated, removed)
+        self.pending_changes = None
+        self.update_status()
+    
+    def listing_failed(self, generation, reason, message):
+        if generation != self.listing_generation:
+            return
+        self.watcher.stop()
+        self.status_label.setText(f"⚠️ {message}")
+    
+    def apply_directory_changes(self, path, updated, removed):
+        """Patch rows with changes seen by this pane's watcher"""
+        if Path(path) != self.model.listing.path:
+            return
+        if self.pending_changes is not None:
+            self.pending_changes.append((updated, removed))
+            return
+        self.model.apply_changes(updated, removed)
+        self.update_status()
+    
+    def update_status(self):
+        listing = self.model.listing
+        self.status_label.setText(f"{len(listing)} items, {format_size(listing.total_file_size())}")
+    
+    def item_double_clicked(self, index):
+        item_path = self.proxy.path(index.row())
+        if self.proxy.is_dir(index.row()):
+            self.navigate(str(item_path))
+        else:
+            self.file_manager.open_file(item_path)
+    
+    def drop_files(self, paths, index, operation):
+        """Drop onto a folder row, or into the pane's folder"""
+        if index.isValid() and self.proxy.is_dir(index.row()):
+            destination = self.proxy.path(index.row())
+        else:
+            destination = self.current_path
+        if destination is not None:
+            self.files_dropped.emit(paths, destination, operation)
+    
+    def selected_paths(self):
+        rows = sorted({row for selection_range in self.view.selectionModel().selection()
+                       if selection_range.left() == 0
+                       for row in range(selection_range.top(), selection_range.bottom() + 1)})
+        return [self.proxy.path(row) for row in rows]
+    
+    def close_pane(self):
+        """Stop background listing and watching"""
+        if self.listing_worker is not None:
+            self.listing_worker.cancel()
+        self.watcher.close()
+
 # ==================== MAIN WINDOW ====================
 
 class MainWindow(QMainWindow):
+    # Emitted from thumbnail worker threads for the preview pane
+    preview_thumbnail_ready = pyqtSignal(str, object)
+    # Emitted from the directory watcher thread: path, updated listing, removed names
+    directory_changed = pyqtSignal(str, object, object)
+    transfer_updated = pyqtSignal(object)
+    
     def __init__(self):
         super().__init__()
         self.file_manager = AdvancedFileManager()
@@ -72,9 +427,44 @@ class MainWindow(QMainWindow):
         self.current_path = Path.home()
         self.current_project = None
         self.current_theme = "navy"
-        self.view_mode = "list"
+        self.view_mode = "details"
         self.split_view_enabled = False
+        self.active_pane = None  # Second pane when it has focus, None for the main view
+        self.transfer_jobs = {}  # id -> TransferJob not yet reported finished
         self.clipboard = []  # For copy/cut operations
+        self.verify_copies = False  # Read copies back and compare checksums
+        self.listing_worker = None
+        self.listing_workers = []  # Keep cancelled workers alive until they exit
+        self.listing_generation = 0
+        self.listing_cache = ListingCache()
+        self.pending_navigation = None  # State to restore if a navigation fails
+        self.selection_count = 0
+        self.selection_size = 0
+        self.preview_path = None  # Path whose thumbnail the preview pane is waiting for
+        self.preview_generation = 0  # Bumped whenever the previewed item changes
+        self.preview_html = ""
+        self.hash_path = None
+        self.hash_worker = None
+        self.hash_workers = []  # Keep cancelled workers alive until they exit
+        
+        # Hash only once the selection has rested on a file for a moment
+        self.hash_timer = QTimer(self)
+        self.hash_timer.setSingleShot(True)
+        self.hash_timer.setInterval(250)
+        self.hash_timer.timeout.connect(self.start_preview_hash)
+        
+        # Scaled grid thumbnails; roughly 2000 at 128px
+        QPixmapCache.setCacheLimit(128 * 1024)
+        self.preview_thumbnail_ready.connect(self.show_preview_thumbnail)
+        
+        # Live updates of the open folder
+        self.pending_changes = []  # Changes seen while the folder is still listing
+        self.directory_watcher = DirectoryWatcher(self.directory_changed.emit)
+        self.directory_changed.connect(self.apply_directory_changes)
+        
+        # Copies, moves and deletes run on the transfer queue's threads
+        self.transfers = TransferQueue(self.file_manager, self.transfer_updated.emit)
+        self.transfer_updated.connect(self.show_transfer_progress)
         
         self.setWindowTitle("Advanced File Organization System")
         self.setGeometry(100, 100, 1600, 900)
@@ -92,7 +482,16 @@ class MainWindow(QMainWindow):
         self.refresh_file_browser()
         self.load_favorites()
         self.load_recent()
+        QTimer.singleShot(0, self.offer_transfer_resume)
         
+    def closeEvent(self, event):
+        """Flush pending state before the window closes"""
+        self.transfers.close()
+        self.second_pane.close_pane()
+        self.directory_watcher.close()
+        self.file_manager.close()
+        super().closeEvent(event)
+    
     def init_ui(self):
         """Initialize the complete user interface"""
         central_widget = QWidget()
@@ -272,12 +671,12 @@ class MainWindow(QMainWindow):
         details_btn.setToolTip("Details View")
         details_btn.clicked.connect(lambda: self.change_view_mode("details"))
         
-        split_btn = QPushButton("⚏")
-        split_btn.setToolTip("Split View (Ctrl+D)")
-        split_btn.setCheckable(True)
-        split_btn.clicked.connect(self.toggle_split_view)
+        self.split_btn = QPushButton("⚏")
+        self.split_btn.setToolTip("Split View (Ctrl+D): Shift+F5 copies and F6 moves to the other pane")
+        self.split_btn.setCheckable(True)
+        self.split_btn.clicked.connect(self.toggle_split_view)
         
-        for btn in [list_btn, grid_btn, details_btn, split_btn]:
+        for btn in [list_btn, grid_btn, details_btn, self.split_btn]:
             btn.setFixedSize(40, 40)
             btn.setStyleSheet("QPushButton { border-radius: 8px; }")
             toolbar.addWidget(btn)
@@ -309,7 +708,7 @@ class MainWindow(QMainWindow):
         
         self.show_hidden_checkbox = QCheckBox("Hidden")
         self.show_hidden_checkbox.setToolTip("Show hidden files")
-        self.show_hidden_checkbox.stateChanged.connect(self.refresh_file_browser)
+        self.show_hidden_checkbox.stateChanged.connect(self.show_hidden_changed)
         search_layout.addWidget(self.show_hidden_checkbox)
         
         filter_btn = QPushButton("🎯 Filter")
@@ -323,34 +722,82 @@ class MainWindow(QMainWindow):
         self.content_splitter = QSplitter(Qt.Orientation.Horizontal)
         
         # File Browser
-        self.file_tree = QTreeWidget()
-        self.file_tree.setHeaderLabels(["Name", "Size", "Type", "Modified", "Tags"])
+        self.file_model = FileListModel(tags_provider=self.file_manager.get_tags,
+                                        thumbnails=self.file_manager.thumbnails)
+        # Views sit on the filter proxy; search narrows it without relisting
+        self.file_proxy = FileFilterProxyModel(self)
+        self.file_proxy.setSourceModel(self.file_model)
+        self.file_tree = FileTreeView()
+        self.file_tree.setModel(self.file_proxy)
         self.file_tree.setColumnWidth(0, 400)
         self.file_tree.setColumnWidth(1, 100)
         self.file_tree.setColumnWidth(2, 120)
         self.file_tree.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
         self.file_tree.customContextMenuRequested.connect(self.show_context_menu)
-        self.file_tree.itemDoubleClicked.connect(self.item_double_clicked)
-        self.file_tree.itemClicked.connect(self.preview_item)
-        self.file_tree.setSelectionMode(QTreeWidget.SelectionMode.ExtendedSelection)
-        self.file_tree.setSortingEnabled(True)
-        self.file_tree.setDragEnabled(True)
-        self.file_tree.setAcceptDrops(True)
-        self.file_tree.setDragDropMode(QTreeWidget.DragDropMode.InternalMove)
+        self.file_tree.doubleClicked.connect(self.item_double_clicked)
+        self.file_tree.sortByColumn(0, Qt.SortOrder.AscendingOrder)
+        self.file_tree.files_dropped.connect(self.files_dropped_on_main)
+        self.file_tree.focused.connect(lambda: self.set_active_pane(None))
         self.file_tree.setStyleSheet("""
-            QTreeWidget {
+            QTreeView {
                 border-radius: 12px;
                 padding: 10px;
                 font-size: 13px;
             }
-            QTreeWidget::item {
+            QTreeView::item {
                 padding: 8px;
                 border-radius: 6px;
             }
         """)
-        self.file_tree.itemSelectionChanged.connect(self.update_selection_count)
+        self.file_tree.selectionModel().selectionChanged.connect(self.update_selection_count)
+        # Row changes can move or resize selected rows without a selection delta
+        for signal in (self.file_proxy.modelReset, self.file_proxy.layoutChanged,
+                       self.file_proxy.rowsInserted, self.file_proxy.rowsRemoved,
+                       self.file_proxy.dataChanged):
+            signal.connect(lambda *args: self.update_selection_count())
+        self.file_tree.selectionModel().currentChanged.connect(
+            lambda current, previous: self.preview_item(current))
+        
+        # Thumbnail grid over the same model and selection
+        self.file_grid = QListView()
+        self.file_grid.setModel(self.file_proxy)
+        self.file_grid.setSelectionModel(self.file_tree.selectionModel())
+        self.file_grid.setViewMode(QListView.ViewMode.IconMode)
+        self.file_grid.setResizeMode(QListView.ResizeMode.Adjust)
+        self.file_grid.setMovement(QListView.Movement.Static)
+        self.file_grid.setLayoutMode(QListView.LayoutMode.Batched)
+        self.file_grid.setBatchSize(500)
+        self.file_grid.setUniformItemSizes(True)
+        self.file_grid.setIconSize(self.file_model.icon_size)
+        self.file_grid.setGridSize(QSize(160, 170))
+        self.file_grid.setWordWrap(True)
+        self.file_grid.setTextElideMode(Qt.TextElideMode.ElideMiddle)
+        self.file_grid.setSelectionMode(QAbstractItemView.SelectionMode.ExtendedSelection)
+        self.file_grid.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.file_grid.customContextMenuRequested.connect(self.show_context_menu)
+        self.file_grid.doubleClicked.connect(self.item_double_clicked)
+        self.file_grid.setDragEnabled(True)
+        self.file_grid.setDragDropMode(QAbstractItemView.DragDropMode.DragOnly)
+        self.file_grid.setStyleSheet("""
+            QListView {
+                border-radius: 12px;
+                padding: 10px;
+                font-size: 12px;
+            }
+        """)
         
-        self.content_splitter.addWidget(self.file_tree)
+        self.file_views = QStackedWidget()
+        self.file_views.addWidget(self.file_tree)
+        self.file_views.addWidget(self.file_grid)
+        self.content_splitter.addWidget(self.file_views)
+        
+        # Second pane for split view, loaded on first use
+        self.second_pane = FilePane(self.file_manager, self.listing_cache,
+                                    self.show_hidden_checkbox.isChecked)
+        self.second_pane.files_dropped.connect(self.queue_transfer)
+        self.second_pane.focused.connect(lambda: self.set_active_pane(self.second_pane))
+        self.second_pane.hide()
+        self.content_splitter.addWidget(self.second_pane)
         
         # Preview Panel
         self.preview_panel = QWidget()
@@ -432,6 +879,18 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel("Ready")
         self.status_label.setStyleSheet("font-size: 12px; padding: 5px;")
         status_layout.addWidget(self.status_label)
+        
+        self.transfer_pause_btn = QPushButton("⏸")
+        self.transfer_pause_btn.setToolTip("Pause transfers")
+        self.transfer_pause_btn.setCheckable(True)
+        self.transfer_pause_btn.clicked.connect(self.pause_transfers)
+        self.transfer_cancel_btn = QPushButton("✖")
+        self.transfer_cancel_btn.setToolTip("Cancel transfers")
+        self.transfer_cancel_btn.clicked.connect(self.cancel_transfers)
+        for btn in (self.transfer_pause_btn, self.transfer_cancel_btn):
+            btn.setFixedSize(28, 28)
+            btn.setVisible(False)
+            status_layout.addWidget(btn)
         status_layout.addStretch()
         
         self.item_count_label = QLabel("0 items")
@@ -694,6 +1153,13 @@ class MainWindow(QMainWindow):
         # Edit menu
         edit_menu = menubar.addMenu("Edit")
         
+        undo_action = QAction("Undo", self)
+        undo_action.setShortcut(QKeySequence.StandardKey.Undo)
+        undo_action.triggered.connect(self.undo_last_operation)
+        edit_menu.addAction(undo_action)
+        
+        edit_menu.addSeparator()
+        
         copy_action = QAction("Copy", self)
         copy_action.setShortcut(QKeySequence.StandardKey.Copy)
         copy_action.triggered.connect(self.copy_selected)
@@ -714,6 +1180,12 @@ class MainWindow(QMainWindow):
         delete_action.triggered.connect(self.delete_selected)
         edit_menu.addAction(delete_action)
         
+        verify_action = QAction("Verify Copies", self)
+        verify_action.setCheckable(True)
+        verify_action.setToolTip("Check every copied file against a checksum of its source")
+        verify_action.toggled.connect(self.set_verify_copies)
+        edit_menu.addAction(verify_action)
+        
         edit_menu.addSeparator()
         
         select_all_action = QAction("Select All", self)
@@ -755,6 +1227,22 @@ class MainWindow(QMainWindow):
         large_files_action.triggered.connect(self.find_large_files_dialog)
         tools_menu.addAction(large_files_action)
         
+        storage_report_action = QAction("Storage Breakdown...", self)
+        storage_report_action.triggered.connect(self.storage_report_dialog)
+        tools_menu.addAction(storage_report_action)
+        
+        staleness_action = QAction("Staleness Analyzer...", self)
+        staleness_action.triggered.connect(self.staleness_dialog)
+        tools_menu.addAction(staleness_action)
+        
+        snapshots_action = QAction("Snapshots && Growth Report...", self)
+        snapshots_action.triggered.connect(self.snapshots_dialog)
+        tools_menu.addAction(snapshots_action)
+        
+        organize_action = QAction("Organize Folder...", self)
+        organize_action.triggered.connect(self.organize_dialog)
+        tools_menu.addAction(organize_action)
+        
         tools_menu.addSeparator()
         
         history_action = QAction("Operation History", self)
@@ -771,6 +1259,8 @@ class MainWindow(QMainWindow):
             "Alt+Right": self.navigate_forward,
             "Alt+Up": self.navigate_up,
             "Ctrl+L": self.focus_path_bar,
+            "Shift+F5": lambda: self.transfer_between_panes('copy'),
+            "F6": lambda: self.transfer_between_panes('move'),
         }
         
         for key, func in shortcuts.items():
@@ -838,7 +1328,7 @@ class MainWindow(QMainWindow):
                     stop:0 {theme['primary']}, stop:1 {theme['secondary']});
             }}
             QWidget {{ background: transparent; color: {theme['text']}; }}
-            QLineEdit, QTextEdit, QComboBox, QListWidget, QTreeWidget {{
+            QLineEdit, QTextEdit, QComboBox, QListWidget, QTreeWidget, QTreeView {{
                 background: {theme['glass']};
                 border: 1px solid rgba(255, 255, 255, 0.1);
                 color: {theme['text']};
@@ -856,11 +1346,11 @@ class MainWindow(QMainWindow):
                 border: 1px solid {theme['accent']};
             }}
             QPushButton:pressed {{ background: {theme['accent']}; }}
-            QTreeWidget::item:selected, QListWidget::item:selected {{
+            QTreeWidget::item:selected, QTreeView::item:selected, QListWidget::item:selected {{
                 background: {theme['accent']};
                 color: white;
             }}
-            QTreeWidget::item:hover, QListWidget::item:hover {{
+            QTreeWidget::item:hover, QTreeView::item:hover, QListWidget::item:hover {{
                 background: rgba(255, 255, 255, 0.1);
             }}
             QHeaderView::section {{
@@ -942,25 +1432,25 @@ class MainWindow(QMainWindow):
         self.breadcrumb_layout.addStretch()
     
     def navigate_to(self, path_str):
-        """Navigate to specific path"""
+        """Navigate to specific path
+        
+        The path is not stat'ed here; the background listing reports a
+        missing path and the navigation is rolled back then.
+        """
         path = Path(path_str)
-        if path.exists() and path.is_dir():
-            self.current_path = path
-            self.current_path_display.setText(str(self.current_path))
-            
-            # Update navigation history
-            if self.nav_index < len(self.nav_history) - 1:
-                self.nav_history = self.nav_history[:self.nav_index + 1]
-            self.nav_history.append(str(self.current_path))
-            self.nav_index = len(self.nav_history) - 1
-            
-            self.file_manager.add_recent(str(path))
-            self.load_recent()
-            self.update_breadcrumb()
-            self.refresh_file_browser()
-            self.status_label.setText(f"📂 {path.name}")
-        else:
-            QMessageBox.warning(self, "Invalid Path", f"Path does not exist: {path_str}")
+        previous = (self.current_path, list(self.nav_history), self.nav_index)
+        self.current_path = path
+        self.current_path_display.setText(str(self.current_path))
+        
+        # Update navigation history
+        if self.nav_index < len(self.nav_history) - 1:
+            self.nav_history = self.nav_history[:self.nav_index + 1]
+        self.nav_history.append(str(self.current_path))
+        self.nav_index = len(self.nav_history) - 1
+        
+        self.update_breadcrumb()
+        self.refresh_file_browser(use_cache=True, navigation=previous)
+        self.status_label.setText(f"📂 {path.name}")
     
     def navigate_to_path_bar(self):
         """Navigate to path from path bar"""
@@ -974,7 +1464,7 @@ class MainWindow(QMainWindow):
             self.current_path = Path(path)
             self.current_path_display.setText(str(self.current_path))
             self.update_breadcrumb()
-            self.refresh_file_browser()
+            self.refresh_file_browser(use_cache=True)
     
     def navigate_forward(self):
         """Navigate forward in history"""
@@ -984,7 +1474,7 @@ class MainWindow(QMainWindow):
             self.current_path = Path(path)
             self.current_path_display.setText(str(self.current_path))
             self.update_breadcrumb()
-            self.refresh_file_browser()
+            self.refresh_file_browser(use_cache=True)
     
     def navigate_up(self):
         """Navigate to parent directory"""
@@ -994,120 +1484,169 @@ class MainWindow(QMainWindow):
     
     # ==================== FILE BROWSER ====================
     
-    def refresh_file_browser(self):
-        """Refresh file browser"""
-        self.file_tree.clear()
+    def refresh_file_browser(self, use_cache=False, navigation=None):
+        """Refresh file browser
+        
+        Listing runs on a worker thread and streams rows into the model;
+        any listing still running for a previous folder is cancelled. With
+        use_cache, a cached listing that is still valid is shown instead.
+        navigation is the state to roll back to if the folder can't be listed.
+        """
         self.preview_image.clear()
         self.preview_info.clear()
+        self.preview_path = None
+        self.cancel_preview_hash()
+        self.pending_navigation = navigation
         
-        if not self.current_path.exists():
-            QMessageBox.warning(self, "Error", "Current path no longer exists")
-            self.current_path = Path.home()
-            self.current_path_display.setText(str(self.current_path))
+        if self.listing_worker is not None:
+            self.listing_worker.cancel()
+            self.listing_worker = None
+        
+        self.listing_generation += 1
+        show_hidden = self.show_hidden_checkbox.isChecked()
+        
+        # Watch before listing so nothing changed in between is missed
+        self.directory_watcher.watch(self.current_path, show_hidden)
+        
+        cached = self.listing_cache.get(self.current_path, show_hidden) if use_cache else None
+        if cached is not None:
+            self.file_model.set_listing(cached)
+            self.pending_changes = None
+            self.folder_loaded()
             return
         
-        try:
-            items = list(self.current_path.iterdir())
-            show_hidden = self.show_hidden_checkbox.isChecked()
-            
-            if not show_hidden:
-                items = [item for item in items if not item.name.startswith('.')]
-            
-            items.sort(key=lambda x: (not x.is_dir(), x.name.lower()))
-            
-            count = 0
-            total_size = 0
-            
-            for item in items:
-                try:
-                    tree_item = QTreeWidgetItem()
-                    
-                    # Icon based on type
-                    icon = self.get_file_icon(item)
-                    tree_item.setText(0, f"{icon} {item.name}")
-                    tree_item.setData(0, Qt.ItemDataRole.UserRole, str(item))
-                    
-                    # Size
-                    if item.is_file():
-                        size = item.stat().st_size
-                        tree_item.setText(1, self.format_size(size))
-                        total_size += size
-                    else:
-                        tree_item.setText(1, "")
-                    
-                    # Type
-                    if item.is_dir():
-                        tree_item.setText(2, "Folder")
-                    else:
-                        tree_item.setText(2, item.suffix[1:].upper() if item.suffix else "File")
-                    
-                    # Modified
-                    modified = item.stat().st_mtime
-                    date_str = datetime.fromtimestamp(modified).strftime("%Y-%m-%d %H:%M")
-                    tree_item.setText(3, date_str)
-                    
-                    # Tags
-                    tags = self.file_manager.get_tags(str(item))
-                    if tags:
-                        tree_item.setText(4, ", ".join(tags))
-                    
-                    self.file_tree.addTopLevelItem(tree_item)
-                    count += 1
-                    
-                except (PermissionError, OSError):
-                    continue
-            
-            self.item_count_label.setText(f"{count} items")
-            self.size_label.setText(f"Total: {self.format_size(total_size)}")
-            self.status_label.setText("✅ Ready")
-            
-        except PermissionError:
+        self.file_model.begin_listing(self.current_path)
+        self.pending_changes = []
+        self.status_label.setText("⏳ Loading...")
+        
+        worker = ListingWorker(self.listing_generation, self.current_path, show_hidden)
+        worker.batch_ready.connect(self.listing_batch_ready)
+        worker.completed.connect(self.listing_completed)
+        worker.failed.connect(self.listing_failed)
+        worker.finished.connect(lambda w=worker: self.listing_workers.remove(w))
+        self.listing_workers.append(worker)
+        self.listing_worker = worker
+        worker.start()
+    
+    def listing_batch_ready(self, generation, batch):
+        """Append a streamed batch of entries for the current folder"""
+        if generation != self.listing_generation:
+            return
+        self.file_model.append_batch(batch)
+        self.item_count_label.setText(f"{len(self.file_model.listing)} items")
+    
+    def listing_completed(self, generation):
+        """Sort and summarise the fully listed folder"""
+        if generation != self.listing_generation:
+            return
+        self.file_model.finish_listing()
+        self.listing_cache.put(self.file_model.listing, self.listing_worker.mtime_ns,
+                               self.listing_worker.show_hidden)
+        for updated, removed in self.pending_changes:
+            self.file_model.apply_changes(updated, removed)
+        self.pending_changes = None
+        self.folder_loaded()
+    
+    def folder_loaded(self):
+        """Summarise the open folder once its listing is complete"""
+        navigated = self.pending_navigation is not None
+        self.pending_navigation = None
+        self.update_folder_totals()
+        self.status_label.setText("✅ Ready")
+        
+        if navigated:
+            self.file_manager.add_recent(str(self.current_path))
+            self.load_recent()
+    
+    def listing_failed(self, generation, reason, message):
+        """Handle a folder that could not be listed"""
+        if generation != self.listing_generation:
+            return
+        self.directory_watcher.stop()
+        
+        if reason == ListingWorker.DENIED:
+            self.pending_navigation = None
             QMessageBox.warning(self, "Permission Denied", 
                               "You don't have permission to access this folder")
+            return
+        
+        if self.pending_navigation is not None:
+            # Roll back a navigation to a path that cannot be listed
+            failed_path = self.current_path
+            self.current_path, self.nav_history, self.nav_index = self.pending_navigation
+            self.pending_navigation = None
+            if reason == ListingWorker.MISSING:
+                QMessageBox.warning(self, "Invalid Path", f"Path does not exist: {failed_path}")
+            else:
+                QMessageBox.warning(self, "Error", f"Cannot open {failed_path}: {message}")
+        elif reason == ListingWorker.MISSING:
+            QMessageBox.warning(self, "Error", "Current path no longer exists")
+            self.current_path = Path.home()
+        else:
+            QMessageBox.warning(self, "Error", f"Cannot open {self.current_path}: {message}")
+            return
+        
+        self.current_path_display.setText(str(self.current_path))
+        self.update_breadcrumb()
+        self.refresh_file_browser()
+    
+    def apply_directory_changes(self, path, updated, removed):
+        """Patch the open folder's rows with changes seen by the watcher"""
+        if Path(path) != self.file_model.listing.path:
+            return
+        if self.pending_changes is not None:
+            self.pending_changes.append((updated, removed))
+            return
+        self.file_model.apply_changes(updated, removed)
+        self.update_folder_totals()
+    
+    def update_folder_totals(self):
+        """Show item count and size of the open folder"""
+        listing = self.file_model.listing
+        self.item_count_label.setText(f"{len(listing)} items")
+        self.size_label.setText(f"Total: {self.format_size(listing.total_file_size())}")
+    
+    def refresh_after_operation(self):
+        """Bring the view up to date after a file operation
+        
+        While the folder is watched, the operation's own events update the
+        affected rows; otherwise fall back to a full relist.
+        """
+        if not self.directory_watcher.is_watching():
+            self.refresh_file_browser()
     
     def get_file_icon(self, path):
         """Get icon for file type"""
-        if path.is_dir():
-            return "📁"
-        
-        ext = path.suffix.lower()
-        icon_map = {
-            '.jpg': '🖼️', '.jpeg': '🖼️', '.png': '🖼️', '.gif': '🖼️', '.bmp': '🖼️', '.webp': '🖼️',
-            '.mp4': '🎬', '.avi': '🎬', '.mov': '🎬', '.mkv': '🎬',
-            '.mp3': '🎵', '.wav': '🎵', '.flac': '🎵', '.m4a': '🎵',
-            '.py': '💻', '.js': '💻', '.java': '💻', '.cpp': '💻', '.c': '💻', 
-            '.html': '💻', '.css': '💻', '.ts': '💻', '.jsx': '💻', '.tsx': '💻',
-            '.pdf': '📕',
-            '.zip': '📦', '.rar': '📦', '.7z': '📦', '.tar': '📦', '.gz': '📦',
-            '.txt': '📄', '.doc': '📄', '.docx': '📄', '.md': '📄',
-            '.xls': '📊', '.xlsx': '📊', '.csv': '📊',
-        }
-        return icon_map.get(ext, '📄')
+        return file_icon(path.suffix, path.is_dir())
     
     def format_size(self, size):
         """Format file size"""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size < 1024.0:
-                return f"{size:.1f} {unit}"
-            size /= 1024.0
-        return f"{size:.1f} PB"
+        return format_size(size)
     
-    def item_double_clicked(self, item, column):
+    def item_double_clicked(self, index):
         """Handle double click"""
-        item_path = Path(item.data(0, Qt.ItemDataRole.UserRole))
+        item_path = self.file_proxy.path(index.row())
         
         if item_path.is_dir():
             self.navigate_to(str(item_path))
         else:
             self.file_manager.open_file(item_path)
     
-    def preview_item(self, item, column):
-        """Preview selected item"""
-        item_path = Path(item.data(0, Qt.ItemDataRole.UserRole))
+    def preview_item(self, index):
+        """Preview selected item
+        
+        Shows the single-stat metadata right away; the MD5 is computed by a
+        background worker that is cancelled as soon as the preview moves on.
+        """
+        self.cancel_preview_hash()
+        if not index.isValid():
+            return
+        item_path = self.file_proxy.path(index.row())
         
         self.preview_image.clear()
+        self.preview_path = None
         
-        info = self.file_manager.get_file_info(item_path)
+        info = self.file_manager.get_file_info(item_path, include_hash=False)
         if not info:
             return
         
@@ -1120,24 +1659,20 @@ class MainWindow(QMainWindow):
 <b>Path:</b> {item_path}
         """
         
-        if 'hash' in info and info['hash']:
-            info_text += f"<br><b>MD5:</b> {info['hash'][:16]}..."
+        self.preview_html = info_text
+        if self.file_manager.is_hashable(info):
+            self.hash_path = item_path
+            self.hash_timer.start()
+            info_text += "<br><b>MD5:</b> <i>calculating...</i>"
         
         self.preview_info.setHtml(info_text)
         
-        # Preview image
-        if item_path.is_file() and item_path.suffix.lower() in ['.jpg', '.jpeg', '.png', '.gif', '.bmp', '.webp']:
-            try:
-                pixmap = QPixmap(str(item_path))
-                if not pixmap.isNull():
-                    scaled = pixmap.scaled(350, 350, Qt.AspectRatioMode.KeepAspectRatio, 
-                                         Qt.TransformationMode.SmoothTransformation)
-                    self.preview_image.setPixmap(scaled)
-                else:
-                    self.preview_image.setText("📷\nCannot preview")
-            except:
-                self.preview_image.setText("📷\nPreview failed")
-        elif item_path.is_dir():
+        # Preview image, decoded off the GUI thread by the thumbnail cache
+        if not info['is_dir'] and ThumbnailCache.is_supported(item_path):
+            self.preview_path = str(item_path)
+            self.preview_image.setText("⏳\nLoading preview...")
+            self.file_manager.thumbnails.request(self.preview_path, self.preview_thumbnail_ready.emit)
+        elif info['is_dir']:
             self.preview_image.setText("📁\nFolder")
         else:
             ext = item_path.suffix.upper()[1:] if item_path.suffix else "FILE"
@@ -1150,22 +1685,81 @@ class MainWindow(QMainWindow):
         else:
             self.tags_display.setText("No tags")
     
-    def update_selection_count(self):
-        """Update selection count"""
-        count = len(self.file_tree.selectedItems())
-        if count > 0:
-            total_size = 0
-            for item in self.file_tree.selectedItems():
-                path = Path(item.data(0, Qt.ItemDataRole.UserRole))
-                if path.is_file():
-                    total_size += path.stat().st_size
-            
+    def cancel_preview_hash(self):
+        """Drop any hash pending or running for the previous preview"""
+        self.preview_generation += 1
+        self.hash_timer.stop()
+        if self.hash_worker is not None:
+            self.hash_worker.cancel()
+            self.hash_worker = None
+    
+    def start_preview_hash(self):
+        """Hash the previewed file in the background"""
+        worker = HashWorker(self.file_manager, self.preview_generation, self.hash_path)
+        worker.hashed.connect(self.show_preview_hash)
+        worker.finished.connect(lambda w=worker: self.hash_workers.remove(w))
+        self.hash_workers.append(worker)
+        self.hash_worker = worker
+        worker.start()
+    
+    def show_preview_hash(self, generation, file_hash):
+        """Add a finished hash to the preview if it is still current"""
+        if generation != self.preview_generation:
+            return
+        self.hash_worker = None
+        if file_hash:
+            self.preview_info.setHtml(self.preview_html + f"<br><b>MD5:</b> {file_hash[:16]}...")
+        else:
+            self.preview_info.setHtml(self.preview_html)
+    
+    def show_preview_thumbnail(self, path, data):
+        """Show a generated thumbnail if its file is still being previewed"""
+        if path != self.preview_path:
+            return
+        self.preview_path = None
+        
+        pixmap = QPixmap()
+        if data is None or not pixmap.loadFromData(data):
+            self.preview_image.setText("📷\nCannot preview")
+            return
+        scaled = pixmap.scaled(350, 350, Qt.AspectRatioMode.KeepAspectRatio, 
+                             Qt.TransformationMode.SmoothTransformation)
+        self.preview_image.setPixmap(scaled)
+    
+    def update_selection_count(self, selected=None, deselected=None):
+        """Update selection count
+        
+        Totals come from the listing's stat data, one slice sum per selection
+        range. Given the selectionChanged delta only the added and removed
+        ranges are counted; without it the whole selection is recounted.
+        """
+        if selected is None:
+            self.selection_count, self.selection_size = self.selection_totals(
+                self.file_tree.selectionModel().selection())
+        else:
+            count, size = self.selection_totals(selected)
+            removed_count, removed_size = self.selection_totals(deselected)
+            self.selection_count += count - removed_count
+            self.selection_size += size - removed_size
+        
+        if self.selection_count > 0:
             self.selected_count_label.setText(
-                f"Selected: {count} ({self.format_size(total_size)})"
+                f"Selected: {self.selection_count} ({self.format_size(self.selection_size)})"
             )
         else:
             self.selected_count_label.setText("")
     
+    def selection_totals(self, selection):
+        """Row count and file size covered by a QItemSelection"""
+        count = size = 0
+        for selection_range in selection:
+            # Count each row once, by its name column
+            if selection_range.left() > 0:
+                continue
+            count += selection_range.height()
+            size += self.file_proxy.total_file_size(selection_range.top(), selection_range.bottom() + 1)
+        return count, size
+    
     # ==================== FILE OPERATIONS ====================
     
     def create_folder(self):
@@ -1174,7 +1768,7 @@ class MainWindow(QMainWindow):
         if ok and name:
             new_folder = self.current_path / name
             if self.file_manager.create_folder(new_folder):
-                self.refresh_file_browser()
+                self.refresh_after_operation()
                 self.status_label.setText(f"✅ Created: {name}")
             else:
                 QMessageBox.warning(self, "Error", "Failed to create folder")
@@ -1186,15 +1780,19 @@ class MainWindow(QMainWindow):
             new_file = self.current_path / name
             try:
                 new_file.touch()
-                self.refresh_file_browser()
+                self.refresh_after_operation()
                 self.status_label.setText(f"✅ Created: {name}")
             except Exception as e:
                 QMessageBox.warning(self, "Error", f"Failed: {e}")
     
     def get_selected_paths(self):
         """Get selected file paths"""
-        return [Path(item.data(0, Qt.ItemDataRole.UserRole)) 
-                for item in self.file_tree.selectedItems()]
+        # The grid selects single cells, so look at column 0 rather than whole
+        # rows; walking ranges avoids building an index per selected cell
+        rows = sorted({row for selection_range in self.file_tree.selectionModel().selection()
+                       if selection_range.left() == 0
+                       for row in range(selection_range.top(), selection_range.bottom() + 1)})
+        return [self.file_proxy.path(row) for row in rows]
     
     def copy_selected(self):
         """Copy selected items"""
@@ -1213,29 +1811,12 @@ class MainWindow(QMainWindow):
         self.status_label.setText(f"✂️ Cut {len(selected)} items")
     
     def paste_selected(self):
-        """Paste items"""
+        """Paste items in the background"""
         if not self.clipboard:
             return
         
         operation, items = self.clipboard
-        dest = self.current_path
-        
-        self.progress_bar.setVisible(True)
-        self.progress_bar.setMaximum(len(items))
-        success = 0
-        
-        for i, item in enumerate(items):
-            if operation == 'copy':
-                if self.file_manager.copy(item, dest / item.name):
-                    success += 1
-            else:  # cut
-                if self.file_manager.move(item, dest / item.name):
-                    success += 1
-            self.progress_bar.setValue(i + 1)
-        
-        self.progress_bar.setVisible(False)
-        self.refresh_file_browser()
-        self.status_label.setText(f"✅ Pasted {success}/{len(items)} items")
+        self.queue_transfer(items, self.current_path, COPY if operation == 'copy' else MOVE)
         
         if operation == 'cut':
             self.clipboard = []
@@ -1253,18 +1834,7 @@ class MainWindow(QMainWindow):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
-            self.progress_bar.setVisible(True)
-            self.progress_bar.setMaximum(len(selected))
-            success = 0
-            
-            for i, item in enumerate(selected):
-                if self.file_manager.delete(item, use_trash=True):
-                    success += 1
-                self.progress_bar.setValue(i + 1)
-            
-            self.progress_bar.setVisible(False)
-            self.refresh_file_browser()
-            self.status_label.setText(f"✅ Deleted {success} items")
+            self.start_transfer(self.transfers.submit(DELETE, selected, use_trash=True))
     
     def rename_selected(self):
         """Rename selected item"""
@@ -1278,15 +1848,16 @@ class MainWindow(QMainWindow):
         if ok and new_name and new_name != path.name:
             new_path = path.parent / new_name
             if self.file_manager.rename(path, new_path):
-                self.refresh_file_browser()
+                self.refresh_after_operation()
                 self.status_label.setText(f"✅ Renamed to: {new_name}")
     
     # ==================== CONTEXT MENU ====================
     
     def show_context_menu(self, position):
         """Show context menu"""
-        item = self.file_tree.itemAt(position)
-        if not item:
+        view = self.file_views.currentWidget()
+        index = view.indexAt(position)
+        if not index.isValid():
             return
         
         menu = QMenu()
@@ -1304,9 +1875,9 @@ class MainWindow(QMainWindow):
         copy_path_action = menu.addAction("📍 Copy Path")
         properties_action = menu.addAction("ℹ️ Properties")
         
-        action = menu.exec(self.file_tree.viewport().mapToGlobal(position))
+        action = menu.exec(view.viewport().mapToGlobal(position))
         
-        item_path = Path(item.data(0, Qt.ItemDataRole.UserRole))
+        item_path = self.file_proxy.path(index.row())
         
         if action == open_action:
             if item_path.is_dir():
@@ -1360,17 +1931,8 @@ class MainWindow(QMainWindow):
     # ==================== SEARCH ====================
     
     def search_files(self, text):
-        """Search files"""
-        if not text:
-            self.refresh_file_browser()
-            return
-        
-        # Simple filename search
-        text_lower = text.lower()
-        for i in range(self.file_tree.topLevelItemCount()):
-            item = self.file_tree.topLevelItem(i)
-            item_text = item.text(0).lower()
-            item.setHidden(text_lower not in item_text)
+        """Filter the open folder by name; the filter carries over to new folders"""
+        self.file_proxy.set_filter(text)
     
     def show_filter_dialog(self):
         """Show advanced filter dialog"""
@@ -1439,7 +2001,7 @@ class MainWindow(QMainWindow):
         tag, ok = QInputDialog.getText(self, "Add Tag", "Tag name:")
         if ok and tag:
             self.file_manager.add_tag(path, tag)
-            self.refresh_file_browser()
+            self.file_model.tags_changed()
             self.status_label.setText(f"🏷️ Added tag: {tag}")
     
     def add_tag_to_current(self):
@@ -1452,8 +2014,8 @@ class MainWindow(QMainWindow):
         if tag:
             self.file_manager.add_tag(str(selected[0]), tag)
             self.tag_input.clear()
-            self.refresh_file_browser()
-            self.preview_item(self.file_tree.currentItem(), 0)
+            self.file_model.tags_changed()
+            self.preview_item(self.file_tree.currentIndex())
     
     # ==================== FAVORITES ====================
     
@@ -1530,20 +2092,83 @@ class MainWindow(QMainWindow):
         start_layout.addWidget(start_spin)
         layout.addLayout(start_layout)
         
+        # Preview rows are computed as they are painted; the full check is debounced
+        preview_model = RenamePreviewModel(dialog)
+        preview = QTreeView()
+        preview.setModel(preview_model)
+        preview.setRootIsDecorated(False)
+        preview.setUniformRowHeights(True)
+        preview.setMinimumHeight(250)
+        layout.addWidget(preview)
+        
+        summary_label = QLabel("")
+        layout.addWidget(summary_label)
+        
         buttons = QHBoxLayout()
         apply_btn = QPushButton("Apply")
+        apply_btn.setEnabled(False)
         cancel_btn = QPushButton("Cancel")
         
-        def apply_rename():
+        check_timer = QTimer(dialog)
+        check_timer.setSingleShot(True)
+        check_timer.setInterval(250)
+        
+        def update_preview():
             pattern = pattern_input.text()
             if not pattern:
-                QMessageBox.warning(dialog, "Error", "Please enter a pattern")
+                preview_model.set_plan(None)
+                summary_label.setText("")
+                apply_btn.setEnabled(False)
+                return
+            preview_model.set_plan(RenamePlan.from_pattern(selected, pattern, start_spin.value()))
+            apply_btn.setEnabled(False)
+            check_timer.start()
+        
+        def check_plan():
+            plan = preview_model.plan
+            if plan is None:
                 return
+            ok = plan.check()
+            preview.viewport().update()
+            if ok:
+                text = f"{len(plan.renames())} files will be renamed"
+                if plan.cycles:
+                    text += f" ({plan.cycles} swaps or cycles handled safely)"
+                summary_label.setText(text)
+            else:
+                first = min(plan.problems)
+                summary_label.setText(f"{len(plan.problems)} conflicts, e.g. "
+                                      f"{os.path.basename(plan.sources[first])}: {plan.problems[first]}")
+            apply_btn.setEnabled(ok)
+        
+        check_timer.timeout.connect(check_plan)
+        pattern_input.textChanged.connect(update_preview)
+        start_spin.valueChanged.connect(update_preview)
+        
+        def apply_rename():
+            plan = preview_model.plan
+            if plan is None or not plan.check():
+                check_plan()
+                return
+            apply_btn.setEnabled(False)
+            pattern_input.setEnabled(False)
+            start_spin.setEnabled(False)
+            cancel_btn.setEnabled(False)
+            summary_label.setText("Renaming...")
             
-            success = self.file_manager.batch_rename(selected, pattern, start_spin.value())
-            QMessageBox.information(dialog, "Complete", f"Renamed {success} files")
-            dialog.accept()
-            self.refresh_file_browser()
+            def renamed(done, errors):
+                if errors:
+                    QMessageBox.warning(dialog, "Batch Rename",
+                                        f"Renamed {len(done)} files, {len(errors)} failed:\n" +
+                                        "\n".join(f"{path}: {error}" for path, error in errors[:10]))
+                else:
+                    QMessageBox.information(dialog, "Complete", f"Renamed {len(done)} files")
+                dialog.accept()
+                self.refresh_after_operation()
+            
+            self.rename_worker = RenameWorker(self.file_manager, plan)
+            self.rename_worker.finished.connect(renamed)
+            self.rename_worker.start()
         
         apply_btn.clicked.connect(apply_rename)
         cancel_btn.clicked.connect(dialog.reject)
@@ -1629,10 +2254,8 @@ class MainWindow(QMainWindow):
                     if item.data(0, Qt.ItemDataRole.UserRole)]
             
             if paths:
-                count = self.file_manager.batch_delete(paths, use_trash=True)
-                QMessageBox.information(dialog, "Deleted", f"Deleted {count} files")
+                self.start_transfer(self.transfers.submit(DELETE, paths, use_trash=True))
                 dialog.accept()
-                self.refresh_file_browser()
         
         delete_btn.clicked.connect(delete_selected_dups)
         close_btn.clicked.connect(dialog.accept)
@@ -1760,10 +2383,8 @@ class MainWindow(QMainWindow):
             if selected:
                 paths = [Path(item.data(0, Qt.ItemDataRole.UserRole)) 
                         for item in selected]
-                count = self.file_manager.batch_delete(paths, use_trash=True)
-                QMessageBox.information(dialog, "Deleted", f"Deleted {count} files")
+                self.start_transfer(self.transfers.submit(DELETE, paths, use_trash=True))
                 dialog.accept()
-                self.refresh_file_browser()
         
         open_btn.clicked.connect(open_location)
         delete_btn.clicked.connect(delete_large)
@@ -1778,6 +2399,530 @@ class MainWindow(QMainWindow):
         dialog.exec()
         self.status_label.setText("✅ Ready")
     
+    def storage_report_dialog(self):
+        """Scan current folder for a storage breakdown report"""
+        self.status_label.setText("📊 Scanning for storage breakdown...")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        
+        self.scan_worker = ScanWorker(self.file_manager, self.current_path)
+        self.scan_worker.finished.connect(self.show_storage_report)
+        self.scan_worker.start()
+    
+    def show_storage_report(self, scan):
+        """Show storage breakdown by type, category, owner and age"""
+        self.progress_bar.setVisible(False)
+        report = StorageReport(scan)
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Storage Breakdown")
+        dialog.setMinimumSize(700, 500)
+        
+        layout = QVBoxLayout()
+        
+        total_label = QLabel(f"<h3>Total Size: {self.format_size(scan.total_size)}</h3>")
+        layout.addWidget(total_label)
+        
+        stats_label = QLabel(f"Files: {scan.file_count} | Folders: {scan.dir_count}")
+        layout.addWidget(stats_label)
+        
+        tabs = QTabWidget()
+        breakdowns = [
+            ("By Type", "Extension", report.by_extension()),
+            ("By Category", "Category", report.by_category()),
+            ("By Owner", "Owner", report.by_owner()),
+            ("By Age", "Last Modified", report.by_age()),
+        ]
+        
+        for title, column, rows in breakdowns:
+            tree = QTreeWidget()
+            tree.setHeaderLabels([column, "Size", "Files", "Share"])
+            tree.setColumnWidth(0, 250)
+            tree.setRootIsDecorated(False)
+            
+            for row in rows:
+                item = QTreeWidgetItem()
+                item.setText(0, row['name'])
+                item.setText(1, self.format_size(row['size']))
+                item.setText(2, str(row['file_count']))
+                item.setText(3, f"{row['percent']:.1f}%")
+                tree.addTopLevelItem(item)
+            
+            tabs.addTab(tree, title)
+        
+        layout.addWidget(tabs)
+        
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(dialog.accept)
+        layout.addWidget(close_btn)
+        
+        dialog.setLayout(layout)
+        dialog.exec()
+        self.status_label.setText("✅ Ready")
+    
+    def staleness_dialog(self):
+        """Scan current folder for a staleness analysis"""
+        self.status_label.setText("🕰️ Scanning for stale files...")
+        self.progress_bar.setVisible(True)
+        self.progress_bar.setRange(0, 0)
+        
+        self.scan_worker = ScanWorker(self.file_manager, self.current_path)
+        self.scan_worker.finished.connect(self.show_staleness_report)
+        self.scan_worker.start()
+    
+    def show_staleness_report(self, scan):
+        """Show folders with the most bytes not touched in N months"""
+        self.progress_bar.setVisible(False)
+        report = StalenessReport(scan)
+        
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Staleness Analyzer")
+        dialog.setMinimumSize(800, 600)
+        
+        layout = QVBoxLayout()
+        
+        options = QHBoxLayout()
+        options.addWidget(QLabel("Not"))
+        kind_combo = QComboBox()
+        kind_combo.addItem("modified", MODIFIED)
+        kind_combo.addItem("accessed", ACCESSED)
+        options.addWidget(kind_combo)
+        options.addWidget(QLabel("in the last"))
+        months_spin = QSpinBox()
+        months_spin.setRange(1, 240)
+        months_spin.setValue(6)
+        months_spin.setSuffix(" months")
+        options.addWidget(months_spin)
+        options.addStretch()
+        layout.addLayout(options)
+        
+        folders_tree = QTreeWidget()
+        folders_tree.setHeaderLabels(["Folder", "Stale Size", "Folder Size", "Stale Share"])
+        folders_tree.setColumnWidth(0, 400)
+        folders_tree.setRootIsDecorated(False)
+        layout.addWidget(folders_tree)
+        
+        histogram_tree = QTreeWidget()
+        histogram_tree.setHeaderLabels(["Age", "Size", "Share"])
+        histogram_tree.setColumnWidth(0, 200)
+        histogram_tree.setRootIsDecorated(False)
+        histogram_tree.setMaximumHeight(200)
+        layout.addWidget(histogram_tree)
+        
+        def show_histogram(row):
+            histogram_tree.clear()
+            for bucket in report.folder_histogram(row, kind_combo.currentData()):
+                item = QTreeWidgetItem()
+                item.setText(0, bucket['name'])
+                item.setText(1, self.format_size(bucket['size']))
+                item.setText(2, f"{bucket['percent']:.1f}%")
+                histogram_tree.addTopLevelItem(item)
+        
+        def refresh_folders():
+            folders_tree.clear()
+            for folder in report.stale_folders(months_spin.value(), kind_combo.currentData()):
+                item = QTreeWidgetItem()
+                item.setText(0, folder['path'])
+                item.setText(1, self.format_size(folder['stale_size']))
+                item.setText(2, self.format_size(folder['size']))
+                item.setText(3, f"{folder['percent']:.1f}%")
+                item.setData(0, Qt.ItemDataRole.UserRole, folder['row'])
+                folders_tree.addTopLevelItem(item)
+            show_histogram(0)
+        
+        def folder_selected():
+            item = folders_tree.currentItem()
+            if item:
+                show_histogram(item.data(0, Qt.ItemDataRole.UserRole))
+        
+        months_spin.valueChanged.connect(refresh_folders)
+        kind_combo.currentIndexChanged.connect(refresh_folders)
+        folders_tree.itemSelectionChanged.connect(folder_selected)
+        refresh_folders()
+        
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(dialog.accept)
+        layout.addWidget(close_btn)
+        
+        dialog.setLayout(layout)
+        dialog.exec()
+        self.status_label.setText("✅ Ready")
+    
+    def snapshots_dialog(self):
+        """Manage disk usage snapshots of the current folder"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Snapshots")
+        dialog.setMinimumSize(500, 400)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"Snapshots of: {self.current_path}"))
+        layout.addWidget(QLabel("Select two snapshots to compare, or one to compare with the newest."))
+        
+        snapshot_list = QListWidget()
+        snapshot_list.setSelectionMode(QListWidget.SelectionMode.ExtendedSelection)
+        layout.addWidget(snapshot_list)
+        
+        def load_snapshots():
+            snapshot_list.clear()
+            for snapshot in self.file_manager.get_snapshots(self.current_path):
+                created = datetime.fromisoformat(snapshot['created']).strftime('%Y-%m-%d %H:%M:%S')
+                item = QListWidgetItem(f"📸 {created} ({snapshot['entries']} entries)")
+                item.setData(Qt.ItemDataRole.UserRole, snapshot)
+                snapshot_list.addItem(item)
+        
+        buttons = QHBoxLayout()
+        take_btn = QPushButton("📸 Take Snapshot")
+        compare_btn = QPushButton("Compare")
+        close_btn = QPushButton("Close")
+        
+        def snapshot_taken(file_path):
+            self.progress_bar.setVisible(False)
+            take_btn.setEnabled(True)
+            if file_path:
+                self.status_label.setText("📸 Snapshot saved")
+            else:
+                self.status_label.setText("❌ Snapshot failed")
+            load_snapshots()
+        
+        def take_snapshot():
+            take_btn.setEnabled(False)
+            self.status_label.setText("📸 Taking snapshot...")
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 0)
+            self.snapshot_worker = SnapshotWorker(self.file_manager, self.current_path)
+            self.snapshot_worker.finished.connect(snapshot_taken)
+            self.snapshot_worker.start()
+        
+        def compare():
+            selected = [item.data(Qt.ItemDataRole.UserRole) for item in snapshot_list.selectedItems()]
+            if len(selected) == 1 and snapshot_list.count() > 1:
+                selected.append(snapshot_list.item(0).data(Qt.ItemDataRole.UserRole))
+            if len(selected) != 2 or selected[0]['file'] == selected[1]['file']:
+                QMessageBox.information(dialog, "Compare", "Please select two snapshots")
+                return
+            old, new = sorted(selected, key=lambda s: s['created'])
+            diff = self.file_manager.compare_snapshots(old['file'], new['file'])
+            if diff:
+                self.show_snapshot_diff(diff)
+        
+        take_btn.clicked.connect(take_snapshot)
+        compare_btn.clicked.connect(compare)
+        close_btn.clicked.connect(dialog.accept)
+        
+        buttons.addWidget(take_btn)
+        buttons.addWidget(compare_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+        load_snapshots()
+        dialog.setLayout(layout)
+        dialog.exec()
+    
+    def organize_dialog(self):
+        """Sort the current folder's files into template folders by rules"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Organize Folder")
+        dialog.setMinimumSize(750, 600)
+        
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(f"Organize: {self.current_path}"))
+        
+        template_layout = QHBoxLayout()
+        template_layout.addWidget(QLabel("Template:"))
+        template_combo = QComboBox()
+        for template in self.template_manager.get_all_templates():
+            template_combo.addItem(template['name'], template)
+        template_layout.addWidget(template_combo, 1)
+        from_template_btn = QPushButton("Rules from Template")
+        template_layout.addWidget(from_template_btn)
+        layout.addLayout(template_layout)
+        
+        layout.addWidget(QLabel("Rules are tried top to bottom; a file goes to the first one it matches."))
+        rules_tree = QTreeWidget()
+        rules_tree.setHeaderLabels(["Rule", "Conditions", "Target Folder"])
+        rules_tree.setColumnWidth(0, 150)
+        rules_tree.setColumnWidth(1, 330)
+        rules_tree.setRootIsDecorated(False)
+        layout.addWidget(rules_tree)
+        
+        def add_rule_item(rule):
+            item = QTreeWidgetItem()
+            item.setText(0, rule.name)
+            item.setText(1, rule.describe())
+            item.setText(2, rule.target)
+            item.setCheckState(0, Qt.CheckState.Checked if rule.enabled else Qt.CheckState.Unchecked)
+            item.setData(0, Qt.ItemDataRole.UserRole, rule)
+            rules_tree.addTopLevelItem(item)
+        
+        def current_rules():
+            rules = []
+            for i in range(rules_tree.topLevelItemCount()):
+                item = rules_tree.topLevelItem(i)
+                rule = item.data(0, Qt.ItemDataRole.UserRole)
+                rule.enabled = item.checkState(0) == Qt.CheckState.Checked
+                rules.append(rule)
+            return rules
+        
+        def load_from_template():
+            rules_tree.clear()
+            for rule in rules_for_template(template_combo.currentData()):
+                add_rule_item(rule)
+        
+        rule_buttons = QHBoxLayout()
+        add_rule_btn = QPushButton("Add Rule...")
+        remove_rule_btn = QPushButton("Remove Rule")
+        save_rules_btn = QPushButton("Save Rules")
+        rule_buttons.addWidget(add_rule_btn)
+        rule_buttons.addWidget(remove_rule_btn)
+        rule_buttons.addWidget(save_rules_btn)
+        rule_buttons.addStretch()
+        layout.addLayout(rule_buttons)
+        
+        def add_rule():
+            rule = self.edit_organize_rule_dialog(template_combo.currentData())
+            if rule:
+                add_rule_item(rule)
+        
+        def remove_rule():
+            for item in rules_tree.selectedItems():
+                rules_tree.takeTopLevelItem(rules_tree.indexOfTopLevelItem(item))
+        
+        def save_rules():
+            self.file_manager.save_organize_rules(current_rules())
+            self.status_label.setText("✅ Organize rules saved")
+        
+        options_layout = QHBoxLayout()
+        options_layout.addWidget(QLabel("Destination:"))
+        destination_input = QLineEdit(str(self.current_path))
+        options_layout.addWidget(destination_input, 1)
+        browse_btn = QPushButton("Browse...")
+        options_layout.addWidget(browse_btn)
+        recursive_check = QCheckBox("Include subfolders")
+        options_layout.addWidget(recursive_check)
+        layout.addLayout(options_layout)
+        
+        def browse():
+            path = QFileDialog.getExistingDirectory(dialog, "Select Destination", destination_input.text())
+            if path:
+                destination_input.setText(path)
+        
+        report_text = QTextEdit()
+        report_text.setReadOnly(True)
+        report_text.setFontFamily("monospace")
+        layout.addWidget(report_text)
+        
+        buttons = QHBoxLayout()
+        dry_run_btn = QPushButton("🔍 Dry Run")
+        organize_btn = QPushButton("📂 Organize")
+        close_btn = QPushButton("Close")
+        
+        def organized(report):
+            self.progress_bar.setVisible(False)
+            dry_run_btn.setEnabled(True)
+            organize_btn.setEnabled(True)
+            report_text.setPlainText(report.summary())
+            if report.dry_run:
+                self.status_label.setText(f"🔍 {report.moved} files would be moved")
+            else:
+                self.status_label.setText(f"✅ Organized {report.moved} files")
+                self.refresh_after_operation()
+        
+        def start(dry_run):
+            rules = [rule for rule in current_rules() if rule.enabled]
+            if not rules:
+                QMessageBox.information(dialog, "Organize", "Please add or enable a rule")
+                return
+            if not dry_run:
+                reply = QMessageBox.question(
+                    dialog, "Organize",
+                    f"Move matching files from:\n{self.current_path}\ninto folders under:\n"
+                    f"{destination_input.text()}?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                )
+                if reply != QMessageBox.StandardButton.Yes:
+                    return
+            dry_run_btn.setEnabled(False)
+            organize_btn.setEnabled(False)
+            self.status_label.setText("🔍 Planning..." if dry_run else "📂 Organizing...")
+            self.progress_bar.setVisible(True)
+            self.progress_bar.setRange(0, 0)
+            self.organize_worker = OrganizeWorker(Organizer(self.file_manager, rules), self.current_path,
+                                                  Path(destination_input.text()),
+                                                  recursive_check.isChecked(), dry_run)
+            self.organize_worker.progress.connect(
+                lambda moved: self.status_label.setText(f"📂 Organizing... {moved} files"))
+            self.organize_worker.finished.connect(organized)
+            self.organize_worker.start()
+        
+        def close():
+            worker = getattr(self, 'organize_worker', None)
+            if worker is not None and worker.isRunning():
+                worker.cancelled = True
+                worker.wait()
+            dialog.accept()
+        
+        from_template_btn.clicked.connect(load_from_template)
+        add_rule_btn.clicked.connect(add_rule)
+        remove_rule_btn.clicked.connect(remove_rule)
+        save_rules_btn.clicked.connect(save_rules)
+        browse_btn.clicked.connect(browse)
+        dry_run_btn.clicked.connect(lambda: start(True))
+        organize_btn.clicked.connect(lambda: start(False))
+        close_btn.clicked.connect(close)
+        
+        buttons.addWidget(dry_run_btn)
+        buttons.addWidget(organize_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
+        
+        saved_rules = self.file_manager.get_organize_rules()
+        if saved_rules:
+            for rule in saved_rules:
+                add_rule_item(rule)
+        else:
+            load_from_template()
+        
+        dialog.setLayout(layout)
+        dialog.exec()
+    
+    def edit_organize_rule_dialog(self, template):
+        """Ask for a new organize rule; returns it or None"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Add Rule")
+        dialog.setMinimumWidth(450)
+        
+        layout = QGridLayout()
+        name_input = QLineEdit()
+        target_combo = QComboBox()
+        target_combo.setEditable(True)
+        target_combo.addItems(template['structure'] if template else [])
+        target_combo.setEditText("")
+        extensions_input = QLineEdit()
+        extensions_input.setPlaceholderText(".jpg .png")
+        mime_input = QLineEdit()
+        mime_input.setPlaceholderText("image/* or application/pdf")
+        min_size_spin = QSpinBox()
+        min_size_spin.setRange(0, 10 ** 6)
+        min_size_spin.setSuffix(" MB")
+        max_size_spin = QSpinBox()
+        max_size_spin.setRange(0, 10 ** 6)
+        max_size_spin.setSuffix(" MB")
+        max_size_spin.setSpecialValueText("no limit")
+        older_spin = QSpinBox()
+        older_spin.setRange(0, 100000)
+        older_spin.setSuffix(" days")
+        older_spin.setSpecialValueText("any age")
+        newer_spin = QSpinBox()
+        newer_spin.setRange(0, 100000)
+        newer_spin.setSuffix(" days")
+        newer_spin.setSpecialValueText("any age")
+        pattern_input = QLineEdit()
+        pattern_input.setPlaceholderText("Regular expression, e.g. ^invoice")
+        
+        fields = [
+            ("Name:", name_input),
+            ("Target folder:", target_combo),
+            ("Extensions:", extensions_input),
+            ("MIME type:", mime_input),
+            ("At least:", min_size_spin),
+            ("At most:", max_size_spin),
+            ("Older than:", older_spin),
+            ("Newer than:", newer_spin),
+            ("Name matches:", pattern_input),
+        ]
+        for row, (label, widget) in enumerate(fields):
+            layout.addWidget(QLabel(label), row, 0)
+            layout.addWidget(widget, row, 1)
+        
+        result = []
+        
+        def accept():
+            name = name_input.text().strip()
+            target = target_combo.currentText().strip().strip('/')
+            if not name or not target:
+                QMessageBox.warning(dialog, "Error", "Please enter a name and a target folder")
+                return
+            try:
+                result.append(OrganizeRule(
+                    name, target,
+                    extensions=extensions_input.text().replace(',', ' ').split() or None,
+                    mime=mime_input.text().strip() or None,
+                    min_size=min_size_spin.value() * 1024 ** 2 or None,
+                    max_size=max_size_spin.value() * 1024 ** 2 or None,
+                    older_than_days=older_spin.value() or None,
+                    newer_than_days=newer_spin.value() or None,
+                    name_pattern=pattern_input.text() or None,
+                ))
+            except re.error as e:
+                QMessageBox.warning(dialog, "Error", f"Invalid name pattern: {e}")
+                return
+            except ValueError as e:
+                QMessageBox.warning(dialog, "Error", str(e))
+                return
+            dialog.accept()
+        
+        buttons = QHBoxLayout()
+        ok_btn = QPushButton("Add")
+        cancel_btn = QPushButton("Cancel")
+        ok_btn.clicked.connect(accept)
+        cancel_btn.clicked.connect(dialog.reject)
+        buttons.addWidget(ok_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons, len(fields), 0, 1, 2)
+        
+        dialog.setLayout(layout)
+        dialog.exec()
+        return result[0] if result else None
+    
+    def show_snapshot_diff(self, diff):
+        """Show growth and shrinkage between two snapshots"""
+        dialog = QDialog(self)
+        dialog.setWindowTitle("Growth Report")
+        dialog.setMinimumSize(800, 500)
+        
+        layout = QVBoxLayout()
+        
+        change = diff['total_change']
+        sign = '+' if change >= 0 else '-'
+        layout.addWidget(QLabel(
+            f"<h3>{diff['old_created']} → {diff['new_created']}: "
+            f"{sign}{self.format_size(abs(change))}</h3>"
+        ))
+        
+        tabs = QTabWidget()
+        sections = [
+            ("📈 Growing", diff['growing']),
+            ("📉 Shrinking", diff['shrinking']),
+            ("🆕 New Large Files", diff['new_files']),
+            ("❌ Removed Large Files", diff['removed_files']),
+        ]
+        
+        for title, rows in sections:
+            tree = QTreeWidget()
+            tree.setHeaderLabels(["Path", "Before", "After", "Change"])
+            tree.setColumnWidth(0, 400)
+            tree.setRootIsDecorated(False)
+            
+            for row in rows:
+                item = QTreeWidgetItem()
+                item.setText(0, row['path'])
+                item.setText(1, self.format_size(row['old_size']))
+                item.setText(2, self.format_size(row['new_size']))
+                delta = row['delta']
+                item.setText(3, f"{'+' if delta >= 0 else '-'}{self.format_size(abs(delta))}")
+                tree.addTopLevelItem(item)
+            
+            tabs.addTab(tree, title)
+        
+        layout.addWidget(tabs)
+        
+        close_btn = QPushButton("Close")
+        close_btn.clicked.connect(dialog.accept)
+        layout.addWidget(close_btn)
+        
+        dialog.setLayout(layout)
+        dialog.exec()
+    
     def show_history(self):
         """Show operation history"""
         history = self.file_manager.get_operation_history()
@@ -1797,37 +2942,229 @@ class MainWindow(QMainWindow):
         tree.setColumnWidth(0, 150)
         tree.setColumnWidth(1, 100)
         
-        for op in reversed(history):
+        # One row per undo step; batches list their operations underneath
+        for step in reversed(self.file_manager.history.steps):
+            first = step[0]
             item = QTreeWidgetItem()
-            time = datetime.fromisoformat(op['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
+            time = datetime.fromisoformat(first['timestamp']).strftime('%Y-%m-%d %H:%M:%S')
             item.setText(0, time)
-            item.setText(1, op['operation'])
-            item.setText(2, str(op['data'])[:100])
+            item.setText(1, first['operation'])
+            if len(step) > 1:
+                item.setText(2, f"{len(step)} items")
+                for op in step[:500]:
+                    child = QTreeWidgetItem()
+                    child.setText(1, op['operation'])
+                    child.setText(2, str(op['data'])[:100])
+                    item.addChild(child)
+            else:
+                item.setText(2, str(first['data'])[:100])
+            if all(op.get('skipped') for op in step):
+                item.setText(1, f"{first['operation']} (can't be undone)")
+            elif all(op.get('undone') for op in step):
+                item.setText(1, f"{first['operation']} (undone)")
             tree.addTopLevelItem(item)
         
         layout.addWidget(tree)
         
+        buttons = QHBoxLayout()
+        undo_btn = QPushButton("Undo Last")
+        undo_btn.clicked.connect(lambda: (self.undo_last_operation(), dialog.accept()))
+        buttons.addWidget(undo_btn)
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(dialog.accept)
-        layout.addWidget(close_btn)
+        buttons.addWidget(close_btn)
+        layout.addLayout(buttons)
         
         dialog.setLayout(layout)
         dialog.exec()
     
+    def undo_last_operation(self):
+        """Reverse the last operation, or the whole last batch"""
+        try:
+            undone, skipped = self.file_manager.undo()
+        except ValueError as e:
+            QMessageBox.information(self, "Undo", str(e))
+            return
+        except OSError as e:
+            QMessageBox.warning(self, "Undo", f"Undo stopped: {e}")
+            self.refresh_after_operation()
+            return
+        if not undone and not skipped:
+            self.status_label.setText("Nothing to undo")
+            return
+        if undone:
+            self.refresh_after_operation()
+            if self.split_view_enabled and not self.second_pane.watcher.is_watching():
+                self.second_pane.refresh()
+            count = f" ({len(undone)} items)" if len(undone) > 1 else ""
+            self.status_label.setText(f"↶ Undid {undone[0]['operation']}{count}")
+        if skipped:
+            QMessageBox.information(self, "Undo",
+                                    f"{len(skipped)} item(s) could not be undone "
+                                    f"('{skipped[0]['operation']}'); they were skipped")
+    
+    # ==================== SPLIT VIEW ====================
+    
     def toggle_split_view(self):
-        """Toggle split view mode"""
+        """Show or hide the second file pane"""
         self.split_view_enabled = not self.split_view_enabled
-        # Placeholder - would implement dual pane view
-        QMessageBox.information(self, "Split View", 
-                               "Split view coming in next update!")
+        self.split_btn.setChecked(self.split_view_enabled)
+        if self.split_view_enabled:
+            if self.second_pane.current_path is None:
+                self.second_pane.navigate(str(self.current_path))
+            self.second_pane.show()
+            self.content_splitter.setSizes([700, 700, 300])
+        else:
+            self.second_pane.hide()
+            self.active_pane = None
+    
+    def set_active_pane(self, pane):
+        self.active_pane = pane
+    
+    def show_hidden_changed(self):
+        self.refresh_file_browser()
+        if self.second_pane.current_path is not None:
+            self.second_pane.refresh()
+    
+    def transfer_between_panes(self, operation):
+        """Copy or move the focused pane's selection into the other pane's folder"""
+        if not self.split_view_enabled:
+            return
+        if self.active_pane is self.second_pane:
+            sources = self.second_pane.selected_paths()
+            destination = self.current_path
+        else:
+            sources = self.get_selected_paths()
+            destination = self.second_pane.current_path
+        if sources and destination is not None:
+            self.queue_transfer(sources, destination, operation)
+    
+    def files_dropped_on_main(self, paths, index, operation):
+        """Drop onto a folder row, or into the open folder"""
+        if index.isValid() and self.file_proxy.is_dir(index.row()):
+            destination = self.file_proxy.path(index.row())
+        else:
+            destination = self.current_path
+        self.queue_transfer(paths, destination, operation)
+    
+    def queue_transfer(self, sources, destination, operation):
+        """Copy or move items into a folder on the transfer queue"""
+        destination = Path(destination)
+        # Dropping items where they already are is a no-op; a folder into itself would never end
+        sources = [source for source in sources
+                   if source.parent != destination and source != destination
+                   and source not in destination.parents]
+        if sources:
+            self.start_transfer(self.transfers.submit(operation, sources, destination,
+                                                      verify=self.verify_copies))
+    
+    def set_verify_copies(self, enabled):
+        """Copies and cross-device moves queued from now on are verified"""
+        self.verify_copies = enabled
+        self.status_label.setText("✅ Copies will be verified" if enabled else "✅ Ready")
+    
+    # ==================== TRANSFERS ====================
+    
+    def offer_transfer_resume(self):
+        """Offer to finish copies and moves cut short by a crash or exit"""
+        journals = self.file_manager.transfer_journal.pending()
+        if not journals:
+            return
+        names = "\n".join(f"{journal.operation}: {len(journal.sources)} item(s) to {journal.destination}"
+                          for journal in journals[:10])
+        reply = QMessageBox.question(
+            self, "Resume Transfers",
+            f"{len(journals)} transfer(s) did not finish:\n{names}\n\n"
+            f"Resume them? Files already copied are skipped.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        for journal in journals:
+            if reply == QMessageBox.StandardButton.Yes:
+                self.start_transfer(self.transfers.submit_journal(journal))
+            else:
+                journal.discard()
+    
+    def start_transfer(self, job):
+        self.transfer_jobs[job.id] = job
+        self.show_transfer_progress(job)
+    
+    def pause_transfers(self, paused):
+        for job in self.transfer_jobs.values():
+            if paused:
+                self.transfers.pause(job)
+            else:
+                self.transfers.resume(job)
+    
+    def cancel_transfers(self):
+        for job in list(self.transfer_jobs.values()):
+            self.transfers.cancel(job)
+    
+    def show_transfer_progress(self, job):
+        """Progress of all running transfers, and a summary when one ends"""
+        if job.is_finished():
+            if self.transfer_jobs.pop(job.id, None) is None:
+                return
+            self.transfer_finished(job)
+        
+        jobs = list(self.transfer_jobs.values())
+        busy = bool(jobs)
+        self.progress_bar.setVisible(busy)
+        self.transfer_pause_btn.setVisible(busy)
+        self.transfer_cancel_btn.setVisible(busy)
+        if not busy:
+            self.transfer_pause_btn.setChecked(False)
+            return
+        
+        # Deletes count items rather than bytes, so average each job's own fraction
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(int(1000 * sum(j.fraction() for j in jobs) / len(jobs)))
+        
+        running = [j for j in jobs if j.started is not None and not j.is_finished()]
+        if not running:
+            self.status_label.setText(f"⏳ {len(jobs)} transfer(s) waiting")
+            return
+        current = running[0]
+        verb = {COPY: "Copying", MOVE: "Moving", DELETE: "Deleting"}[current.operation]
+        if current.state == PAUSED:
+            self.status_label.setText(f"⏸ Paused: {verb.lower()} {current.current}")
+            return
+        text = f"⏳ {verb} {current.current}"
+        rate = sum(j.rate for j in running)
+        if rate > 0:
+            text += f" — {self.format_size(rate)}/s"
+            seconds = (total - done) / rate
+            text += f", {int(seconds // 60)}:{int(seconds % 60):02d} left"
+        if len(jobs) > 1:
+            text += f" ({len(jobs) - 1} more)"
+        self.status_label.setText(text)
+    
+    def transfer_finished(self, job):
+        verb = {COPY: "Copied", MOVE: "Moved", DELETE: "Deleted"}[job.operation]
+        if job.state == CANCELLED:
+            self.status_label.setText(f"✖ Cancelled after {job.done_items}/{job.total_items} items")
+        else:
+            done = job.done_items - len(job.errors)
+            self.status_label.setText(f"✅ {verb} {done}/{job.total_items} items")
+        # Watched panes pick the changes up from their own events
+        self.refresh_after_operation()
+        if self.split_view_enabled and not self.second_pane.watcher.is_watching():
+            self.second_pane.refresh()
     
     def change_view_mode(self, mode):
-        """Change view mode"""
+        """Switch between list, details and thumbnail grid views
+        
+        List shows names, sizes and dates, details every column; both views
+        and the grid share one model and selection.
+        """
         self.view_mode = mode
+        if mode == "grid":
+            self.file_views.setCurrentWidget(self.file_grid)
+        else:
+            for column in (2, 4):
+                self.file_tree.setColumnHidden(column, mode == "list")
+            self.file_views.setCurrentWidget(self.file_tree)
+        self.file_model.set_thumbnails_enabled(mode == "grid")
         self.status_label.setText(f"View: {mode}")
-        # Placeholder - would switch between list/grid/details
-        QMessageBox.information(self, "View Mode", 
-                               f"Switched to {mode} view\n(Full implementation coming soon!)")
     
     # ==================== TEMPLATES ====================
     
@@ -1853,7 +3190,7 @@ class MainWindow(QMainWindow):
         if reply == QMessageBox.StandardButton.Yes:
             if self.template_manager.apply_template(template_data, self.current_path):
                 QMessageBox.information(self, "Success", "Template applied!")
-                self.refresh_file_browser()
+                self.refresh_after_operation()
     
     def show_template_structure(self):
         """Show template preview"""
@@ -0,0 +1,57 @@
+"""
+gui/rename_preview_model.py
+Lazy old name -> new name preview for batch renames
+"""
+
+import os
+
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+from core.rename_planner import RenamePlan
+
+
+class RenamePreviewModel(QAbstractTableModel):
+    """Table over a RenamePlan
+
+    New names are only worked out for rows the view paints, so a preview
+    of 100k files opens as fast as one of ten.
+    """
+
+    COLUMNS = ["Name", "New Name", "Problem"]
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.plan = None
+
+    def set_plan(self, plan: RenamePlan):
+        self.beginResetModel()
+        self.plan = plan
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid() or self.plan is None:
+            return 0
+        return len(self.plan)
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or self.plan is None:
+            return None
+        row, column = index.row(), index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if column == 0:
+                return os.path.basename(self.plan.sources[row])
+            if column == 1:
+                return os.path.basename(self.plan.target(row))
+            return self.plan.problem(row) or ""
+        if role == Qt.ItemDataRole.ForegroundRole and self.plan.problem(row):
+            return QColor("#d32f2f")
+        return None
@@ -3,12 +3,69 @@ Advanced Modular File Organization System
 Main entry point for the application
 """
 
+import argparse
+import signal
 import sys
+import threading
 from pathlib import Path
-from PyQt6.QtWidgets import QApplication
-from gui.main_window import MainWindow
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Advanced File Organizer")
+    parser.add_argument('--watch', nargs='+', metavar='FOLDER', type=Path,
+                        help="run headless, sorting new files in these folders by the organize rules; "
+                             "moves are logged to watch-history.jsonl, not the app's undo history")
+    parser.add_argument('--dest', type=Path,
+                        help="root the rule target folders are under (default: each watched folder)")
+    parser.add_argument('--template', help="use rules made from this template instead of the saved rules")
+    parser.add_argument('--recursive', action='store_true', help="also watch subfolders")
+    parser.add_argument('--stable-ms', type=int, default=2000,
+                        help="move a file once its size hasn't changed for this long (default: 2000)")
+    parser.add_argument('--rate', type=float, default=20.0,
+                        help="move at most this many files per second (default: 20)")
+    parser.add_argument('--no-sweep', action='store_true', help="leave files already in the folders alone")
+    return parser.parse_args()
+
+def watch(args):
+    from core.advanced_file_manager import AdvancedFileManager
+    from core.template_manager import TemplateManager
+    from core.organizer import rules_for_template
+    from core.organize_watcher import OrganizeWatcher
+    
+    # Own history, so the app can run at the same time
+    file_manager = AdvancedFileManager(history_name='watch-history.jsonl')
+    if args.template:
+        template = TemplateManager().get_template_by_name(args.template)
+        if template is None:
+            sys.exit(f"No template named '{args.template}'")
+        rules = rules_for_template(template)
+    else:
+        rules = file_manager.get_organize_rules()
+    rules = [rule for rule in rules if rule.enabled]
+    if not rules:
+        sys.exit("No organize rules; save some in Tools > Organize Folder or pass --template")
+    
+    watcher = OrganizeWatcher(file_manager, rules, args.watch, args.dest, args.recursive,
+                              args.stable_ms, args.rate)
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda *_: stop.set())
+    signal.signal(signal.SIGINT, lambda *_: stop.set())
+    watcher.start(sweep=not args.no_sweep)
+    print(f"Watching {', '.join(str(folder) for folder in args.watch)} with {len(rules)} rules")
+    while not stop.wait(1):
+        pass
+    watcher.close()
+    file_manager.close()
+    print(f"Stopped after moving {watcher.moved} files")
 
 def main():
+    args = parse_args()
+    if args.watch:
+        watch(args)
+        return
+    
+    from PyQt6.QtWidgets import QApplication
+    from gui.main_window import MainWindow
+    
     app = QApplication(sys.argv)
     app.setApplicationName("Advanced File Organizer")
     app.setOrganizationName("FileOrgSystem")